@@ -0,0 +1,213 @@
+import statistics
+
+import frappe
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+ANALYTICS_CACHE_KEY = "vulero_session_planner:evaluation_analytics"
+ANALYTICS_SCOPES = ("cohort", "license_program")
+PERCENTILES = (10, 25, 50, 75, 90)
+PRECISION = 4
+
+
+def get_evaluation_analytics(cohort=None, license_program=None):
+	"""Score statistics of the Published Evaluations of a cohort or license program.
+
+	Returns per-criterion distributions of the raw scores and of the score as a percentage of
+	`max_score`, and distributions of the weighted totals, raw and normalized against the
+	weighted maximum. Results are cached until an Evaluation of the scope is published or changed.
+	"""
+	scope, value = ("cohort", cohort) if cohort else ("license_program", license_program)
+	if not value:
+		frappe.throw("Select a cohort or license program.")
+
+	cache_field = _get_cache_field(scope, value)
+	cached = frappe.cache.hget(ANALYTICS_CACHE_KEY, cache_field)
+	if cached is not None:
+		return cached
+
+	analytics = compute_analytics(_get_score_rows(scope, value))
+	analytics[scope] = value
+	frappe.cache.hset(ANALYTICS_CACHE_KEY, cache_field, analytics)
+	return analytics
+
+
+def clear_analytics_cache(cohort=None, license_program=None):
+	fields = [
+		_get_cache_field(scope, value)
+		for scope, value in (("cohort", cohort), ("license_program", license_program))
+		if value
+	]
+	if fields:
+		frappe.cache.hdel(ANALYTICS_CACHE_KEY, fields)
+
+
+def compute_analytics(rows):
+	"""Aggregate (evaluation, criterion_title, score, max_score, weight) rows."""
+	evaluations = {}
+	criteria = {}
+	for evaluation, criterion, score, max_score, weight in rows:
+		evaluations.setdefault(evaluation, len(evaluations))
+		criteria.setdefault(criterion or "", []).append((evaluations[evaluation], score, max_score, weight))
+
+	compute = _compute_numpy if np is not None else _compute_python
+	criterion_stats, totals, normalized_totals = compute(criteria, len(evaluations))
+	return {
+		"engine": "numpy" if np is not None else "python",
+		"evaluations": len(evaluations),
+		"criteria": criterion_stats,
+		"weighted_totals": totals,
+		"normalized_totals": normalized_totals,
+	}
+
+
+def _compute_numpy(criteria, evaluation_count):
+	totals = np.zeros(evaluation_count)
+	max_totals = np.zeros(evaluation_count)
+	criterion_stats = []
+	for criterion, entries in criteria.items():
+		index, score, max_score, weight = (
+			np.array(column, dtype=float) for column in zip(*entries, strict=True)
+		)
+		# Evaluation._set_total_score counts a missing weight as 1.
+		weight = np.nan_to_num(weight, nan=1.0)
+		score = np.nan_to_num(score)
+		max_score = np.nan_to_num(max_score)
+		index = index.astype(int)
+
+		totals += np.bincount(index, weights=score * weight, minlength=evaluation_count)
+		max_totals += np.bincount(index, weights=max_score * weight, minlength=evaluation_count)
+		scored = max_score > 0
+		criterion_stats.append(
+			{
+				"criterion": criterion,
+				"max_score": float(max_score.max()) if max_score.size else 0.0,
+				"score": _summarize_numpy(score),
+				"percent": _summarize_numpy(score[scored] * 100 / max_score[scored]),
+			}
+		)
+
+	scored = max_totals > 0
+	return (
+		criterion_stats,
+		_summarize_numpy(totals),
+		_summarize_numpy(totals[scored] * 100 / max_totals[scored]),
+	)
+
+
+def _summarize_numpy(values):
+	if not values.size:
+		return _empty_summary()
+	return _round_summary(
+		{
+			"count": int(values.size),
+			"mean": values.mean(),
+			"median": np.median(values),
+			"std": values.std(),
+			"min": values.min(),
+			"max": values.max(),
+			"percentiles": dict(
+				zip((f"p{q}" for q in PERCENTILES), np.percentile(values, PERCENTILES), strict=True)
+			),
+		}
+	)
+
+
+def _compute_python(criteria, evaluation_count):
+	totals = [0.0] * evaluation_count
+	max_totals = [0.0] * evaluation_count
+	criterion_stats = []
+	for criterion, entries in criteria.items():
+		scores, percents = [], []
+		for index, score, max_score, weight in entries:
+			weight = 1.0 if weight is None else weight
+			score = score or 0
+			max_score = max_score or 0
+			totals[index] += score * weight
+			max_totals[index] += max_score * weight
+			scores.append(score)
+			if max_score > 0:
+				percents.append(score * 100 / max_score)
+
+		criterion_stats.append(
+			{
+				"criterion": criterion,
+				"max_score": float(max((entry[2] or 0 for entry in entries), default=0)),
+				"score": _summarize_python(scores),
+				"percent": _summarize_python(percents),
+			}
+		)
+
+	normalized = [
+		total * 100 / maximum for total, maximum in zip(totals, max_totals, strict=True) if maximum > 0
+	]
+	return criterion_stats, _summarize_python(totals), _summarize_python(normalized)
+
+
+def _summarize_python(values):
+	if not values:
+		return _empty_summary()
+	ordered = sorted(float(value) for value in values)
+	return _round_summary(
+		{
+			"count": len(ordered),
+			"mean": statistics.fmean(ordered),
+			"median": statistics.median(ordered),
+			"std": statistics.pstdev(ordered),
+			"min": ordered[0],
+			"max": ordered[-1],
+			"percentiles": {f"p{q}": _percentile(ordered, q) for q in PERCENTILES},
+		}
+	)
+
+
+def _percentile(ordered, q):
+	# Linear interpolation between closest ranks, as numpy.percentile does by default.
+	position = (len(ordered) - 1) * q / 100
+	lower = int(position)
+	upper = min(lower + 1, len(ordered) - 1)
+	return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _round_summary(summary):
+	for key in ("mean", "median", "std", "min", "max"):
+		summary[key] = round(float(summary[key]), PRECISION)
+	summary["percentiles"] = {
+		name: round(float(value), PRECISION) for name, value in summary["percentiles"].items()
+	}
+	return summary
+
+
+def _empty_summary():
+	return {
+		"count": 0,
+		"mean": None,
+		"median": None,
+		"std": None,
+		"min": None,
+		"max": None,
+		"percentiles": dict.fromkeys(f"p{q}" for q in PERCENTILES),
+	}
+
+
+def _get_score_rows(scope, value):
+	if scope not in ANALYTICS_SCOPES:
+		frappe.throw(f"Unsupported analytics scope: {scope}")
+	return frappe.db.sql(
+		f"""
+		select evaluation.name, score.criterion_title, score.score, score.max_score, score.weight
+		from `tabEvaluation` evaluation
+		inner join `tabEvaluation Score` score
+			on score.parent = evaluation.name and score.parenttype = 'Evaluation'
+		where evaluation.status = 'Published' and evaluation.`{scope}` = %(value)s
+		order by evaluation.name, score.idx
+		""",
+		{"value": value},
+	)
+
+
+def _get_cache_field(scope, value):
+	return f"{scope}:{value}"
@@ -0,0 +1,21 @@
+import frappe
+
+from vulero_session_planner.analytics import get_evaluation_analytics
+from vulero_session_planner.utils import user_has_role
+
+ANALYTICS_ROLES = ("Coach Education Head", "Instructor", "System Manager")
+
+
+@frappe.whitelist()
+def get_cohort_analytics(cohort: str | None = None, license_program: str | None = None):
+	"""
+	Return score statistics of the Published Evaluations of a Cohort or License Program.
+	"""
+	if not any(user_has_role(role) for role in ANALYTICS_ROLES):
+		frappe.throw("Not permitted to view evaluation analytics.", frappe.PermissionError)
+	if cohort:
+		frappe.has_permission("Cohort", "read", cohort, throw=True)
+	elif license_program:
+		frappe.has_permission("License Program", "read", license_program, throw=True)
+
+	return get_evaluation_analytics(cohort=cohort, license_program=license_program)
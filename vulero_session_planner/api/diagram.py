@@ -1,5 +1,12 @@
+import base64
+
 import frappe
-from frappe.utils.file_manager import save_file
+
+from vulero_session_planner.diagram_files import store_diagram_preview
+
+UPLOAD_VARIANT = "upload"
+UPLOAD_CONTENT_TYPES = {"image/png": "png", "image/webp": "webp"}
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
 
 
 @frappe.whitelist()
@@ -7,8 +14,41 @@ def save_diagram_file(file_name: str, content: str, docname: str, is_private: in
 	"""
 	Save a base64-encoded PNG for a Diagram doc and return the file URL.
 	"""
+	try:
+		data = base64.b64decode(content, validate=True)
+	except ValueError:
+		frappe.throw("Preview content is not valid base64.")
+
+	extension = (file_name or "").rsplit(".", 1)[-1].lower()
+	if extension not in UPLOAD_CONTENT_TYPES.values():
+		extension = "png"
+	return _store_upload(docname, data, extension, is_private)
+
+
+@frappe.whitelist(methods=["POST"])
+def upload_diagram_preview(docname: str, is_private: int = 0):
+	"""
+	Save a preview image sent as multipart/form-data (field `file`) and return the file URL.
+	"""
+	upload = frappe.request.files.get("file") if frappe.request else None
+	if not upload:
+		frappe.throw("No preview file was uploaded.")
+
+	extension = UPLOAD_CONTENT_TYPES.get(upload.mimetype)
+	if not extension:
+		frappe.throw("Previews must be PNG or WebP images.")
+
+	return _store_upload(docname, upload.stream.read(MAX_UPLOAD_BYTES + 1), extension, is_private)
+
+
+def _store_upload(docname, data, extension, is_private):
 	if not docname:
 		frappe.throw("Diagram must be saved before uploading a preview.")
+	frappe.has_permission("Diagram", "write", docname, throw=True)
+	if not data:
+		frappe.throw("The preview file is empty.")
+	if len(data) > MAX_UPLOAD_BYTES:
+		frappe.throw("The preview file is too large.")
 
-	file_doc = save_file(file_name, content, "Diagram", docname, is_private=is_private, decode=True)
-	return {"file_url": file_doc.file_url}
+	file_url = store_diagram_preview(docname, UPLOAD_VARIANT, extension, data, is_private=is_private)
+	return {"file_url": file_url}
@@ -0,0 +1,25 @@
+import frappe
+
+from vulero_session_planner.session_plan_export import enqueue_cohort_export, get_session_plan_export
+
+
+@frappe.whitelist()
+def download_session_plan(name: str, export_format: str = "pdf"):
+	"""
+	Download the Session Plan Template print of a Session Plan as PDF or HTML.
+	"""
+	frappe.has_permission("Session Plan", "read", name, throw=True)
+	content = get_session_plan_export(name, export_format)
+
+	frappe.local.response.filename = f"{name}.{export_format}"
+	frappe.local.response.filecontent = content
+	frappe.local.response.type = "pdf" if export_format == "pdf" else "download"
+
+
+@frappe.whitelist(methods=["POST"])
+def export_cohort_session_plans(cohort: str, export_format: str = "pdf"):
+	"""
+	Queue a zip of the approved Session Plans of a Cohort; progress is published on the Cohort.
+	"""
+	frappe.has_permission("Cohort", "read", cohort, throw=True)
+	return {"job_id": enqueue_cohort_export(cohort, export_format)}
@@ -1,7 +1,10 @@
 import frappe
 
+from vulero_session_planner.permissions import check_permissions as _check_permissions
 from vulero_session_planner.utils import user_has_role
 
+MAX_BATCH_PERMISSION_NAMES = 1000
+
 
 def has_app_permission(user=None):
 	user = user or frappe.session.user
@@ -10,3 +13,15 @@ def has_app_permission(user=None):
 
 	allowed_roles = {"Coach Education Head", "Instructor", "Coach", "System Manager"}
 	return any(user_has_role(role, user) for role in allowed_roles)
+
+
+@frappe.whitelist()
+def check_permissions(doctype, names, ptype="read"):
+	"""Return a name -> bool map of the session user's `ptype` access to `names`."""
+	names = frappe.parse_json(names) if isinstance(names, str) else names
+	if not isinstance(names, list):
+		frappe.throw("names must be a list of document names.")
+	if len(names) > MAX_BATCH_PERMISSION_NAMES:
+		frappe.throw(f"Check at most {MAX_BATCH_PERMISSION_NAMES} documents per call.")
+
+	return _check_permissions(doctype, names, ptype=ptype, user=frappe.session.user)
@@ -0,0 +1,16 @@
+import frappe
+
+from vulero_session_planner.delta_sync import DEFAULT_PAGE_SIZE
+from vulero_session_planner.delta_sync import get_changes_since as _get_changes_since
+
+
+@frappe.whitelist()
+def get_changes_since(cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+	"""
+	Return the Session Plans, Diagrams, Review Comments and Evaluations the user can read that changed
+	after `cursor`, with tombstones for deleted ones and the cursor of the next page. `full_resync` is
+	set when the user's access changed and the local copy has to be rebuilt.
+	"""
+	if frappe.session.user == "Guest":
+		frappe.throw("Log in to sync session plans.", frappe.PermissionError)
+	return _get_changes_since(cursor, page_size)
@@ -0,0 +1,19 @@
+import math
+import statistics
+
+
+def summarize_timings(samples):
+	"""Summarize durations in seconds as millisecond statistics."""
+	samples = sorted(samples)
+	return {
+		"iterations": len(samples),
+		"mean_ms": _ms(statistics.fmean(samples)),
+		"p50_ms": _ms(statistics.median(samples)),
+		"p95_ms": _ms(samples[math.ceil(len(samples) * 0.95) - 1]),
+		"min_ms": _ms(samples[0]),
+		"max_ms": _ms(samples[-1]),
+	}
+
+
+def _ms(seconds):
+	return round(seconds * 1000, 3)
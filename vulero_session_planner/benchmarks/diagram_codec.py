@@ -0,0 +1,177 @@
+import json
+import random
+import time
+
+import frappe
+from frappe.utils import now
+
+import vulero_session_planner
+from vulero_session_planner.benchmarks import summarize_timings
+from vulero_session_planner.vulero_session_planner.doctype.diagram.diagram import (
+	DIAGRAM_JSON_PREFIX,
+	decode_diagram_json,
+	encode_diagram_json,
+)
+
+
+def run(limit=200, iterations=20, output=None):
+	"""Compare stored size and load time of plain fabric JSON against the compact format.
+
+	Uses the site's Diagrams when they have canvas data and synthetic canvases otherwise.
+	"""
+	samples = _get_site_samples(limit)
+	source = "site"
+	if not samples:
+		samples = [_build_sample_canvas(seed) for seed in range(limit)]
+		source = "synthetic"
+	encoded = [encode_diagram_json(sample) for sample in samples]
+
+	parse_plain, parse_encoded = [], []
+	for _ in range(iterations):
+		started = time.perf_counter()
+		for sample in samples:
+			json.loads(sample)
+		parse_plain.append((time.perf_counter() - started) / len(samples))
+
+		started = time.perf_counter()
+		for value in encoded:
+			json.loads(decode_diagram_json(value))
+		parse_encoded.append((time.perf_counter() - started) / len(samples))
+
+	plain_bytes = sum(len(sample.encode()) for sample in samples)
+	encoded_bytes = sum(len(value) for value in encoded)
+	report = {
+		"app_version": vulero_session_planner.__version__,
+		"site": frappe.local.site,
+		"started_at": now(),
+		"source": source,
+		"diagrams": len(samples),
+		"plain_bytes": plain_bytes,
+		"encoded_bytes": encoded_bytes,
+		"size_ratio": round(encoded_bytes / plain_bytes, 4) if plain_bytes else None,
+		"parse_plain": summarize_timings(parse_plain),
+		"decode_and_parse": summarize_timings(parse_encoded),
+		"get_doc": _time_get_doc(limit, iterations),
+	}
+
+	if output:
+		with open(output, "w") as f:
+			json.dump(report, f, indent=1, default=str)
+
+	return report
+
+
+def _get_site_samples(limit):
+	values = frappe.get_all(
+		"Diagram",
+		filters={"diagram_json": ["is", "set"]},
+		pluck="diagram_json",
+		order_by="modified desc",
+		limit=limit,
+	)
+	# Stored rows may already be compact; measure them against their expanded form.
+	return [decode_diagram_json(value) for value in values]
+
+
+def _time_get_doc(limit, iterations):
+	names = frappe.get_all("Diagram", filters={"diagram_json": ["is", "set"]}, pluck="name", limit=limit)
+	if not names:
+		return None
+
+	stored = frappe.get_all("Diagram", filters={"name": ["in", names]}, pluck="diagram_json")
+	timings = []
+	for _ in range(iterations):
+		started = time.perf_counter()
+		for name in names:
+			frappe.get_doc("Diagram", name).run_method("onload")
+		timings.append((time.perf_counter() - started) / len(names))
+
+	return {
+		"stored_format": "compact"
+		if all(value.startswith(DIAGRAM_JSON_PREFIX) for value in stored)
+		else "plain or mixed",
+		**summarize_timings(timings),
+	}
+
+
+def _build_sample_canvas(seed, objects=120):
+	"""Return a fabric 5 canvas JSON string shaped like a saved tactical diagram."""
+	rng = random.Random(seed)
+	common = {
+		"version": "5.3.0",
+		"originX": "left",
+		"originY": "top",
+		"stroke": "#ffffff",
+		"strokeWidth": 2,
+		"strokeDashArray": None,
+		"strokeLineCap": "butt",
+		"strokeDashOffset": 0,
+		"strokeLineJoin": "miter",
+		"strokeUniform": False,
+		"strokeMiterLimit": 4,
+		"scaleX": 1,
+		"scaleY": 1,
+		"angle": 0,
+		"flipX": False,
+		"flipY": False,
+		"opacity": 1,
+		"shadow": None,
+		"visible": True,
+		"backgroundColor": "",
+		"fillRule": "nonzero",
+		"paintFirst": "fill",
+		"globalCompositeOperation": "source-over",
+		"skewX": 0,
+		"skewY": 0,
+	}
+
+	def position():
+		return {"left": rng.uniform(12, 888), "top": rng.uniform(12, 588)}
+
+	items = [
+		{**common, "type": "rect", "left": 12, "top": 12, "width": 876, "height": 576, "isBackground": True},
+		{**common, "type": "line", "x1": -438, "y1": 0, "x2": 438, "y2": 0, "isBackground": True},
+	]
+	for index in range(objects):
+		kind = index % 3
+		if kind == 0:
+			items.append({**common, **position(), "type": "circle", "radius": 9, "fill": "#1f6feb"})
+		elif kind == 1:
+			items.append(
+				{
+					**common,
+					**position(),
+					"type": "path",
+					"fill": "",
+					"path": [["M", rng.uniform(0, 900), rng.uniform(0, 600)]]
+					+ [["Q", *(rng.uniform(0, 900) for _ in range(4))] for _ in range(12)],
+				}
+			)
+		else:
+			items.append(
+				{
+					**common,
+					**position(),
+					"type": "textbox",
+					"text": str(index),
+					"fontSize": 16,
+					"fontFamily": "Arial",
+					"fontWeight": "normal",
+					"fontStyle": "normal",
+					"lineHeight": 1.16,
+					"underline": False,
+					"overline": False,
+					"linethrough": False,
+					"textAlign": "left",
+					"textBackgroundColor": "",
+					"charSpacing": 0,
+					"styles": [],
+					"direction": "ltr",
+					"path": None,
+					"pathStartOffset": 0,
+					"pathSide": "left",
+					"pathAlign": "baseline",
+				}
+			)
+
+	return json.dumps({"version": "5.3.0", "objects": items, "background": "#0b8d2f"})
@@ -0,0 +1,144 @@
+import json
+import time
+
+import frappe
+from frappe.utils import now
+
+import vulero_session_planner
+from vulero_session_planner.benchmarks import summarize_timings
+from vulero_session_planner.benchmarks.seed import BENCH_PREFIX, get_seeded_users
+from vulero_session_planner.permissions import check_permissions
+
+BENCHMARK_ROLES = ("Coach Education Head", "Instructor", "Coach")
+APP_HOOK_PREFIX = "vulero_session_planner."
+
+
+def run(iterations=20, users_per_role=3, sample_size=200, page_length=20, output=None):
+	"""Time every permission hook of the app for seeded users of each role.
+
+	`*_permission_query_conditions` are measured through `frappe.get_list`, so the timing covers
+	the generated SQL; `has_*_permission` hooks are timed per document and against the batch
+	`check_permissions` call for the same names. The request-local scope memo is cleared
+	before every iteration, as it would be between requests.
+	"""
+	users = {role: get_seeded_users(role, limit=users_per_role) for role in BENCHMARK_ROLES}
+	if not any(users.values()):
+		frappe.throw("No benchmark users found. Seed the site first.")
+
+	settings = {
+		"iterations": iterations,
+		"users_per_role": users_per_role,
+		"sample_size": sample_size,
+		"page_length": page_length,
+	}
+	report = {
+		"app_version": vulero_session_planner.__version__,
+		"frappe_version": frappe.__version__,
+		"site": frappe.local.site,
+		"db_type": frappe.db.db_type,
+		"started_at": now(),
+		"settings": settings,
+		"volumes": _get_volumes(),
+	}
+
+	original_user = frappe.session.user
+	try:
+		report["query_conditions"] = _time_query_conditions(users, iterations, page_length)
+		report["has_permission"] = _time_has_permission(users, iterations, sample_size)
+	finally:
+		frappe.set_user(original_user)
+
+	if output:
+		with open(output, "w") as f:
+			json.dump(report, f, indent=1, default=str)
+
+	return report
+
+
+def _time_query_conditions(users, iterations, page_length):
+	results = []
+	for doctype, method in _get_app_hooks("permission_query_conditions"):
+		for role, role_users in users.items():
+			for user in role_users:
+				frappe.set_user(user)
+				samples = []
+				for _ in range(iterations):
+					_reset_request_state()
+					started = time.perf_counter()
+					rows = frappe.get_list(doctype, fields=["name"], limit_page_length=page_length)
+					samples.append(time.perf_counter() - started)
+
+				results.append(
+					{
+						"doctype": doctype,
+						"method": method,
+						"role": role,
+						"user": user,
+						"rows": len(rows),
+						**summarize_timings(samples),
+					}
+				)
+	return results
+
+
+def _time_has_permission(users, iterations, sample_size):
+	results = []
+	for doctype, method in _get_app_hooks("has_permission"):
+		names = frappe.get_all(
+			doctype,
+			filters={"name": ["like", f"{BENCH_PREFIX}%"]},
+			pluck="name",
+			order_by="name asc",
+			limit=sample_size,
+		)
+		if not names:
+			continue
+
+		docs = [frappe.get_doc(doctype, name) for name in names]
+		hook = frappe.get_attr(method)
+		for role, role_users in users.items():
+			for user in role_users:
+				frappe.set_user(user)
+				single, batch = [], []
+				for _ in range(iterations):
+					_reset_request_state()
+					started = time.perf_counter()
+					granted = {doc.name: bool(hook(doc, "read", user)) for doc in docs}
+					single.append((time.perf_counter() - started) / len(docs))
+
+					_reset_request_state()
+					started = time.perf_counter()
+					batch_granted = check_permissions(doctype, names, "read", user)
+					batch.append(time.perf_counter() - started)
+
+				results.append(
+					{
+						"doctype": doctype,
+						"method": method,
+						"role": role,
+						"user": user,
+						"documents": len(docs),
+						"granted": sum(granted.values()),
+						"batch_mismatches": sum(granted[name] != batch_granted.get(name) for name in names),
+						"per_document": summarize_timings(single),
+						"batch": summarize_timings(batch),
+					}
+				)
+	return results
+
+
+def _get_app_hooks(hook):
+	for doctype, methods in frappe.get_hooks(hook).items():
+		for method in methods:
+			if method.startswith(APP_HOOK_PREFIX):
+				yield doctype, method
+
+
+def _get_volumes():
+	doctypes = {doctype for doctype, _ in _get_app_hooks("permission_query_conditions")}
+	doctypes.update({"Session Plan Block", "Instructor Coach Access"})
+	return {doctype: frappe.db.count(doctype) for doctype in sorted(doctypes)}
+
+
+def _reset_request_state():
+	frappe.local.vulero_user_scopes = {}
@@ -0,0 +1,310 @@
+import frappe
+from frappe.utils import add_days, create_batch, now, nowdate
+
+from vulero_session_planner.utils import clear_user_scope
+from vulero_session_planner.vulero_session_planner.doctype.assignment.assignment import (
+	COHORT_COACHES_CACHE_KEY,
+	sync_assignments_for_cohort,
+)
+from vulero_session_planner.vulero_session_planner.doctype.instructor_coach_access.instructor_coach_access import (
+	rebuild_instructor_coach_access,
+)
+
+# Every seeded record (and user) is named with this prefix so it can be removed again.
+BENCH_PREFIX = "bench-"
+BENCH_EMAIL_DOMAIN = "example.com"
+INSERT_BATCH_SIZE = 5000
+
+DEFAULT_VOLUMES = {
+	"license_programs": 4,
+	"cohorts": 20,
+	"instructors": 20,
+	"assignments_per_instructor": 2,
+	"coaches": 400,
+	"plans_per_coach": 10,
+	"blocks_per_plan": 6,
+	"diagrams_per_plan": 2,
+	"evaluations_per_plan": 1,
+	"comments_per_plan": 2,
+}
+
+# Seeded parent doctypes; their child rows are matched by parent name on cleanup.
+SEEDED_DOCTYPES = (
+	"Review Comment",
+	"Evaluation",
+	"Diagram",
+	"Session Plan",
+	"Assignment",
+	"Coach Profile",
+	"Instructor Profile",
+	"Cohort",
+	"License Program",
+)
+SEEDED_CHILD_DOCTYPES = ("Session Plan Block", "Evaluation Score", "Assignment Coach", "Has Role")
+
+BLOCK_PHASES = ("Warming up", "Main part", "Main part", "Main part", "Main part", "Cooling down")
+
+
+def seed(**volumes):
+	"""Insert a synthetic data set sized by `volumes` (see DEFAULT_VOLUMES) and return row counts per doctype.
+
+	Rows are bulk inserted without running controllers, so derived data (Instructor Coach
+	Access, Assignment cohort coaches) is rebuilt explicitly afterwards.
+	"""
+	volumes = {**DEFAULT_VOLUMES, **{key: value for key, value in volumes.items() if value is not None}}
+	clear()
+
+	seeder = _Seeder()
+	programs = [f"{BENCH_PREFIX}program-{i:03d}" for i in range(volumes["license_programs"])]
+	seeder.add(
+		"License Program",
+		[{"name": name, "program_name": name, "program_type": "Standard"} for name in programs],
+	)
+
+	cohorts = []
+	for i in range(volumes["cohorts"]):
+		name = f"{BENCH_PREFIX}cohort-{i:03d}"
+		cohorts.append({"name": name, "license_program": programs[i % len(programs)]})
+	seeder.add(
+		"Cohort",
+		[
+			{
+				"name": cohort["name"],
+				"cohort_name": cohort["name"],
+				"license_program": cohort["license_program"],
+				"status": "Active",
+			}
+			for cohort in cohorts
+		],
+	)
+
+	head = seeder.add_user("head-000", "Coach Education Head")
+
+	instructors = [
+		seeder.add_user(f"instructor-{i:04d}", "Instructor") for i in range(volumes["instructors"])
+	]
+	seeder.add(
+		"Instructor Profile",
+		[
+			{"name": user, "user": user, "full_name": user, "specialization": "General"}
+			for user in instructors
+		],
+	)
+
+	cohort_instructors = {cohort["name"]: [] for cohort in cohorts}
+	assignments = []
+	for i, instructor in enumerate(instructors):
+		for offset in range(min(volumes["assignments_per_instructor"], len(cohorts))):
+			cohort = cohorts[(i + offset) % len(cohorts)]["name"]
+			cohort_instructors[cohort].append(instructor)
+			assignments.append(
+				{
+					"name": f"{BENCH_PREFIX}ASSIGN-{len(assignments):06d}",
+					"instructor": instructor,
+					"cohort": cohort,
+					"status": "Active",
+					"start_date": nowdate(),
+				}
+			)
+	seeder.add("Assignment", assignments)
+
+	coaches = []
+	for i in range(volumes["coaches"]):
+		cohort = cohorts[i % len(cohorts)]
+		user = seeder.add_user(f"coach-{i:05d}", "Coach")
+		coaches.append(
+			{
+				"name": user,
+				"user": user,
+				"full_name": user,
+				"status": "Active",
+				"cohort": cohort["name"],
+				"license_program": cohort["license_program"],
+				"account_expiry_date": add_days(nowdate(), 365),
+			}
+		)
+	seeder.add("Coach Profile", coaches)
+
+	plans, blocks, diagrams, evaluations, scores, comments = [], [], [], [], [], []
+	for coach in coaches:
+		instructors_for_cohort = cohort_instructors[coach["cohort"]]
+		for _ in range(volumes["plans_per_coach"]):
+			plan = f"{BENCH_PREFIX}SP-{len(plans):07d}"
+			plans.append(
+				{
+					"name": plan,
+					"title": f"Benchmark session {len(plans)}",
+					"coach": coach["name"],
+					"cohort": coach["cohort"],
+					"license_program": coach["license_program"],
+					"status": "Approved" if len(plans) % 3 == 0 else "Draft",
+					"session_date": nowdate(),
+					"duration_minutes": 60,
+					"version_no": 1,
+				}
+			)
+
+			plan_diagrams = []
+			for sequence in range(1, volumes["diagrams_per_plan"] + 1):
+				diagram = f"{BENCH_PREFIX}DIAG-{len(diagrams):07d}"
+				plan_diagrams.append(diagram)
+				diagrams.append(
+					{
+						"name": diagram,
+						"title": f"{plan} diagram {sequence}",
+						"pitch_type": "Full",
+						"orientation": "Horizontal",
+						"linked_session_plan": plan,
+						"linked_block_sequence": sequence,
+						"created_by": coach["user"],
+					}
+				)
+
+			for sequence in range(1, volumes["blocks_per_plan"] + 1):
+				blocks.append(
+					{
+						"name": f"{plan}-block-{sequence}",
+						"parent": plan,
+						"parenttype": "Session Plan",
+						"parentfield": "blocks",
+						"idx": sequence,
+						"sequence": sequence,
+						"time_minutes": 10,
+						"phase": BLOCK_PHASES[(sequence - 1) % len(BLOCK_PHASES)],
+						"diagram": plan_diagrams[sequence - 1] if sequence <= len(plan_diagrams) else None,
+					}
+				)
+
+			for i in range(volumes["comments_per_plan"]):
+				comments.append(
+					{
+						"name": f"{BENCH_PREFIX}RC-{len(comments):07d}",
+						"session_plan": plan,
+						"block_sequence": i + 1,
+						"comment_type": "General",
+						"comment_text": "Benchmark comment",
+						"created_by": instructors_for_cohort[0] if instructors_for_cohort else head,
+						"created_on": now(),
+					}
+				)
+
+			for instructor in instructors_for_cohort[: volumes["evaluations_per_plan"]]:
+				evaluation = f"{BENCH_PREFIX}EVAL-{len(evaluations):07d}"
+				evaluations.append(
+					{
+						"name": evaluation,
+						"coach": coach["name"],
+						"instructor": instructor,
+						"session_plan": plan,
+						"cohort": coach["cohort"],
+						"license_program": coach["license_program"],
+						"status": "Published",
+						"total_score": 4,
+					}
+				)
+				scores.append(
+					{
+						"name": f"{evaluation}-score-1",
+						"parent": evaluation,
+						"parenttype": "Evaluation",
+						"parentfield": "scores",
+						"idx": 1,
+						"criterion_title": "Organisation",
+						"max_score": 5,
+						"weight": 1,
+						"score": 4,
+					}
+				)
+
+	seeder.add("Session Plan", plans)
+	seeder.add("Session Plan Block", blocks)
+	seeder.add("Diagram", diagrams)
+	seeder.add("Evaluation", evaluations)
+	seeder.add("Evaluation Score", scores)
+	seeder.add("Review Comment", comments)
+	seeder.flush_users()
+
+	rebuild_instructor_coach_access()
+	for cohort in cohorts:
+		sync_assignments_for_cohort(cohort["name"])
+	_clear_caches()
+
+	return seeder.counts
+
+
+def clear():
+	"""Delete every record created by `seed`."""
+	pattern = f"{BENCH_PREFIX}%"
+	for doctype in SEEDED_CHILD_DOCTYPES:
+		frappe.db.delete(doctype, {"parent": ["like", pattern]})
+	for doctype in SEEDED_DOCTYPES:
+		frappe.db.delete(doctype, {"name": ["like", pattern]})
+	frappe.db.delete("User", {"name": ["like", pattern]})
+	frappe.db.delete("Instructor Coach Access", {"instructor": ["like", pattern]})
+	_clear_caches()
+
+
+def get_seeded_users(role, limit=None):
+	return frappe.get_all(
+		"Has Role",
+		filters={"parent": ["like", f"{BENCH_PREFIX}%"], "parenttype": "User", "role": role},
+		pluck="parent",
+		order_by="parent asc",
+		limit=limit or 0,
+	)
+
+
+def _clear_caches():
+	clear_user_scope()
+	frappe.cache.delete_key(COHORT_COACHES_CACHE_KEY)
+	frappe.clear_cache(doctype="User")
+
+
+class _Seeder:
+	def __init__(self):
+		self.timestamp = now()
+		self.owner = frappe.session.user
+		self.counts = {}
+		self.users = []
+		self.roles = []
+
+	def add(self, doctype, rows):
+		if not rows:
+			return
+
+		fields = ["creation", "modified", "owner", "modified_by", *rows[0]]
+		values = [
+			(self.timestamp, self.timestamp, self.owner, self.owner, *(row[field] for field in rows[0]))
+			for row in rows
+		]
+		for batch in create_batch(values, INSERT_BATCH_SIZE):
+			frappe.db.bulk_insert(doctype, fields=fields, values=batch)
+		self.counts[doctype] = self.counts.get(doctype, 0) + len(rows)
+
+	def add_user(self, slug, role):
+		user = f"{BENCH_PREFIX}{slug}@{BENCH_EMAIL_DOMAIN}"
+		self.users.append(
+			{
+				"name": user,
+				"email": user,
+				"first_name": slug,
+				"enabled": 1,
+				"user_type": "System User",
+				"send_welcome_email": 0,
+			}
+		)
+		self.roles.append(
+			{
+				"name": frappe.generate_hash(length=12),
+				"parent": user,
+				"parenttype": "User",
+				"parentfield": "roles",
+				"role": role,
+			}
+		)
+		return user
+
+	def flush_users(self):
+		self.add("User", self.users)
+		self.add("Has Role", self.roles)
+		self.users, self.roles = [], []
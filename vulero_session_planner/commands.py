@@ -0,0 +1,236 @@
+import sys
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-instructor-access")
+@pass_context
+def rebuild_instructor_access(context):
+	"""Rebuild the Instructor Coach Access table from active assignments."""
+	import frappe
+
+	from vulero_session_planner.vulero_session_planner.doctype.instructor_coach_access.instructor_coach_access import (
+		rebuild_instructor_coach_access,
+	)
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rows = rebuild_instructor_coach_access()
+		frappe.db.commit()
+		click.echo(f"Rebuilt Instructor Coach Access with {rows} rows.")
+	finally:
+		frappe.destroy()
+
+
+@click.command("check-query-plans")
+@pass_context
+def check_query_plans(context):
+	"""Fail if a permission condition or hot controller query falls back to a full table scan."""
+	import frappe
+
+	from vulero_session_planner.indexes import find_full_table_scans
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		problems = find_full_table_scans()
+	finally:
+		frappe.destroy()
+
+	for problem in problems:
+		click.echo(f"Full scan of {problem['table']} ({problem['rows']} rows) in: {problem['query']}")
+
+	if problems:
+		sys.exit(1)
+
+	click.echo("No full table scans found.")
+
+
+@click.command("drop-cohort-coach-rows")
+@pass_context
+def drop_cohort_coach_rows(context):
+	"""Delete stored Assignment Coach rows once virtual cohort coaches are enabled."""
+	import frappe
+
+	from vulero_session_planner.vulero_session_planner.doctype.assignment.assignment import (
+		drop_materialized_cohort_coaches,
+		use_virtual_cohort_coaches,
+	)
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if not use_virtual_cohort_coaches():
+			click.echo("Set vulero_virtual_cohort_coaches in site_config.json first.")
+			sys.exit(1)
+		drop_materialized_cohort_coaches()
+		frappe.db.commit()
+		click.echo("Dropped stored Assignment Coach rows.")
+	finally:
+		frappe.destroy()
+
+
+@click.command("seed-benchmark-data")
+@click.option("--coaches", type=click.IntRange(1), help="Number of Coach Profiles")
+@click.option("--instructors", type=click.IntRange(1), help="Number of Instructor Profiles")
+@click.option("--cohorts", type=click.IntRange(1), help="Number of Cohorts")
+@click.option("--license-programs", type=click.IntRange(1), help="Number of License Programs")
+@click.option("--assignments-per-instructor", type=click.IntRange(0), help="Active cohorts per instructor")
+@click.option("--plans-per-coach", type=click.IntRange(0), help="Session Plans per coach")
+@click.option("--blocks-per-plan", type=click.IntRange(0), help="Blocks per Session Plan")
+@click.option("--diagrams-per-plan", type=click.IntRange(0), help="Diagrams per Session Plan")
+@click.option("--evaluations-per-plan", type=click.IntRange(0), help="Evaluations per Session Plan")
+@click.option("--comments-per-plan", type=click.IntRange(0), help="Review Comments per Session Plan")
+@pass_context
+def seed_benchmark_data(context, **volumes):
+	"""Replace the synthetic benchmark data set on a development site."""
+	import frappe
+
+	from vulero_session_planner.benchmarks.seed import seed
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if not frappe.conf.developer_mode:
+			click.echo("Benchmark data can only be seeded with developer_mode enabled.")
+			sys.exit(1)
+		counts = seed(**volumes)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	for doctype, count in counts.items():
+		click.echo(f"{doctype}: {count}")
+
+
+@click.command("clear-benchmark-data")
+@pass_context
+def clear_benchmark_data(context):
+	"""Delete the synthetic benchmark data set."""
+	import frappe
+
+	from vulero_session_planner.benchmarks.seed import clear
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		clear()
+		frappe.db.commit()
+		click.echo("Deleted benchmark data.")
+	finally:
+		frappe.destroy()
+
+
+@click.command("benchmark-permissions")
+@click.option("--iterations", type=click.IntRange(1), default=20, show_default=True)
+@click.option("--users-per-role", type=click.IntRange(1), default=3, show_default=True)
+@click.option("--sample-size", type=click.IntRange(1), default=200, show_default=True)
+@click.option("--page-length", type=click.IntRange(1), default=20, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), help="JSON file to write results to")
+@pass_context
+def benchmark_permissions(context, iterations, users_per_role, sample_size, page_length, output):
+	"""Time the permission hooks against the seeded benchmark data."""
+	import frappe
+
+	from vulero_session_planner.benchmarks.permissions import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = run(
+			iterations=iterations,
+			users_per_role=users_per_role,
+			sample_size=sample_size,
+			page_length=page_length,
+			output=output,
+		)
+	finally:
+		frappe.destroy()
+
+	for row in report["query_conditions"]:
+		click.echo(
+			f"get_list {row['doctype']} ({row['role']}): p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms"
+		)
+	for row in report["has_permission"]:
+		click.echo(
+			f"has_permission {row['doctype']} ({row['role']}): {row['per_document']['p50_ms']} ms/doc,"
+			f" batch of {row['documents']} {row['batch']['p50_ms']} ms"
+		)
+	if output:
+		click.echo(f"Wrote {output}")
+
+
+@click.command("benchmark-diagram-codec")
+@click.option("--limit", type=click.IntRange(1), default=200, show_default=True)
+@click.option("--iterations", type=click.IntRange(1), default=20, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), help="JSON file to write results to")
+@pass_context
+def benchmark_diagram_codec(context, limit, iterations, output):
+	"""Report storage and load-time savings of the compact Diagram JSON format."""
+	import frappe
+
+	from vulero_session_planner.benchmarks.diagram_codec import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = run(limit=limit, iterations=iterations, output=output)
+	finally:
+		frappe.destroy()
+
+	click.echo(
+		f"{report['diagrams']} {report['source']} diagrams: {report['plain_bytes']} bytes plain,"
+		f" {report['encoded_bytes']} bytes compact (ratio {report['size_ratio']})"
+	)
+	click.echo(
+		f"parse p50 {report['parse_plain']['p50_ms']} ms/diagram plain,"
+		f" {report['decode_and_parse']['p50_ms']} ms/diagram compact"
+	)
+	if output:
+		click.echo(f"Wrote {output}")
+
+
+@click.command("repair-diagram-links")
+@click.option("--batch-size", type=click.IntRange(1), default=500, show_default=True)
+@pass_context
+def repair_diagram_links(context, batch_size):
+	"""Reconcile Diagram links with the Session Plan blocks that use them."""
+	import frappe
+
+	from vulero_session_planner.diagram_links import repair_diagram_link_chunk
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		after, total = "", 0
+		while True:
+			after, count = repair_diagram_link_chunk(after, batch_size)
+			frappe.db.commit()
+			total += count
+			if count < batch_size:
+				break
+		click.echo(f"Checked {total} diagrams.")
+	finally:
+		frappe.destroy()
+
+
+commands = [
+	rebuild_instructor_access,
+	check_query_plans,
+	drop_cohort_coach_rows,
+	seed_benchmark_data,
+	clear_benchmark_data,
+	benchmark_permissions,
+	benchmark_diagram_codec,
+	repair_diagram_links,
+]
@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import json
+
+import frappe
+from frappe.utils import add_to_date, get_datetime, now, now_datetime
+
+from vulero_session_planner.permissions import PERMISSION_FIELDS, check_record_permissions
+from vulero_session_planner.utils import get_user_scope
+
+SYNC_DOCTYPES = ("Session Plan", "Diagram", "Review Comment", "Evaluation")
+# Doctypes written around the document (preview renders, diagram links) page on a column those
+# writes bump instead of `modified`, so open forms are not made stale by background jobs.
+SYNC_COLUMNS = {"Session Plan": "sync_modified", "Diagram": "sync_modified"}
+SYNC_EXCLUDED_FIELDS = {"Session Plan": ("revision_delta",)}
+TOMBSTONES = "Deleted Document"
+DEFAULT_PAGE_SIZE = 100
+# How long a transaction may take to commit and still have its rows picked up by the next sync.
+COMMIT_LAG_SECONDS = 60
+MAX_PAGE_SIZE = 500
+
+
+def get_changes_since(cursor=None, page_size=DEFAULT_PAGE_SIZE):
+	"""Return the synced records the session user can read that changed after `cursor`.
+
+	The cursor is opaque to clients; it holds a (modified, name) position per doctype, or
+	(sync_modified, name) where SYNC_COLUMNS says so, and a (creation, name) position in Deleted
+	Document, so each page resumes exactly where the last one stopped. Once a doctype is caught up
+	its position is held COMMIT_LAG_SECONDS behind the clock, so rows from transactions that commit
+	late are sent on the next sync and recent ones may be sent twice. Records come with their child
+	tables and Diagram JSON decoded.
+
+	The cursor also carries a fingerprint of what the user can read. When it no longer matches,
+	`full_resync` is set and the changes start over: clients should drop their local copy first.
+	Clients should apply `deleted` before `changes` and fetch again while `has_more` is set.
+	"""
+	state = decode_cursor(cursor)
+	scope = get_scope_fingerprint()
+	full_resync = bool(cursor) and state.get("scope") != scope
+	positions = {} if full_resync else dict(state.get("positions") or {})
+	page_size = min(max(int(page_size or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+	horizon = [str(add_to_date(now_datetime(), seconds=-COMMIT_LAG_SECONDS)), ""]
+	# A fresh copy has nothing to delete, so only deletions from now on are needed.
+	positions.setdefault(TOMBSTONES, horizon)
+
+	changes, has_more = {}, False
+	for doctype in SYNC_DOCTYPES:
+		if not frappe.has_permission(doctype, "read", raise_exception=False):
+			continue
+		# get_list applies the permission query conditions of the doctype.
+		column = SYNC_COLUMNS.get(doctype, "modified")
+		rows = _get_page(frappe.get_list, doctype, column, positions.get(doctype), page_size)
+		positions[doctype] = _advance(positions.get(doctype), rows, column, page_size, horizon)
+		has_more = has_more or len(rows) == page_size
+		changes[doctype] = _serialize(doctype, [row.name for row in rows])
+
+	tombstones = _get_page(
+		frappe.get_all,
+		TOMBSTONES,
+		"creation",
+		positions[TOMBSTONES],
+		page_size,
+		fields=["deleted_doctype", "deleted_name", "data"],
+		filters={"deleted_doctype": ["in", SYNC_DOCTYPES], "restored": 0},
+	)
+	positions[TOMBSTONES] = _advance(positions[TOMBSTONES], tombstones, "creation", page_size, horizon)
+	has_more = has_more or len(tombstones) == page_size
+
+	return {
+		"changes": changes,
+		"deleted": _get_visible_deletions(tombstones),
+		"cursor": encode_cursor({"scope": scope, "positions": positions}),
+		"has_more": has_more,
+		"full_resync": full_resync,
+	}
+
+
+def get_scope_fingerprint(user=None):
+	"""Return a hash of everything that decides which synced records `user` can read."""
+	scope = get_user_scope(user)
+	access = []
+	if scope.instructor and not scope.has_full_access:
+		access = frappe.get_all(
+			"Instructor Coach Access",
+			filters={"instructor": scope.instructor},
+			fields=["cohort", "coach"],
+			order_by="cohort asc, coach asc",
+			as_list=True,
+		)
+	key = json.dumps(
+		[scope.user, sorted(scope.roles), scope.coach, scope.instructor, sorted(scope.cohorts), access],
+		default=str,
+	)
+	return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def mark_sync_changed(doctype, names):
+	"""Move `names` past every sync cursor after a write that did not go through the document."""
+	names = [name for name in dict.fromkeys(names) if name]
+	if not names:
+		return
+	frappe.db.set_value(doctype, {"name": ["in", names]}, SYNC_COLUMNS[doctype], now(), update_modified=False)
+	for name in names:
+		frappe.clear_document_cache(doctype, name)
+
+
+def encode_cursor(state):
+	return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor):
+	if not cursor:
+		return {}
+	try:
+		state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+	except ValueError:
+		frappe.throw("Invalid sync cursor.")
+	if not isinstance(state, dict) or not isinstance(state.get("positions", {}), dict):
+		frappe.throw("Invalid sync cursor.")
+	return state
+
+
+def _advance(position, rows, column, page_size, horizon):
+	# Keyset position after `rows`; once caught up, never past the commit-lag horizon.
+	if rows:
+		position = [str(rows[-1][column]), rows[-1].name]
+	if len(rows) == page_size or not position:
+		return position
+	return min(position, horizon, key=lambda value: (get_datetime(value[0]), value[1]))
+
+
+def _get_page(get_page, doctype, column, position, page_size, fields=(), filters=None):
+	# Keyset pagination on (column, name): the rest of the current timestamp, then later ones.
+	fields = ["name", column, *fields]
+	filters = dict(filters or {})
+
+	rows = []
+	if position:
+		value, name = position
+		rows = get_page(
+			doctype,
+			filters={**filters, column: value, "name": [">", name]},
+			fields=fields,
+			order_by="name asc",
+			limit=page_size,
+		)
+		filters[column] = [">", value]
+
+	if len(rows) < page_size:
+		rows += get_page(
+			doctype,
+			filters=filters,
+			fields=fields,
+			order_by=f"{column} asc, name asc",
+			limit=page_size - len(rows),
+		)
+	return rows
+
+
+def _serialize(doctype, names):
+	# Imported here: the Session Plan and Diagram controllers import modules that import this one.
+	from vulero_session_planner.vulero_session_planner.doctype.diagram.diagram import decode_diagram_json
+	from vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan import (
+		get_session_plan_records,
+	)
+
+	# One page is read in bulk: the records, then each child table in one query.
+	if not names:
+		return []
+	if doctype == "Session Plan":
+		records = get_session_plan_records(names)
+	else:
+		records = {
+			row.name: row
+			for row in frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["*"], limit=0)
+		}
+		for df in frappe.get_meta(doctype).get_table_fields():
+			for record in records.values():
+				record[df.fieldname] = []
+			for row in frappe.get_all(
+				df.options,
+				filters={"parenttype": doctype, "parentfield": df.fieldname, "parent": ["in", list(records)]},
+				fields=["*"],
+				order_by="parent asc, idx asc",
+				limit=0,
+			):
+				records[row.parent][df.fieldname].append(row)
+
+	serialized = []
+	for name in names:
+		record = records.get(name)
+		if not record:
+			continue
+		record.doctype = doctype
+		for fieldname in SYNC_EXCLUDED_FIELDS.get(doctype, ()):
+			record.pop(fieldname, None)
+		if doctype == "Diagram":
+			# Stored compressed; the form decodes it in Diagram.onload.
+			record.diagram_json = decode_diagram_json(record.diagram_json)
+		serialized.append(record)
+	return serialized
+
+
+def _get_visible_deletions(tombstones):
+	# Deleted records can only be checked against the data they had when they were deleted.
+	records = {}
+	for row in tombstones:
+		data = frappe.parse_json(row.data or "{}")
+		records.setdefault(row.deleted_doctype, []).append(
+			frappe._dict(
+				{
+					"name": row.deleted_name,
+					"deleted_at": str(row.creation),
+					**{f: data.get(f) for f in PERMISSION_FIELDS[row.deleted_doctype]},
+				}
+			)
+		)
+
+	deleted = []
+	for doctype, rows in records.items():
+		visible = check_record_permissions(doctype, rows)
+		deleted.extend(
+			{"doctype": doctype, "name": row.name, "deleted_at": row.deleted_at}
+			for row in rows
+			if visible.get(row.name)
+		)
+	return deleted
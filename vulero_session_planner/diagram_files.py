@@ -0,0 +1,127 @@
+import hashlib
+import re
+
+import frappe
+from frappe.utils.file_manager import delete_file, save_file
+
+PREVIEW_EXTENSIONS = frozenset({"png", "webp", "svg"})
+SWEEP_BATCH_SIZE = 500
+SWEEP_QUEUE = "long"
+
+
+def store_diagram_preview(diagram, variant, extension, content, is_private=0):
+	"""Attach `content` to `diagram` as `<diagram>-<variant>-<sha256 prefix>.<extension>` and return its URL.
+
+	Identical content reuses the existing File. Older files of the same variant and extension
+	are removed in the same transaction; their data on disk is deleted after commit.
+	"""
+	prefix = f"{diagram}-{variant}-"
+	file_name = f"{prefix}{hashlib.sha256(content).hexdigest()[:16]}.{extension}"
+	file_url = frappe.db.get_value(
+		"File",
+		{"attached_to_doctype": "Diagram", "attached_to_name": diagram, "file_name": file_name},
+		"file_url",
+	)
+	if not file_url:
+		file_url = save_file(file_name, content, "Diagram", diagram, is_private=is_private).file_url
+
+	superseded = frappe.get_all(
+		"File",
+		filters=[
+			["attached_to_doctype", "=", "Diagram"],
+			["attached_to_name", "=", diagram],
+			["file_name", "like", f"{prefix}%.{extension}"],
+			["file_name", "!=", file_name],
+		],
+		fields=["name", "file_url"],
+	)
+	remove_files(superseded)
+	return file_url
+
+
+def remove_files(files):
+	"""Delete File rows now and their data once the transaction commits, unless still referenced."""
+	if not files:
+		return
+
+	frappe.db.delete("File", {"name": ["in", [row.name for row in files]]})
+	file_urls = {row.file_url for row in files if row.file_url}
+	frappe.db.after_commit.add(lambda: _delete_unreferenced_file_data(file_urls))
+
+
+def sweep_orphaned_previews(after="", batch_size=SWEEP_BATCH_SIZE):
+	"""Remove one chunk of stale Diagram preview Files and re-enqueue for the next chunk.
+
+	A preview is kept while its Diagram exists and it is either content-addressed (stale ones
+	are removed when replaced) or still linked from a Diagram or Session Plan Block.
+	"""
+	files = frappe.get_all(
+		"File",
+		filters={"attached_to_doctype": "Diagram", "is_folder": 0, "name": [">", after]},
+		fields=["name", "file_name", "file_url", "attached_to_name"],
+		order_by="name asc",
+		limit=batch_size,
+	)
+	if not files:
+		return
+
+	previews = [row for row in files if _is_preview_file(row)]
+	if previews:
+		diagrams = dict(
+			frappe.get_all(
+				"Diagram",
+				filters={"name": ["in", list({row.attached_to_name for row in previews})]},
+				fields=["name", "preview_image"],
+				as_list=True,
+			)
+		)
+		file_urls = list({row.file_url for row in previews if row.file_url})
+		referenced = set(diagrams.values())
+		if file_urls:
+			referenced.update(
+				frappe.get_all(
+					"Session Plan Block",
+					filters={"diagram_preview": ["in", file_urls]},
+					pluck="diagram_preview",
+				)
+			)
+
+		remove_files(
+			[
+				row
+				for row in previews
+				if row.attached_to_name not in diagrams
+				or (row.file_url not in referenced and not _is_content_addressed(row))
+			]
+		)
+		frappe.db.commit()
+
+	if len(files) == batch_size:
+		frappe.enqueue(
+			"vulero_session_planner.diagram_files.sweep_orphaned_previews",
+			queue=SWEEP_QUEUE,
+			job_id=f"vulero-preview-sweep::{files[-1].name}",
+			deduplicate=True,
+			after=files[-1].name,
+			batch_size=batch_size,
+		)
+
+
+def _is_preview_file(row):
+	file_name = row.file_name or ""
+	if file_name.rsplit(".", 1)[-1].lower() not in PREVIEW_EXTENSIONS:
+		return False
+	# Browser uploads were named diagram-<name>.png; server renders start with the Diagram name.
+	return file_name.startswith(("diagram-", f"{row.attached_to_name}-", f"{row.attached_to_name}."))
+
+
+def _is_content_addressed(row):
+	pattern = rf"{re.escape(row.attached_to_name)}-[a-z]+-[0-9a-f]{{16}}\.[a-z]+"
+	return bool(re.fullmatch(pattern, row.file_name or ""))
+
+
+def _delete_unreferenced_file_data(file_urls):
+	for file_url in file_urls:
+		# Frappe stores identical content once, so another File may share the data.
+		if not frappe.db.exists("File", {"file_url": file_url}):
+			delete_file(file_url)
@@ -0,0 +1,198 @@
+import frappe
+from frappe.utils import now
+
+from vulero_session_planner.delta_sync import mark_sync_changed
+from vulero_session_planner.session_plan_export import clear_export_cache
+
+REPAIR_BATCH_SIZE = 500
+REPAIR_QUEUE = "long"
+
+
+def get_block_diagram_links(plan):
+	"""Return {diagram: block sequence} for the blocks of a Session Plan document."""
+	return {row.diagram: row.sequence or row.idx for row in plan.blocks or [] if row.diagram}
+
+
+def sync_plan_diagram_links(plan):
+	"""Point Diagrams at `plan` for blocks added or moved since the last save and unlink removed ones."""
+	links = get_block_diagram_links(plan)
+	previous = plan.get_doc_before_save()
+	previous_links = get_block_diagram_links(previous) if previous else {}
+
+	changed = {
+		diagram: (plan.name, sequence)
+		for diagram, sequence in links.items()
+		if previous_links.get(diagram) != sequence
+	}
+	removed = [diagram for diagram in previous_links if diagram not in links]
+	update_diagram_links(changed, unlink=removed, unlink_from=plan.name)
+
+
+def update_diagram_links(links, unlink=(), unlink_from=None):
+	"""Set Diagram links from {diagram: (session_plan, sequence)} in one statement.
+
+	Diagrams in `unlink` are cleared too, but only while they still point at `unlink_from`.
+	"""
+	if not links and not unlink:
+		return
+
+	escape = frappe.db.escape
+	plan_cases = " ".join(f"when {escape(name)} then {escape(plan)}" for name, (plan, _) in links.items())
+	sequence_cases = " ".join(
+		f"when {escape(name)} then {int(sequence or 0)}" for name, (_, sequence) in links.items()
+	)
+	conditions = []
+	if links:
+		conditions.append(f"name in ({', '.join(escape(name) for name in links)})")
+	if unlink:
+		conditions.append(
+			f"(name in ({', '.join(escape(name) for name in unlink)})"
+			f" and linked_session_plan = {escape(unlink_from)})"
+		)
+
+	# A CASE without branches is invalid, so unlink-only updates set the columns directly.
+	frappe.db.sql(
+		f"""
+		update `tabDiagram`
+		set linked_session_plan = {f"case name {plan_cases} else null end" if links else "null"},
+			linked_block_sequence = {f"case name {sequence_cases} else null end" if links else "null"},
+			sync_modified = %(sync_modified)s
+		where {" or ".join(conditions)}
+		""",
+		{"sync_modified": now()},
+	)
+
+
+def link_diagram_to_block(diagram, session_plan, sequence):
+	"""Set `diagram` on the block of `session_plan` at `sequence`; return False if it has none."""
+	blocks = frappe.db.sql(
+		"""
+		select name, diagram
+		from `tabSession Plan Block`
+		where parent = %(session_plan)s and parenttype = 'Session Plan' and parentfield = 'blocks'
+			and (sequence = %(sequence)s or idx = %(sequence)s)
+		order by sequence = %(sequence)s desc, idx asc
+		limit 1
+		""",
+		{"session_plan": session_plan, "sequence": sequence},
+		as_dict=True,
+	)
+	if not blocks:
+		return False
+	if blocks[0].diagram != diagram:
+		frappe.db.set_value("Session Plan Block", blocks[0].name, "diagram", diagram, update_modified=False)
+		_mark_block_changed(session_plan)
+	return True
+
+
+def repair_diagram_links(after="", batch_size=REPAIR_BATCH_SIZE):
+	"""Reconcile one chunk of Diagrams with the blocks that use them and re-enqueue for the next chunk."""
+	last_name, count = repair_diagram_link_chunk(after, batch_size)
+	frappe.db.commit()
+	if count == batch_size:
+		frappe.enqueue(
+			"vulero_session_planner.diagram_links.repair_diagram_links",
+			queue=REPAIR_QUEUE,
+			job_id=f"vulero-diagram-link-repair::{last_name}",
+			deduplicate=True,
+			after=last_name,
+			batch_size=batch_size,
+		)
+
+
+def repair_diagram_link_chunk(after, batch_size):
+	"""Repair the Diagrams after `after`; return the last name seen and how many were read.
+
+	A block that uses a Diagram wins: the Diagram is pointed at it, preferring the plan (or a revision
+	in its lineage) it already points at and otherwise the most recently modified plan. A Diagram no
+	block uses fills the empty block it points at, or is unlinked when that block is gone or taken.
+	"""
+	diagrams = frappe.get_all(
+		"Diagram",
+		filters={"name": [">", after]},
+		fields=["name", "linked_session_plan", "linked_block_sequence"],
+		order_by="name asc",
+		limit=batch_size,
+	)
+	if not diagrams:
+		return after, 0
+
+	names = [row.name for row in diagrams]
+	blocks = {}
+	for row in frappe.db.sql(
+		"""
+		select block.diagram, block.parent, coalesce(nullif(block.sequence, 0), block.idx) as sequence,
+			plan.revision_root
+		from `tabSession Plan Block` block
+		inner join `tabSession Plan` plan on plan.name = block.parent
+		where block.parenttype = 'Session Plan' and block.diagram in %(names)s
+		order by plan.modified desc
+		""",
+		{"names": tuple(names)},
+		as_dict=True,
+	):
+		blocks.setdefault(row.diagram, []).append(row)
+
+	linked_plans = list({row.linked_session_plan for row in diagrams if row.linked_session_plan})
+	roots = dict(
+		frappe.get_all(
+			"Session Plan",
+			filters={"name": ["in", linked_plans]},
+			fields=["name", "revision_root"],
+			as_list=True,
+		)
+		if linked_plans
+		else []
+	)
+
+	links, unlinked = {}, {}
+	for diagram in diagrams:
+		plan, sequence = diagram.linked_session_plan, diagram.linked_block_sequence
+		uses = blocks.get(diagram.name)
+		if uses:
+			# Revisions inherit unchanged blocks from earlier versions, whose rows hold the Diagram.
+			if any(
+				use.parent == plan or (roots.get(plan) and use.revision_root == roots[plan]) for use in uses
+			):
+				target = next(
+					((use.parent, use.sequence) for use in uses if use.parent == plan), (plan, sequence)
+				)
+			else:
+				target = (uses[0].parent, uses[0].sequence)
+			if target != (plan, sequence):
+				links[diagram.name] = target
+		elif plan and not (sequence and _fill_empty_block(diagram.name, plan, sequence)):
+			unlinked.setdefault(plan, []).append(diagram.name)
+
+	update_diagram_links(links)
+	for session_plan, unlink in unlinked.items():
+		update_diagram_links({}, unlink=unlink, unlink_from=session_plan)
+	return names[-1], len(diagrams)
+
+
+def _fill_empty_block(diagram, session_plan, sequence):
+	block = frappe.db.get_value(
+		"Session Plan Block",
+		{
+			"parent": session_plan,
+			"parenttype": "Session Plan",
+			"sequence": sequence,
+			"diagram": ["is", "not set"],
+		},
+		"name",
+	)
+	if block:
+		frappe.db.set_value("Session Plan Block", block, "diagram", diagram, update_modified=False)
+		_mark_block_changed(session_plan)
+	return bool(block)
+
+
+def _mark_block_changed(session_plan):
+	# Imported here: the Session Plan controller imports this module.
+	from vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan import (
+		clear_block_preview_cache,
+	)
+
+	clear_block_preview_cache([session_plan])
+	clear_export_cache([session_plan])
+	mark_sync_changed("Session Plan", [session_plan])
@@ -0,0 +1,699 @@
+import hashlib
+import io
+import itertools
+import json
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from xml.sax.saxutils import quoteattr
+
+import frappe
+from PIL import Image, ImageColor, ImageDraw, ImageFont, features
+
+from vulero_session_planner.delta_sync import mark_sync_changed
+from vulero_session_planner.diagram_files import store_diagram_preview
+from vulero_session_planner.session_plan_export import clear_export_cache
+from vulero_session_planner.vulero_session_planner.doctype.diagram.diagram import decode_diagram_json
+from vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan import (
+	clear_block_preview_cache,
+)
+
+# Keep in sync with get_canvas_dimensions and draw_pitch_background in public/js/diagram.js.
+CANVAS_MARGIN = 12
+CANVAS_SIZES = {
+	"Full": (900, 600),
+	"Half": (450, 600),
+	"Third": (300, 600),
+	"Custom": (900, 600),
+}
+PITCH_COLOR = "#0b8d2f"
+STRIPE_COLORS = ("#0b8d2f", "#0a7a2a")
+PITCH_LINE_COLOR = "#ffffff"
+PITCH_STRIPES = 12
+
+PREVIEW_SCALES = {"sm": 0.5, "md": 1, "lg": 2}
+PREVIEW_FORMATS = ("png", "webp")
+# The variant linked from Diagram.preview_image and Session Plan Block.diagram_preview;
+# the same resolution the browser used to upload (multiplier 2).
+PREVIEW_VARIANT = ("lg", "png")
+SUPERSAMPLE = 2
+CIRCLE_SEGMENTS = 48
+CURVE_SEGMENTS = 12
+MIN_DASH_LENGTH = 0.05
+RENDER_QUEUE = "short"
+
+ORIGIN_FACTORS = {"left": 0, "top": 0, "center": 0.5, "right": 1, "bottom": 1}
+TEXT_TYPES = frozenset({"text", "i-text", "textbox"})
+FONT_FILES = {
+	False: ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"),
+	True: ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf"),
+}
+
+IDENTITY = (1, 0, 0, 1, 0, 0)
+
+
+@dataclass
+class Shape:
+	"""A flattened drawing primitive in canvas pixels, shared by the raster and SVG writers."""
+
+	points: list = field(default_factory=list)
+	fill: str | None = None
+	stroke: str | None = None
+	stroke_width: float = 0
+	dash: list | None = None
+	closed: bool = False
+	text: str | None = None
+	font_size: float = 0
+	line_height: float = 1.16
+	bold: bool = False
+	# Text keeps its transform and local anchor so SVG output can rotate it; rasters draw it upright.
+	matrix: tuple | None = None
+	anchor: tuple | None = None
+
+
+@dataclass
+class Scene:
+	width: int
+	height: int
+	background: str
+	shapes: list
+
+
+def enqueue_preview_render(doc):
+	"""Render previews for `doc` in a worker once the save has committed."""
+	visual_hash = get_visual_hash(doc)
+	frappe.enqueue(
+		"vulero_session_planner.diagram_renderer.render_diagram_previews",
+		queue=RENDER_QUEUE,
+		enqueue_after_commit=True,
+		job_id=f"vulero-diagram-preview::{doc.name}::{visual_hash}",
+		deduplicate=True,
+		diagram=doc.name,
+		visual_hash=visual_hash,
+	)
+
+
+def get_visual_hash(doc):
+	"""Hash of the fields that affect how a Diagram looks."""
+	key = "\n".join((doc.diagram_json or "", doc.pitch_type or "", doc.orientation or ""))
+	return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def render_diagram_previews(diagram, visual_hash=None):
+	doc = frappe.db.get_value(
+		"Diagram", diagram, ["name", "diagram_json", "pitch_type", "orientation"], as_dict=True
+	)
+	if not doc:
+		return
+	if visual_hash and get_visual_hash(doc) != visual_hash:
+		# A newer save has queued its own render.
+		return
+
+	scene = build_scene(decode_diagram_json(doc.diagram_json), doc.pitch_type, doc.orientation)
+	file_urls = {}
+	for variant, content in render_previews(scene).items():
+		size, extension = variant
+		file_urls[variant] = store_diagram_preview(diagram, size, extension, content)
+
+	preview_image = file_urls[PREVIEW_VARIANT]
+	frappe.db.set_value("Diagram", diagram, "preview_image", preview_image, update_modified=False)
+	block_filters = {"parenttype": "Session Plan", "diagram": diagram}
+	frappe.db.set_value(
+		"Session Plan Block", block_filters, "diagram_preview", preview_image, update_modified=False
+	)
+	session_plans = frappe.get_all("Session Plan Block", filters=block_filters, pluck="parent", distinct=True)
+	clear_block_preview_cache(session_plans)
+	mark_sync_changed("Diagram", [diagram])
+	mark_sync_changed("Session Plan", session_plans)
+	clear_export_cache(session_plans)
+	frappe.publish_realtime(
+		"vulero_diagram_preview",
+		{"diagram": diagram, "preview_image": preview_image},
+		doctype="Diagram",
+		docname=diagram,
+		after_commit=True,
+	)
+
+
+def render_previews(scene):
+	"""Return {(size, extension): bytes} for every raster size and format, plus ("vector", "svg")."""
+	formats = [fmt for fmt in PREVIEW_FORMATS if fmt != "webp" or features.check("webp")]
+	previews = {}
+	for size, scale in PREVIEW_SCALES.items():
+		image = rasterize(scene, scale)
+		for fmt in formats:
+			buffer = io.BytesIO()
+			image.save(
+				buffer, format=fmt.upper(), **({"quality": 85} if fmt == "webp" else {"optimize": True})
+			)
+			previews[(size, fmt)] = buffer.getvalue()
+
+	previews[("vector", "svg")] = render_svg(scene).encode()
+	return previews
+
+
+def get_canvas_size(pitch_type, orientation):
+	width, height = CANVAS_SIZES.get(pitch_type or "Full", CANVAS_SIZES["Full"])
+	if orientation == "Vertical":
+		return height, width
+	return width, height
+
+
+def build_scene(diagram_json, pitch_type=None, orientation=None):
+	pitch_type = pitch_type or "Full"
+	orientation = orientation or "Horizontal"
+	width, height = get_canvas_size(pitch_type, orientation)
+
+	shapes = get_pitch_shapes(width, height, pitch_type, orientation)
+	data = json.loads(diagram_json) if diagram_json else {}
+	for obj in data.get("objects") or []:
+		if isinstance(obj, dict) and not obj.get("isBackground"):
+			shapes.extend(_object_shapes(obj, IDENTITY))
+
+	return Scene(width=width, height=height, background=PITCH_COLOR, shapes=shapes)
+
+
+def get_pitch_shapes(width, height, pitch_type, orientation):
+	"""Port of draw_pitch_background from diagram.js."""
+	shapes = []
+	left = top = CANVAS_MARGIN
+	field_width = width - CANVAS_MARGIN * 2
+	field_height = height - CANVAS_MARGIN * 2
+	is_vertical = orientation == "Vertical"
+	field_length = field_height if is_vertical else field_width
+	field_breadth = field_width if is_vertical else field_height
+	length_scale = {"Half": 2, "Third": 3}.get(pitch_type, 1)
+	full_length = field_length * length_scale
+	full_breadth = field_breadth
+
+	def map_point(u, v):
+		return (left + v, top + u) if is_vertical else (left + u, top + v)
+
+	def add_rect_uv(u1, v1, u2, v2, fill=None):
+		(x1, y1), (x2, y2) = map_point(u1, v1), map_point(u2, v2)
+		x, y, w, h = min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)
+		shapes.append(
+			Shape(
+				points=[(x, y), (x + w, y), (x + w, y + h), (x, y + h)],
+				closed=True,
+				fill=fill,
+				stroke=None if fill else PITCH_LINE_COLOR,
+				stroke_width=0 if fill else 2,
+			)
+		)
+
+	def add_line(p1, p2):
+		shapes.append(Shape(points=[p1, p2], stroke=PITCH_LINE_COLOR, stroke_width=2))
+
+	def add_circle(center, radius, fill=None, stroke_width=2):
+		shapes.append(
+			Shape(
+				points=_ellipse_points(center[0], center[1], radius, radius),
+				closed=True,
+				fill=fill,
+				stroke=PITCH_LINE_COLOR,
+				stroke_width=stroke_width,
+			)
+		)
+
+	def add_arc_uv(u, v, radius, start, end):
+		delta = end - start
+		if delta < 0:
+			delta += math.pi * 2
+		segments = 24
+		points = [
+			map_point(
+				u + radius * math.cos(start + delta * i / segments),
+				v + radius * math.sin(start + delta * i / segments),
+			)
+			for i in range(segments + 1)
+		]
+		shapes.append(Shape(points=points, stroke=PITCH_LINE_COLOR, stroke_width=2))
+
+	for i in range(PITCH_STRIPES):
+		u_start = field_length / PITCH_STRIPES * i
+		u_end = field_length / PITCH_STRIPES * (i + 1)
+		add_rect_uv(u_start, 0, u_end, field_breadth, fill=STRIPE_COLORS[i % 2])
+
+	shapes.append(
+		Shape(
+			points=[
+				(left, top),
+				(left + field_width, top),
+				(left + field_width, top + field_height),
+				(left, top + field_height),
+			],
+			closed=True,
+			stroke=PITCH_LINE_COLOR,
+			stroke_width=2,
+		)
+	)
+
+	penalty_depth = full_length * 0.16
+	penalty_width = full_breadth * 0.6
+	goal_depth = full_length * 0.05
+	goal_width = full_breadth * 0.27
+	penalty_spot_distance = full_length * 0.105
+	center_circle_radius = full_breadth * 0.134
+
+	def draw_penalty_area(goal_u, direction):
+		box_u = goal_u if direction == 1 else goal_u - penalty_depth
+		goal_box_u = goal_u if direction == 1 else goal_u - goal_depth
+		v_start = (field_breadth - penalty_width) / 2
+		goal_v_start = (field_breadth - goal_width) / 2
+		add_rect_uv(box_u, v_start, box_u + penalty_depth, v_start + penalty_width)
+		add_rect_uv(goal_box_u, goal_v_start, goal_box_u + goal_depth, goal_v_start + goal_width)
+		add_circle(
+			map_point(goal_u + direction * penalty_spot_distance, field_breadth / 2),
+			3,
+			fill=PITCH_LINE_COLOR,
+			stroke_width=1,
+		)
+
+	def add_corner_arc(corner):
+		radius = min(field_breadth, field_length) * 0.04
+		u, v, start, end = {
+			"top-left": (0, 0, 0, math.pi / 2),
+			"top-right": (field_length, 0, math.pi / 2, math.pi),
+			"bottom-right": (field_length, field_breadth, math.pi, math.pi * 1.5),
+			"bottom-left": (0, field_breadth, math.pi * 1.5, math.pi * 2),
+		}[corner]
+		add_arc_uv(u, v, radius, start, end)
+
+	def add_goal(goal_u, direction):
+		depth = min(full_length * 0.03, max(6, CANVAS_MARGIN - 2))
+		goal_mouth = full_breadth * 0.18
+		v_start = (field_breadth - goal_mouth) / 2
+		add_rect_uv(goal_u, v_start, goal_u + direction * depth, v_start + goal_mouth)
+
+	def add_penalty_arc(goal_u, direction):
+		center_u = goal_u + direction * penalty_spot_distance
+		radius = full_length * 0.0915
+		distance = abs(goal_u + direction * penalty_depth - center_u)
+		if not radius or distance >= radius:
+			return
+		theta = math.acos(distance / radius)
+		start = -theta if direction == 1 else math.pi - theta
+		end = theta if direction == 1 else math.pi + theta
+		add_arc_uv(center_u, field_breadth / 2, radius, start, end)
+
+	if pitch_type in ("Full", "Custom"):
+		add_line(map_point(field_length / 2, 0), map_point(field_length / 2, field_breadth))
+		center = map_point(field_length / 2, field_breadth / 2)
+		add_circle(center, center_circle_radius)
+		add_circle(center, 2.5, fill=PITCH_LINE_COLOR, stroke_width=1)
+		draw_penalty_area(0, 1)
+		draw_penalty_area(field_length, -1)
+		add_penalty_arc(0, 1)
+		add_penalty_arc(field_length, -1)
+		add_goal(0, -1)
+		add_goal(field_length, 1)
+		for corner in ("top-left", "top-right", "bottom-right", "bottom-left"):
+			add_corner_arc(corner)
+	elif pitch_type == "Half":
+		draw_penalty_area(0, 1)
+		add_arc_uv(field_length, field_breadth / 2, center_circle_radius, math.pi / 2, math.pi * 1.5)
+		add_penalty_arc(0, 1)
+		add_goal(0, -1)
+		add_corner_arc("top-left")
+		add_corner_arc("bottom-left")
+	elif pitch_type == "Third":
+		draw_penalty_area(0, 1)
+		add_penalty_arc(0, 1)
+		add_goal(0, -1)
+		add_corner_arc("top-left")
+		add_corner_arc("bottom-left")
+
+	return shapes
+
+
+def _object_shapes(obj, parent_matrix):
+	"""Flatten a fabric object (and group children) into Shapes in canvas coordinates."""
+	if obj.get("visible") is False:
+		return []
+
+	obj_type = obj.get("type")
+	width, height = _num(obj.get("width")), _num(obj.get("height"))
+	if obj_type == "circle":
+		width = height = _num(obj.get("radius")) * 2
+
+	matrix = _multiply(parent_matrix, _object_matrix(obj, width, height))
+	stroke = _color(obj.get("stroke"))
+	stroke_width = _num(obj.get("strokeWidth"), 1)
+	if not obj.get("strokeUniform"):
+		stroke_width *= _matrix_scale(matrix)
+	dash = [_num(value) for value in obj.get("strokeDashArray") or []]
+	if not _is_valid_dash(dash):
+		# Zero or negative entries are valid fabric JSON; draw those strokes solid.
+		dash = None
+	elif not obj.get("strokeUniform"):
+		dash = [value * _matrix_scale(matrix) for value in dash]
+
+	def shape(local_points, closed=False, fill=None):
+		return Shape(
+			points=[_apply(matrix, point) for point in local_points],
+			closed=closed,
+			fill=fill,
+			stroke=stroke,
+			stroke_width=stroke_width if stroke else 0,
+			dash=dash,
+		)
+
+	fill = _color(obj.get("fill", "rgb(0,0,0)"))
+	half_w, half_h = width / 2, height / 2
+
+	if obj_type == "group":
+		shapes = []
+		for child in obj.get("objects") or []:
+			if isinstance(child, dict):
+				shapes.extend(_object_shapes(child, matrix))
+		return shapes
+
+	if obj_type == "rect":
+		return [
+			shape([(-half_w, -half_h), (half_w, -half_h), (half_w, half_h), (-half_w, half_h)], True, fill)
+		]
+
+	if obj_type in ("circle", "ellipse"):
+		rx = half_w if obj_type == "circle" else _num(obj.get("rx"))
+		ry = half_h if obj_type == "circle" else _num(obj.get("ry"))
+		return [shape(_ellipse_points(0, 0, rx, ry), True, fill)]
+
+	if obj_type == "triangle":
+		return [shape([(-half_w, half_h), (0, -half_h), (half_w, half_h)], True, fill)]
+
+	if obj_type == "line":
+		points = [
+			(_num(obj.get("x1")), _num(obj.get("y1"))),
+			(_num(obj.get("x2")), _num(obj.get("y2"))),
+		]
+		return [shape(points)]
+
+	if obj_type in ("polyline", "polygon"):
+		points = [
+			(_num(p.get("x")), _num(p.get("y"))) for p in obj.get("points") or [] if isinstance(p, dict)
+		]
+		if not points:
+			return []
+		offset = _bbox_center(points)
+		local = [(x - offset[0], y - offset[1]) for x, y in points]
+		closed = obj_type == "polygon"
+		return [shape(local, closed, fill if closed else None)]
+
+	if obj_type == "path":
+		subpaths = _flatten_path(obj.get("path") or [])
+		all_points = [point for subpath, _ in subpaths for point in subpath]
+		if not all_points:
+			return []
+		offset = _bbox_center(all_points)
+		return [
+			shape([(x - offset[0], y - offset[1]) for x, y in subpath], closed, fill if closed else None)
+			for subpath, closed in subpaths
+			if len(subpath) > 1
+		]
+
+	if obj_type in TEXT_TYPES:
+		text = obj.get("text") or ""
+		if not text or not fill:
+			return []
+		return [
+			Shape(
+				points=[_apply(matrix, (-half_w, -half_h))],
+				fill=fill,
+				text=text,
+				font_size=_num(obj.get("fontSize"), 40) * _matrix_scale(matrix),
+				line_height=_num(obj.get("lineHeight"), 1.16),
+				bold=str(obj.get("fontWeight", "normal")) in ("bold", "600", "700", "800", "900"),
+				matrix=matrix,
+				anchor=(-half_w, -half_h),
+			)
+		]
+
+	return []
+
+
+def _object_matrix(obj, width, height):
+	"""fabric's calcOwnMatrix: translate to the object's center, rotate, then scale and flip."""
+	angle = math.radians(_num(obj.get("angle")))
+	cos, sin = math.cos(angle), math.sin(angle)
+	scale_x = _num(obj.get("scaleX"), 1)
+	scale_y = _num(obj.get("scaleY"), 1)
+	stroke_width = _num(obj.get("strokeWidth"), 0 if obj.get("type") == "group" else 1)
+
+	# left/top refer to the origin corner of the stroked, scaled bounding box.
+	dim_x = (width + stroke_width) * scale_x
+	dim_y = (height + stroke_width) * scale_y
+	offset_x = (0.5 - _origin(obj.get("originX"))) * dim_x
+	offset_y = (0.5 - _origin(obj.get("originY"))) * dim_y
+	center_x = _num(obj.get("left")) + offset_x * cos - offset_y * sin
+	center_y = _num(obj.get("top")) + offset_x * sin + offset_y * cos
+
+	if obj.get("flipX"):
+		scale_x = -scale_x
+	if obj.get("flipY"):
+		scale_y = -scale_y
+	return (cos * scale_x, sin * scale_x, -sin * scale_y, cos * scale_y, center_x, center_y)
+
+
+def _flatten_path(commands):
+	"""Turn absolute fabric path commands into [(points, closed)] polylines."""
+	subpaths = []
+	points = []
+	current = start = (0, 0)
+	for command in commands:
+		if not command:
+			continue
+		op, args = command[0], [_num(value) for value in command[1:]]
+		if op == "M" and len(args) >= 2:
+			if len(points) > 1:
+				subpaths.append((points, False))
+			current = start = (args[0], args[1])
+			points = [current]
+		elif op == "L" and len(args) >= 2:
+			current = (args[0], args[1])
+			points.append(current)
+		elif op == "H" and args:
+			current = (args[0], current[1])
+			points.append(current)
+		elif op == "V" and args:
+			current = (current[0], args[0])
+			points.append(current)
+		elif op == "Q" and len(args) >= 4:
+			control, end = (args[0], args[1]), (args[2], args[3])
+			for step in range(1, CURVE_SEGMENTS + 1):
+				t = step / CURVE_SEGMENTS
+				points.append(
+					tuple(
+						(1 - t) ** 2 * current[i] + 2 * (1 - t) * t * control[i] + t**2 * end[i]
+						for i in (0, 1)
+					)
+				)
+			current = end
+		elif op == "C" and len(args) >= 6:
+			c1, c2, end = (args[0], args[1]), (args[2], args[3]), (args[4], args[5])
+			for step in range(1, CURVE_SEGMENTS + 1):
+				t = step / CURVE_SEGMENTS
+				points.append(
+					tuple(
+						(1 - t) ** 3 * current[i]
+						+ 3 * (1 - t) ** 2 * t * c1[i]
+						+ 3 * (1 - t) * t**2 * c2[i]
+						+ t**3 * end[i]
+						for i in (0, 1)
+					)
+				)
+			current = end
+		elif op in ("Z", "z"):
+			if len(points) > 1:
+				subpaths.append((points, True))
+			points = [start]
+			current = start
+
+	if len(points) > 1:
+		subpaths.append((points, False))
+	return subpaths
+
+
+def rasterize(scene, scale=1):
+	factor = scale * SUPERSAMPLE
+	size = (max(1, round(scene.width * factor)), max(1, round(scene.height * factor)))
+	image = Image.new("RGB", size, _rgb(scene.background))
+	draw = ImageDraw.Draw(image)
+
+	for shape in scene.shapes:
+		if shape.text:
+			x, y = shape.points[0]
+			font_size = max(1, round(shape.font_size * factor))
+			draw.multiline_text(
+				(x * factor, y * factor),
+				shape.text,
+				fill=_rgb(shape.fill),
+				font=_get_font(font_size, shape.bold),
+				spacing=max(0, round(font_size * (shape.line_height - 1))),
+			)
+			continue
+
+		points = [(x * factor, y * factor) for x, y in shape.points]
+		if shape.closed and shape.fill and len(points) > 2:
+			draw.polygon(points, fill=_rgb(shape.fill))
+		if shape.stroke and shape.stroke_width:
+			width = max(1, round(shape.stroke_width * factor))
+			outline = [*points, points[0]] if shape.closed else points
+			for segment in _dash_segments(outline, [value * factor for value in shape.dash or []]):
+				draw.line(segment, fill=_rgb(shape.stroke), width=width, joint="curve")
+
+	width, height = round(scene.width * scale), round(scene.height * scale)
+	return image.resize((max(1, width), max(1, height)), Image.Resampling.LANCZOS)
+
+
+def render_svg(scene):
+	parts = [
+		f'<svg xmlns="http://www.w3.org/2000/svg" width="{scene.width}" height="{scene.height}"'
+		f' viewBox="0 0 {scene.width} {scene.height}">',
+		f'<rect width="{scene.width}" height="{scene.height}" fill={quoteattr(scene.background)}/>',
+	]
+	for shape in scene.shapes:
+		if shape.text:
+			origin = shape.anchor
+			font_size = shape.font_size / (_matrix_scale(shape.matrix) or 1)
+			lines = "".join(
+				f'<tspan x="{_fmt(origin[0])}" dy="{_fmt(font_size * (shape.line_height if i else 1))}">'
+				f"{_escape(line)}</tspan>"
+				for i, line in enumerate(shape.text.split("\n"))
+			)
+			parts.append(
+				f'<text transform="matrix({" ".join(_fmt(value) for value in shape.matrix)})"'
+				f' y="{_fmt(origin[1])}" font-family="sans-serif" font-size="{_fmt(font_size)}"'
+				f' font-weight="{"bold" if shape.bold else "normal"}" fill={quoteattr(shape.fill)}>{lines}</text>'
+			)
+			continue
+
+		points = " ".join(f"{_fmt(x)},{_fmt(y)}" for x, y in shape.points)
+		attributes = [
+			f'points="{points}"',
+			f"fill={quoteattr(shape.fill if shape.closed and shape.fill else 'none')}",
+		]
+		if shape.stroke and shape.stroke_width:
+			attributes += [
+				f"stroke={quoteattr(shape.stroke)}",
+				f'stroke-width="{_fmt(shape.stroke_width)}"',
+				'stroke-linecap="round" stroke-linejoin="round"',
+			]
+			if shape.dash:
+				attributes.append(f'stroke-dasharray="{" ".join(_fmt(value) for value in shape.dash)}"')
+		parts.append(f"<{'polygon' if shape.closed else 'polyline'} {' '.join(attributes)}/>")
+
+	parts.append("</svg>")
+	return "".join(parts)
+
+
+def _is_valid_dash(dash):
+	# Every entry must advance along the line, or the dash walk below never terminates.
+	return bool(dash) and all(value > 0 and math.isfinite(value) for value in dash)
+
+
+def _dash_segments(points, dash):
+	# Sub-pixel entries would take millions of steps for a pattern indistinguishable from solid.
+	if not _is_valid_dash(dash) or min(dash) < MIN_DASH_LENGTH:
+		return [points]
+
+	segments, current = [], [points[0]]
+	index, remaining, drawing = 0, dash[0], True
+	for start, end in itertools.pairwise(points):
+		length = math.dist(start, end)
+		position = 0
+		while length - position > remaining:
+			position += remaining
+			t = position / length
+			point = (start[0] + (end[0] - start[0]) * t, start[1] + (end[1] - start[1]) * t)
+			if drawing:
+				current.append(point)
+				segments.append(current)
+			current = [point]
+			drawing = not drawing
+			index = (index + 1) % len(dash)
+			remaining = dash[index]
+		remaining -= length - position
+		current.append(end)
+	if drawing and len(current) > 1:
+		segments.append(current)
+	return segments
+
+
+def _ellipse_points(cx, cy, rx, ry):
+	return [
+		(
+			cx + rx * math.cos(2 * math.pi * i / CIRCLE_SEGMENTS),
+			cy + ry * math.sin(2 * math.pi * i / CIRCLE_SEGMENTS),
+		)
+		for i in range(CIRCLE_SEGMENTS)
+	]
+
+
+def _bbox_center(points):
+	xs, ys = [x for x, _ in points], [y for _, y in points]
+	return ((min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2)
+
+
+def _multiply(m, n):
+	return (
+		m[0] * n[0] + m[2] * n[1],
+		m[1] * n[0] + m[3] * n[1],
+		m[0] * n[2] + m[2] * n[3],
+		m[1] * n[2] + m[3] * n[3],
+		m[0] * n[4] + m[2] * n[5] + m[4],
+		m[1] * n[4] + m[3] * n[5] + m[5],
+	)
+
+
+def _apply(m, point):
+	x, y = point
+	return (m[0] * x + m[2] * y + m[4], m[1] * x + m[3] * y + m[5])
+
+
+def _matrix_scale(m):
+	return math.sqrt(abs(m[0] * m[3] - m[1] * m[2]))
+
+
+def _origin(value):
+	if isinstance(value, int | float):
+		return value
+	return ORIGIN_FACTORS.get(value, 0)
+
+
+def _num(value, default=0):
+	if isinstance(value, bool) or not isinstance(value, int | float):
+		return default
+	return value
+
+
+def _color(value):
+	if not value or not isinstance(value, str) or value in ("transparent", "none"):
+		return None
+	try:
+		ImageColor.getrgb(value)
+	except ValueError:
+		return None
+	return value
+
+
+def _rgb(value):
+	return ImageColor.getrgb(value)[:3]
+
+
+@lru_cache(maxsize=64)
+def _get_font(size, bold=False):
+	for name in FONT_FILES[bold]:
+		try:
+			return ImageFont.truetype(name, size)
+		except OSError:
+			continue
+	return ImageFont.load_default(size=size)
+
+
+def _fmt(value):
+	return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _escape(text):
+	return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
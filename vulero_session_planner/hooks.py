@@ -58,6 +58,11 @@ doctype_js = {"Diagram": "public/js/diagram.js"}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
 # doctype_calendar_js = {"doctype" : "public/js/doctype_calendar.js"}
 
+# Boot
+# ------------------
+# add data to frappe.boot for desk
+extend_bootinfo = "vulero_session_planner.program_rules.extend_bootinfo"
+
 # Svg Icons
 # ------------------
 # include app icons in desk
@@ -98,6 +103,11 @@ doctype_js = {"Diagram": "public/js/diagram.js"}
 # before_install = "vulero_session_planner.install.before_install"
 # after_install = "vulero_session_planner.install.after_install"
 
+# Migration
+# ------------
+
+after_migrate = ["vulero_session_planner.indexes.create_indexes"]
+
 # Uninstallation
 # ------------
 
@@ -162,21 +172,42 @@ has_permission = {
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-# 	"*": {
-# 		"on_update": "method",
-# 		"on_cancel": "method",
-# 		"on_trash": "method"
-# 	}
-# }
+doc_events = {
+	"Coach Profile": {
+		"on_update": "vulero_session_planner.utils.clear_user_scope_for_doc",
+		"on_trash": "vulero_session_planner.utils.clear_user_scope_for_doc",
+	},
+	"Instructor Profile": {
+		"on_update": "vulero_session_planner.utils.clear_user_scope_for_doc",
+		"on_trash": "vulero_session_planner.utils.clear_user_scope_for_doc",
+	},
+	"Assignment": {
+		"on_update": "vulero_session_planner.utils.clear_user_scope_for_doc",
+		"on_trash": "vulero_session_planner.utils.clear_user_scope_for_doc",
+	},
+	# Has Role rows are saved through their parent User and fire no events of their own. on_update
+	# also runs when a User is inserted.
+	"User": {
+		"on_update": "vulero_session_planner.utils.clear_user_scope_for_doc",
+		"on_trash": "vulero_session_planner.utils.clear_user_scope_for_doc",
+	},
+}
 
 # Scheduled Tasks
 # ---------------
 
 scheduler_events = {
+	"cron": {
+		"* * * * *": [
+			"vulero_session_planner.notifications.enqueue_due_retries",
+		],
+	},
 	"daily": [
 		"vulero_session_planner.tasks.daily",
 	],
+	"weekly": [
+		"vulero_session_planner.tasks.weekly",
+	],
 }
 
 # Testing
@@ -217,7 +248,7 @@ scheduler_events = {
 
 # Request Events
 # ----------------
-# before_request = ["vulero_session_planner.utils.before_request"]
+before_request = ["vulero_session_planner.utils.load_account_status"]
 # after_request = ["vulero_session_planner.utils.after_request"]
 
 # Job Events
@@ -0,0 +1,132 @@
+import frappe
+from frappe.utils import nowdate
+
+# Composite indexes for the columns the permission hooks and controllers filter on.
+HOT_INDEXES = (
+	("Assignment", ("instructor", "status", "cohort")),
+	("Assignment", ("cohort", "status", "start_date")),
+	("Coach Profile", ("cohort",)),
+	("Coach Profile", ("account_expiry_date", "status")),
+	("Session Plan", ("coach",)),
+	("Session Plan", ("cohort", "status")),
+	("Session Plan", ("revision_root", "revision_depth")),
+	("Session Plan", ("sync_modified",)),
+	("Evaluation", ("session_plan", "instructor")),
+	("Diagram", ("linked_session_plan",)),
+	("Diagram", ("sync_modified",)),
+	("Review Comment", ("session_plan",)),
+	("Session Plan Block", ("parent", "sequence")),
+	# file_permission_query_conditions: a coach's own files or any public file, newest first.
+	("File", ("owner", "is_private")),
+	("File", ("is_private", "modified")),
+)
+
+# Small lookup tables where a full scan is cheaper than any index.
+FULL_SCAN_ALLOWED_TABLES = frozenset({"tabCohort", "tabLicense Program", "tabRubric Template"})
+
+
+def create_indexes():
+	for doctype, fields in HOT_INDEXES:
+		frappe.db.add_index(doctype, list(fields))
+
+
+def find_full_table_scans():
+	"""EXPLAIN the permission conditions and hot controller queries and return every full table scan.
+
+	Run it on a site seeded with realistic volumes; on near-empty tables the optimizer
+	prefers scans regardless of the available indexes.
+	"""
+	if frappe.db.db_type != "mariadb":
+		frappe.throw("Query plan checks are only supported on MariaDB.")
+
+	problems = []
+	for label, query, values in _get_checked_queries():
+		for row in frappe.db.sql(f"explain {query}", values, as_dict=True):
+			table = row.get("table") or ""
+			if row.get("type") != "ALL" or table.startswith("<") or table in FULL_SCAN_ALLOWED_TABLES:
+				continue
+			problems.append({"query": label, "table": table, "rows": row.get("rows")})
+
+	return problems
+
+
+def _get_checked_queries():
+	yield from _get_permission_queries()
+	yield from _get_controller_queries()
+
+
+def _get_permission_queries():
+	sample_users = {
+		"Instructor": frappe.db.get_value("Instructor Profile", {}, "user"),
+		"Coach": frappe.db.get_value("Coach Profile", {}, "user"),
+	}
+	hooks = frappe.get_hooks("permission_query_conditions")
+	for doctype, methods in hooks.items():
+		for method in methods:
+			if not method.startswith("vulero_session_planner."):
+				continue
+			for role, user in sample_users.items():
+				if not user:
+					continue
+				condition = frappe.get_attr(method)(user)
+				if not condition:
+					continue
+				table = f"`tab{doctype}`"
+				query = f"select {table}.name from {table} where {condition} order by {table}.modified desc limit 20"
+				yield f"{doctype} permission ({role})", query, {}
+
+
+def _get_controller_queries():
+	assignment = frappe.db.get_value("Assignment", {}, ["instructor", "cohort"], as_dict=True) or {}
+	plan = frappe.db.get_value("Session Plan", {}, ["name", "coach", "cohort"], as_dict=True) or {}
+	values = {
+		"instructor": assignment.get("instructor") or "",
+		"cohort": assignment.get("cohort") or plan.get("cohort") or "",
+		"coach": plan.get("coach") or "",
+		"session_plan": plan.get("name") or "",
+		"today": nowdate(),
+	}
+
+	queries = (
+		(
+			"Assignment cohorts for instructor",
+			"select cohort from `tabAssignment` where instructor = %(instructor)s and status = 'Active'",
+		),
+		(
+			"Latest active assignment for cohort",
+			"select instructor from `tabAssignment` where cohort = %(cohort)s and status = 'Active'"
+			" order by start_date desc, modified desc limit 1",
+		),
+		("Coaches of cohort", "select name, full_name from `tabCoach Profile` where cohort = %(cohort)s"),
+		(
+			"Expired coach accounts",
+			"select name from `tabCoach Profile` where account_expiry_date < %(today)s and status != 'Expired'",
+		),
+		("Session Plans of coach", "select name from `tabSession Plan` where coach = %(coach)s"),
+		(
+			"Approved Session Plans of cohort",
+			"select name from `tabSession Plan` where cohort = %(cohort)s and status = 'Approved'",
+		),
+		(
+			"Evaluation of instructor for plan",
+			"select name from `tabEvaluation` where session_plan = %(session_plan)s"
+			" and instructor = %(instructor)s",
+		),
+		("Diagrams of plan", "select name from `tabDiagram` where linked_session_plan = %(session_plan)s"),
+		(
+			"Review Comments of plan",
+			"select name from `tabReview Comment` where session_plan = %(session_plan)s",
+		),
+		(
+			"Revision history of plan",
+			"select name from `tabSession Plan` where revision_root = %(session_plan)s"
+			" order by revision_depth, version_no",
+		),
+		(
+			"Block of plan by sequence",
+			"select name from `tabSession Plan Block` where parent = %(session_plan)s"
+			" and parenttype = 'Session Plan' and sequence = 1",
+		),
+	)
+	for label, query in queries:
+		yield label, query, values
@@ -0,0 +1,165 @@
+import json
+import time
+
+import frappe
+
+from vulero_session_planner.utils import (
+	get_instructor_users_for_coach,
+	get_users_with_role,
+	notify_users_bulk,
+)
+
+NOTIFICATION_QUEUE = "vulero_notifications"
+COALESCE_WINDOW_SECONDS = 30
+MAX_ATTEMPTS = 3
+# Seconds to wait before each retry, so the attempts span an outage instead of all failing in it.
+RETRY_DELAYS = (60, 600)
+RETRY_QUEUE_KEY = "vulero_session_planner:notification_retries"
+
+
+def enqueue_document_notification(doc, notification_event):
+	"""Fan out notifications for a status transition in a worker once the save has committed."""
+	frappe.enqueue(
+		"vulero_session_planner.notifications.process_document_notification",
+		queue=_get_notification_queue(),
+		enqueue_after_commit=True,
+		job_id=_get_event_key(doc.doctype, doc.name, notification_event, str(doc.modified)),
+		deduplicate=True,
+		doctype=doc.doctype,
+		docname=doc.name,
+		notification_event=notification_event,
+		transition=str(doc.modified),
+	)
+
+
+def process_document_notification(doctype, docname, notification_event, transition=None, attempt=1):
+	event_key = _get_event_key(doctype, docname, notification_event, transition)
+	coalesce_key = f"vulero_session_planner:notified:{event_key}"
+	if frappe.cache.get_value(coalesce_key):
+		return
+
+	builder = NOTIFICATION_BUILDERS.get(doctype)
+	if not builder:
+		return
+
+	try:
+		notify_users_bulk(builder(docname, notification_event))
+	except Exception:
+		frappe.db.rollback()
+		if attempt >= MAX_ATTEMPTS:
+			frappe.log_error(title=f"Notification failed for {doctype} {docname} ({notification_event})")
+			return
+		_schedule_retry(
+			RETRY_DELAYS[attempt - 1],
+			doctype=doctype,
+			docname=docname,
+			notification_event=notification_event,
+			transition=transition,
+			attempt=attempt + 1,
+		)
+		return
+
+	frappe.cache.set_value(coalesce_key, 1, expires_in_sec=COALESCE_WINDOW_SECONDS)
+
+
+def enqueue_due_retries():
+	"""Scheduler job: enqueue the notification retries whose backoff has elapsed."""
+	key = frappe.cache.make_key(RETRY_QUEUE_KEY)
+	for payload in frappe.cache.zrangebyscore(key, 0, time.time()):
+		# Only the scheduler run that removes the entry enqueues it.
+		if not frappe.cache.zrem(key, payload):
+			continue
+		kwargs = json.loads(payload)
+		event_key = _get_event_key(
+			kwargs["doctype"], kwargs["docname"], kwargs["notification_event"], kwargs["transition"]
+		)
+		frappe.enqueue(
+			"vulero_session_planner.notifications.process_document_notification",
+			queue=_get_notification_queue(),
+			job_id=f"{event_key}::retry-{kwargs['attempt']}",
+			deduplicate=True,
+			**kwargs,
+		)
+
+
+def _schedule_retry(delay, **kwargs):
+	frappe.cache.zadd(
+		frappe.cache.make_key(RETRY_QUEUE_KEY), {json.dumps(kwargs, sort_keys=True): time.time() + delay}
+	)
+
+
+def _build_session_plan_notifications(docname, notification_event):
+	plan = frappe.db.get_value("Session Plan", docname, ["title", "coach", "cohort"], as_dict=True)
+	if not plan:
+		return []
+
+	coach_user = _get_coach_user(plan.coach)
+	if notification_event == "Submitted":
+		recipients = set(
+			get_instructor_users_for_coach(plan.coach, plan.cohort)
+			+ get_users_with_role("Coach Education Head")
+		)
+		recipients.discard(coach_user)
+		subject = f"Session Plan Submitted: {plan.title}"
+	elif notification_event == "Changes Requested":
+		recipients = {coach_user}
+		subject = f"Changes Requested: {plan.title}"
+	elif notification_event == "Approved":
+		recipients = set(get_users_with_role("Coach Education Head"))
+		recipients.add(coach_user)
+		subject = f"Session Plan Approved: {plan.title}"
+	else:
+		return []
+
+	return [
+		{
+			"users": list(recipients),
+			"subject": subject,
+			"document_type": "Session Plan",
+			"document_name": docname,
+		}
+	]
+
+
+def _build_evaluation_notifications(docname, notification_event):
+	if notification_event != "Published":
+		return []
+
+	evaluation = frappe.db.get_value("Evaluation", docname, ["coach", "session_plan"], as_dict=True)
+	if not evaluation:
+		return []
+
+	recipients = set(get_users_with_role("Coach Education Head"))
+	recipients.add(_get_coach_user(evaluation.coach))
+	return [
+		{
+			"users": list(recipients),
+			"subject": f"Evaluation Published for {evaluation.session_plan}",
+			"document_type": "Evaluation",
+			"document_name": docname,
+		}
+	]
+
+
+NOTIFICATION_BUILDERS = {
+	"Session Plan": _build_session_plan_notifications,
+	"Evaluation": _build_evaluation_notifications,
+}
+
+
+def _get_coach_user(coach):
+	if not coach:
+		return None
+	return frappe.db.get_value("Coach Profile", coach, "user")
+
+
+def _get_event_key(doctype, docname, notification_event, transition=None):
+	# The transition (the modified of the save that made it) keeps repeat transitions apart.
+	return f"vulero-notify::{doctype}::{docname}::{notification_event}::{transition or ''}"
+
+
+def _get_notification_queue():
+	# The dedicated queue needs a matching `workers` entry in common_site_config.json.
+	if NOTIFICATION_QUEUE in (frappe.conf.get("workers") or {}):
+		return NOTIFICATION_QUEUE
+	return "short"
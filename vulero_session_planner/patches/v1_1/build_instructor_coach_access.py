@@ -0,0 +1,7 @@
+from vulero_session_planner.vulero_session_planner.doctype.instructor_coach_access.instructor_coach_access import (
+	rebuild_instructor_coach_access,
+)
+
+
+def execute():
+	rebuild_instructor_coach_access()
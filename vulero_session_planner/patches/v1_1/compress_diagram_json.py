@@ -0,0 +1,38 @@
+import frappe
+
+from vulero_session_planner.vulero_session_planner.doctype.diagram.diagram import (
+	DIAGRAM_JSON_PREFIX,
+	encode_diagram_json,
+)
+
+BATCH_SIZE = 200
+
+
+def execute():
+	last_name = ""
+	while True:
+		rows = frappe.get_all(
+			"Diagram",
+			filters={
+				"name": [">", last_name],
+				"diagram_json": ["is", "set"],
+			},
+			fields=["name", "diagram_json"],
+			order_by="name asc",
+			limit=BATCH_SIZE,
+		)
+		if not rows:
+			break
+
+		for row in rows:
+			if row.diagram_json.startswith(DIAGRAM_JSON_PREFIX):
+				continue
+			try:
+				encoded = encode_diagram_json(row.diagram_json)
+			except ValueError:
+				# Leave unreadable rows as they are; the form reports them on the next save.
+				continue
+			frappe.db.set_value("Diagram", row.name, "diagram_json", encoded, update_modified=False)
+
+		last_name = rows[-1].name
+		frappe.db.commit()
@@ -0,0 +1,9 @@
+from vulero_session_planner.vulero_session_planner.doctype.assignment.assignment import (
+	drop_materialized_cohort_coaches,
+	use_virtual_cohort_coaches,
+)
+
+
+def execute():
+	if use_virtual_cohort_coaches():
+		drop_materialized_cohort_coaches()
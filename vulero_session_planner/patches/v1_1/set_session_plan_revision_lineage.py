@@ -0,0 +1,26 @@
+import frappe
+
+
+def execute():
+	plans = {
+		row.name: row.revised_from
+		for row in frappe.get_all("Session Plan", fields=["name", "revised_from"], order_by="name asc")
+	}
+	for name in plans:
+		root, depth = _get_lineage(name, plans)
+		frappe.db.set_value(
+			"Session Plan",
+			name,
+			{"revision_root": root, "revision_depth": depth},
+			update_modified=False,
+		)
+	frappe.db.commit()
+
+
+def _get_lineage(name, plans):
+	root, depth, seen = name, 0, {name}
+	while plans.get(root) in plans and plans[root] not in seen:
+		root = plans[root]
+		seen.add(root)
+		depth += 1
+	return root, depth
@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	for doctype in ("Session Plan", "Diagram"):
+		frappe.db.sql(f"update `tab{doctype}` set sync_modified = modified where sync_modified is null")
@@ -0,0 +1,59 @@
+import frappe
+from frappe.model import no_value_fields
+
+
+def execute():
+	# Revisions used to leave unchanged long fields empty and skip blocks equal to a base block,
+	# with revision_delta describing both. Write the inherited content back, bases first.
+	revisions = frappe.get_all(
+		"Session Plan",
+		filters={"revised_from": ["is", "set"], "revision_delta": ["is", "set"]},
+		fields=["name", "revised_from", "revision_delta"],
+		order_by="revision_depth asc, creation asc",
+	)
+	block_fields = [
+		df.fieldname
+		for df in frappe.get_meta("Session Plan Block").fields
+		if df.fieldtype not in no_value_fields
+	]
+	for revision in revisions:
+		_store_in_full(revision, block_fields)
+
+
+def _store_in_full(revision, block_fields):
+	delta = frappe.parse_json(revision.revision_delta)
+	base = frappe.get_doc("Session Plan", revision.revised_from)
+
+	fields = {fieldname: base.get(fieldname) for fieldname in delta.get("fields") or []}
+	if fields:
+		frappe.db.set_value("Session Plan", revision.name, fields, update_modified=False)
+
+	base_blocks = {row.name: row for row in base.blocks}
+	stored = frappe.get_all(
+		"Session Plan Block",
+		filters={"parent": revision.name, "parenttype": "Session Plan", "parentfield": "blocks"},
+		order_by="idx asc",
+		pluck="name",
+	)
+	order = []
+	for entry in delta.get("blocks") or []:
+		source = base_blocks.get(entry.get("inherit"))
+		if source:
+			frappe.get_doc(
+				{
+					**{fieldname: source.get(fieldname) for fieldname in block_fields},
+					"doctype": "Session Plan Block",
+					"name": entry["name"],
+					"parent": revision.name,
+					"parenttype": "Session Plan",
+					"parentfield": "blocks",
+				}
+			).db_insert()
+			order.append(entry["name"])
+		elif entry["name"] in stored:
+			order.append(entry["name"])
+	order.extend(name for name in stored if name not in order)
+
+	for idx, name in enumerate(order, start=1):
+		frappe.db.set_value("Session Plan Block", name, "idx", idx, update_modified=False)
+	frappe.clear_document_cache("Session Plan", revision.name)
@@ -1,17 +1,10 @@
 import frappe
 
-from vulero_session_planner.utils import (
-	get_assigned_cohorts_for_instructor,
-	get_coach_profile_for_user,
-	get_instructor_profile_for_user,
-	user_has_role,
-)
+from vulero_session_planner.utils import get_user_scope
 
 
 def _has_full_access(user):
-	return user in {"Administrator"} or user_has_role("Coach Education Head", user) or user_has_role(
-		"System Manager", user
-	)
+	return get_user_scope(user).has_full_access
 
 
 def _get_active_assignment_cohort_subquery(instructor):
@@ -21,184 +14,160 @@ def _get_active_assignment_cohort_subquery(instructor):
 	).format(instructor=frappe.db.escape(instructor))
 
 
-def _get_assigned_coach_subquery(instructor):
-	cohort_subquery = _get_active_assignment_cohort_subquery(instructor)
+def _get_instructor_access_condition(instructor, cohort_column, coach_column):
 	return (
-		"select name from `tabCoach Profile` where cohort in ({cohorts})"
-		" and ifnull(cohort, '') != ''"
-	).format(cohorts=cohort_subquery)
+		"exists (select 1 from `tabInstructor Coach Access` ica"
+		" where ica.instructor = {instructor}"
+		" and (ica.cohort = {cohort_column} or ica.coach = {coach_column}))"
+	).format(
+		instructor=frappe.db.escape(instructor),
+		cohort_column=cohort_column,
+		coach_column=coach_column,
+	)
 
 
-def _instructor_has_cohort_assignment(instructor, cohort):
-	if not instructor or not cohort:
+def _get_instructor_plan_access_condition(instructor, plan_column):
+	return (
+		"exists (select 1 from `tabSession Plan` sp"
+		" inner join `tabInstructor Coach Access` ica on ica.instructor = {instructor}"
+		" and (ica.cohort = sp.cohort or ica.coach = sp.coach)"
+		" where sp.name = {plan_column})"
+	).format(instructor=frappe.db.escape(instructor), plan_column=plan_column)
+
+
+def _instructor_has_cohort_assignment(scope, cohort):
+	if not scope.instructor or not cohort:
 		return False
-	return bool(
-		frappe.db.exists(
-			"Assignment",
-			{"cohort": cohort, "instructor": instructor, "status": "Active"},
-		)
-	)
+	return scope.has_cohort(cohort)
 
 
 def session_plan_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
-		return (
-			"`tabSession Plan`.`cohort` in ({cohorts})"
-			" or `tabSession Plan`.`coach` in ({coaches})"
-		).format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor),
-			coaches=_get_assigned_coach_subquery(instructor),
+		return _get_instructor_access_condition(
+			scope.instructor, "`tabSession Plan`.`cohort`", "`tabSession Plan`.`coach`"
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return "`tabSession Plan`.`coach` = {coach}".format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		return "`tabSession Plan`.`coach` = {coach}".format(coach=frappe.db.escape(scope.coach))
 
 	return "1=0"
 
 
 def evaluation_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
-		return (
-			"`tabEvaluation`.`cohort` in ({cohorts})"
-			" or `tabEvaluation`.`coach` in ({coaches})"
-		).format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor),
-			coaches=_get_assigned_coach_subquery(instructor),
+		return _get_instructor_access_condition(
+			scope.instructor, "`tabEvaluation`.`cohort`", "`tabEvaluation`.`coach`"
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return "`tabEvaluation`.`coach` = {coach}".format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		return "`tabEvaluation`.`coach` = {coach}".format(coach=frappe.db.escape(scope.coach))
 
 	return "1=0"
 
 
 def review_comment_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
-		return (
-			"`tabReview Comment`.`session_plan` in ("
-			"select name from `tabSession Plan` where cohort in ({cohorts})"
-			" or coach in ({coaches})"
-			")"
-		).format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor),
-			coaches=_get_assigned_coach_subquery(instructor),
-		)
+		return _get_instructor_plan_access_condition(scope.instructor, "`tabReview Comment`.`session_plan`")
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
+	if scope.coach:
 		return (
-			"`tabReview Comment`.`session_plan` in ("
-			"select name from `tabSession Plan` where coach = {coach}"
-			")"
-		).format(coach=frappe.db.escape(coach))
+			"`tabReview Comment`.`session_plan` in (select name from `tabSession Plan` where coach = {coach})"
+		).format(coach=frappe.db.escape(scope.coach))
 
 	return "1=0"
 
 
 def diagram_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
-		return (
-			"(`tabDiagram`.`linked_session_plan` in ("
-			"select name from `tabSession Plan` where cohort in ({cohorts})"
-			" or coach in ({coaches})"
-			")"
-			" or `tabDiagram`.`created_by` = {user})"
-		).format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor),
-			coaches=_get_assigned_coach_subquery(instructor),
+		return "({plans} or `tabDiagram`.`created_by` = {user})".format(
+			plans=_get_instructor_plan_access_condition(
+				scope.instructor, "`tabDiagram`.`linked_session_plan`"
+			),
 			user=frappe.db.escape(user),
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
+	if scope.coach:
 		return (
 			"(`tabDiagram`.`linked_session_plan` in ("
 			"select name from `tabSession Plan` where coach = {coach}"
 			")"
 			" or `tabDiagram`.`created_by` = {user})"
-		).format(coach=frappe.db.escape(coach), user=frappe.db.escape(user))
+		).format(coach=frappe.db.escape(scope.coach), user=frappe.db.escape(user))
 
 	return "1=0"
 
 
 def coach_profile_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
 		return "`tabCoach Profile`.`cohort` in ({cohorts})".format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor)
+			cohorts=_get_active_assignment_cohort_subquery(scope.instructor)
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return "`tabCoach Profile`.`name` = {coach}".format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		return "`tabCoach Profile`.`name` = {coach}".format(coach=frappe.db.escape(scope.coach))
 
 	return "1=0"
 
 
 def instructor_profile_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	instructor = get_instructor_profile_for_user(user)
-	if instructor:
+	if scope.instructor:
 		return "`tabInstructor Profile`.`name` = {instructor}".format(
-			instructor=frappe.db.escape(instructor)
+			instructor=frappe.db.escape(scope.instructor)
 		)
 
 	return "1=0"
 
 
 def assignment_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
 	conditions = []
-	instructor = get_instructor_profile_for_user(user)
-	if instructor:
+	if scope.instructor:
 		conditions.append(
 			"`tabAssignment`.`instructor` = {instructor}".format(
-				instructor=frappe.db.escape(instructor)
+				instructor=frappe.db.escape(scope.instructor)
 			)
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
+	if scope.coach_cohort:
 		conditions.append(
-			"`tabAssignment`.`cohort` = (select cohort from `tabCoach Profile`"
-			" where name = {coach} and ifnull(cohort, '') != '')".format(
-				coach=frappe.db.escape(coach)
-			)
+			"`tabAssignment`.`cohort` = {cohort}".format(cohort=frappe.db.escape(scope.coach_cohort))
 		)
 
 	if conditions:
@@ -208,34 +177,32 @@ def assignment_permission_query_conditions(user):
 
 
 def cohort_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
 		return "`tabCohort`.`name` in ({cohorts})".format(
-			cohorts=_get_active_assignment_cohort_subquery(instructor)
+			cohorts=_get_active_assignment_cohort_subquery(scope.instructor)
 		)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return (
-			"`tabCohort`.`name` = (select cohort from `tabCoach Profile`"
-			" where name = {coach} and ifnull(cohort, '') != '')"
-		).format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		if not scope.coach_cohort:
+			return "1=0"
+		return "`tabCohort`.`name` = {cohort}".format(cohort=frappe.db.escape(scope.coach_cohort))
 
 	return "1=0"
 
 
 def license_program_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
 		return (
 			"`tabLicense Program`.`name` in ("
@@ -243,33 +210,21 @@ def license_program_permission_query_conditions(user):
 			"{cohorts}"
 			") and ifnull(license_program, '') != ''"
 			")"
-		).format(cohorts=_get_active_assignment_cohort_subquery(instructor))
+		).format(cohorts=_get_active_assignment_cohort_subquery(scope.instructor))
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return (
-			"`tabLicense Program`.`name` in ("
-			"select license_program from `tabCoach Profile`"
-			" where name = {coach} and ifnull(license_program, '') != ''"
-			")"
-			" or `tabLicense Program`.`name` in ("
-			"select license_program from `tabCohort` where name = ("
-			"select cohort from `tabCoach Profile`"
-			" where name = {coach} and ifnull(cohort, '') != ''"
-			") and ifnull(license_program, '') != ''"
-			")"
-		).format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		return _coach_license_program_condition("`tabLicense Program`.`name`", scope)
 
 	return "1=0"
 
 
 def rubric_template_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Instructor", user):
-		instructor = get_instructor_profile_for_user(user)
-		if not instructor:
+	if scope.is_instructor:
+		if not scope.instructor:
 			return "1=0"
 		return (
 			"`tabRubric Template`.`license_program` in ("
@@ -277,31 +232,44 @@ def rubric_template_permission_query_conditions(user):
 			"{cohorts}"
 			") and ifnull(license_program, '') != ''"
 			")"
-		).format(cohorts=_get_active_assignment_cohort_subquery(instructor))
+		).format(cohorts=_get_active_assignment_cohort_subquery(scope.instructor))
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return (
-			"`tabRubric Template`.`license_program` in ("
-			"select license_program from `tabCoach Profile`"
-			" where name = {coach} and ifnull(license_program, '') != ''"
-			")"
-			" or `tabRubric Template`.`license_program` in ("
-			"select license_program from `tabCohort` where name = ("
-			"select cohort from `tabCoach Profile`"
-			" where name = {coach} and ifnull(cohort, '') != ''"
-			") and ifnull(license_program, '') != ''"
-			")"
-		).format(coach=frappe.db.escape(coach))
+	if scope.coach:
+		return _coach_license_program_condition("`tabRubric Template`.`license_program`", scope)
+
+	return "1=0"
+
+
+def _coach_license_program_condition(column, scope):
+	conditions = []
+	if scope.coach_license_program:
+		conditions.append(
+			"{column} = {program}".format(
+				column=column, program=frappe.db.escape(scope.coach_license_program)
+			)
+		)
+	if scope.coach_cohort:
+		conditions.append(
+			(
+				"{column} in ("
+				"select license_program from `tabCohort` where name = {cohort}"
+				" and ifnull(license_program, '') != ''"
+				")"
+			).format(column=column, cohort=frappe.db.escape(scope.coach_cohort))
+		)
+
+	if conditions:
+		return " or ".join(conditions)
 
 	return "1=0"
 
 
 def file_permission_query_conditions(user):
-	if _has_full_access(user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
 		return ""
 
-	if user_has_role("Coach", user) and not user_has_role("Instructor", user):
+	if scope.is_coach and not scope.is_instructor:
 		return "(`tabFile`.`owner` = {user} or `tabFile`.`is_private` = 0)".format(
 			user=frappe.db.escape(user)
 		)
@@ -309,222 +277,262 @@ def file_permission_query_conditions(user):
 	return ""
 
 
-def has_session_plan_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+PERMISSION_FIELDS = {
+	"Session Plan": ("coach", "cohort"),
+	"Evaluation": ("coach", "cohort"),
+	"Review Comment": ("session_plan",),
+	"Diagram": ("created_by", "linked_session_plan"),
+	"Coach Profile": ("cohort",),
+	"Instructor Profile": (),
+	"Assignment": ("instructor", "cohort"),
+	"Cohort": (),
+	"License Program": (),
+	"Rubric Template": ("license_program",),
+	"File": ("is_private", "owner"),
+}
+
+
+def check_permissions(doctype, names, ptype="read", user=None):
+	"""Return a name -> bool map of `ptype` access to many records of `doctype`.
+
+	Resolves the user's scope once and reads only the columns the record rules need, in one
+	query. Role permissions are checked once for the doctype; User Permissions and shares
+	are not considered.
+	"""
+	if doctype not in PERMISSION_EVALUATORS:
+		frappe.throw(f"Batch permission checks are not supported for {doctype}.")
+
+	user = user or frappe.session.user
+	names = list(dict.fromkeys(name for name in names or [] if name))
+	if not names:
+		return {}
+
+	result = dict.fromkeys(names, False)
+	if not frappe.has_permission(doctype, ptype, user=user, raise_exception=False):
+		return result
+
+	rows = frappe.get_all(
+		doctype,
+		filters={"name": ["in", names]},
+		fields=["name", *PERMISSION_FIELDS[doctype]],
+		limit=0,
+	)
+	result.update(_evaluate(doctype, rows, ptype, user))
+	return result
 
-	coach = get_coach_profile_for_user(user)
-	if coach and doc.coach == coach:
-		return True
 
-	instructor = get_instructor_profile_for_user(user)
-	if instructor:
-		cohort = doc.cohort
-		if not cohort and doc.coach:
-			cohort = frappe.db.get_value("Coach Profile", doc.coach, "cohort")
-		return _instructor_has_cohort_assignment(instructor, cohort)
+def check_record_permissions(doctype, rows, ptype="read", user=None):
+	"""Like check_permissions, for records the caller already holds, such as the data of deleted
+	documents. Each row needs `name` and the PERMISSION_FIELDS of the doctype."""
+	if doctype not in PERMISSION_EVALUATORS:
+		frappe.throw(f"Batch permission checks are not supported for {doctype}.")
 
-	return False
+	user = user or frappe.session.user
+	if not rows:
+		return {}
+	if not frappe.has_permission(doctype, ptype, user=user, raise_exception=False):
+		return dict.fromkeys((row.name for row in rows), False)
+	return _evaluate(doctype, rows, ptype, user)
 
 
-def has_evaluation_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+def _evaluate(doctype, rows, ptype, user):
+	scope = get_user_scope(user)
+	if scope.has_full_access:
+		return {row.name: True for row in rows}
 
-	coach = get_coach_profile_for_user(user)
-	if coach and doc.coach == coach:
-		return True
+	return PERMISSION_EVALUATORS[doctype](scope, rows, ptype, user)
 
-	instructor = get_instructor_profile_for_user(user)
-	if instructor:
-		cohort = doc.cohort
-		if not cohort and doc.coach:
-			cohort = frappe.db.get_value("Coach Profile", doc.coach, "cohort")
-		if _instructor_has_cohort_assignment(instructor, cohort):
-			return True
 
-	return False
+def _evaluate_doc(doc, ptype, user):
+	return _evaluate(doc.doctype, [doc], ptype, user)[doc.name]
 
 
-def has_review_comment_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+def _get_coach_cohorts(coaches):
+	coaches = {coach for coach in coaches if coach}
+	if not coaches:
+		return {}
 
-	session_plan = frappe.db.get_value("Session Plan", doc.session_plan, ["coach"], as_dict=True)
-	if not session_plan:
-		return False
+	return dict(
+		frappe.get_all(
+			"Coach Profile",
+			filters={"name": ["in", list(coaches)]},
+			fields=["name", "cohort"],
+			as_list=True,
+			limit=0,
+		)
+	)
 
-	coach = get_coach_profile_for_user(user)
-	if coach and session_plan.coach == coach:
-		return True
 
-	instructor = get_instructor_profile_for_user(user)
-	if instructor:
-		cohort = frappe.db.get_value("Session Plan", doc.session_plan, "cohort")
-		if not cohort and session_plan.coach:
-			cohort = frappe.db.get_value("Coach Profile", session_plan.coach, "cohort")
-		return _instructor_has_cohort_assignment(instructor, cohort)
+def _get_scope_license_programs(scope):
+	if scope.coach:
+		programs = {scope.coach_license_program}
+		if scope.coach_cohort:
+			programs.add(frappe.db.get_value("Cohort", scope.coach_cohort, "license_program"))
+		return programs - {None, ""}
 
-	return False
+	if not scope.instructor or not scope.cohorts:
+		return set()
 
+	return set(
+		frappe.get_all(
+			"Cohort",
+			filters={"name": ["in", list(scope.cohorts)], "license_program": ["is", "set"]},
+			pluck="license_program",
+			limit=0,
+		)
+	)
 
-def has_diagram_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
 
+def _evaluate_coach_records(scope, rows, ptype=None, user=None):
+	coach_cohorts = {}
+	if scope.instructor:
+		coach_cohorts = _get_coach_cohorts(row.coach for row in rows if not row.cohort)
+
+	result = {}
+	for row in rows:
+		if scope.coach and row.coach == scope.coach:
+			result[row.name] = True
+		elif scope.instructor:
+			cohort = row.cohort or coach_cohorts.get(row.coach)
+			result[row.name] = _instructor_has_cohort_assignment(scope, cohort)
+		else:
+			result[row.name] = False
+	return result
+
+
+def _evaluate_session_plan_links(scope, rows, column):
+	"""Grant access to rows whose `column` links to a Session Plan the scope can see."""
+	plan_names = {row.get(column) for row in rows} - {None, ""}
+	if not plan_names:
+		return dict.fromkeys((row.name for row in rows), False)
+
+	plans = frappe.get_all(
+		"Session Plan",
+		filters={"name": ["in", list(plan_names)]},
+		fields=["name", "coach", "cohort"],
+		limit=0,
+	)
+	plan_access = _evaluate_coach_records(scope, plans)
+	return {row.name: plan_access.get(row.get(column), False) for row in rows}
+
+
+def _evaluate_review_comments(scope, rows, ptype, user):
+	return _evaluate_session_plan_links(scope, rows, "session_plan")
+
+
+def _evaluate_diagrams(scope, rows, ptype, user):
 	if ptype == "create":
-		return user_has_role("Coach", user)
+		return {row.name: scope.is_coach for row in rows}
 
-	if not doc:
-		return False
+	result = _evaluate_session_plan_links(
+		scope, [row for row in rows if row.created_by != user], "linked_session_plan"
+	)
+	for row in rows:
+		if row.created_by == user:
+			result[row.name] = True
+	return result
 
-	if doc.created_by == user:
-		return True
 
-	if doc.linked_session_plan:
-		plan = frappe.get_doc("Session Plan", doc.linked_session_plan)
-		return has_session_plan_permission(plan, ptype, user)
+def _evaluate_coach_profiles(scope, rows, ptype, user):
+	if scope.coach:
+		return {row.name: row.name == scope.coach for row in rows}
+	return {row.name: _instructor_has_cohort_assignment(scope, row.cohort) for row in rows}
 
-	return False
 
+def _evaluate_instructor_profiles(scope, rows, ptype, user):
+	return {row.name: bool(scope.instructor) and row.name == scope.instructor for row in rows}
 
-def has_coach_profile_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return doc.name == coach
+def _evaluate_assignments(scope, rows, ptype, user):
+	return {
+		row.name: bool(
+			(scope.instructor and row.instructor == scope.instructor)
+			or (scope.coach and scope.coach_cohort and row.cohort == scope.coach_cohort)
+		)
+		for row in rows
+	}
 
-	instructor = get_instructor_profile_for_user(user)
-	return _instructor_has_cohort_assignment(instructor, doc.cohort)
 
+def _evaluate_cohorts(scope, rows, ptype, user):
+	if scope.coach:
+		return {row.name: row.name == scope.coach_cohort for row in rows}
+	return {row.name: _instructor_has_cohort_assignment(scope, row.name) for row in rows}
 
-def has_instructor_profile_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
 
-	instructor = get_instructor_profile_for_user(user)
-	return doc.name == instructor
+def _evaluate_license_programs(scope, rows, ptype, user):
+	programs = _get_scope_license_programs(scope)
+	return {row.name: row.name in programs for row in rows}
 
 
-def has_assignment_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+def _evaluate_rubric_templates(scope, rows, ptype, user):
+	programs = _get_scope_license_programs(scope) if any(row.license_program for row in rows) else set()
+	return {row.name: bool(row.license_program) and row.license_program in programs for row in rows}
 
-	instructor = get_instructor_profile_for_user(user)
-	if instructor and doc.instructor == instructor:
-		return True
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		coach_cohort = frappe.db.get_value("Coach Profile", coach, "cohort")
-		if coach_cohort and doc.cohort == coach_cohort:
-			return True
+def _evaluate_files(scope, rows, ptype, user):
+	if scope.is_coach and not scope.is_instructor:
+		return {row.name: not (row.is_private and row.owner != user) for row in rows}
+	return {row.name: True for row in rows}
 
-	return False
 
+PERMISSION_EVALUATORS = {
+	"Session Plan": _evaluate_coach_records,
+	"Evaluation": _evaluate_coach_records,
+	"Review Comment": _evaluate_review_comments,
+	"Diagram": _evaluate_diagrams,
+	"Coach Profile": _evaluate_coach_profiles,
+	"Instructor Profile": _evaluate_instructor_profiles,
+	"Assignment": _evaluate_assignments,
+	"Cohort": _evaluate_cohorts,
+	"License Program": _evaluate_license_programs,
+	"Rubric Template": _evaluate_rubric_templates,
+	"File": _evaluate_files,
+}
 
-def has_cohort_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		return (
-			doc.name
-			== frappe.db.get_value("Coach Profile", coach, "cohort")
-			if coach
-			else False
-		)
+def has_session_plan_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	instructor = get_instructor_profile_for_user(user)
-	if not instructor:
-		return False
 
-	return _instructor_has_cohort_assignment(instructor, doc.name)
+def has_evaluation_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
 
-def has_license_program_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+def has_review_comment_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		coach_profile = frappe.db.get_value(
-			"Coach Profile", coach, ["license_program", "cohort"], as_dict=True
-		)
-		if not coach_profile:
-			return False
-		if coach_profile.license_program == doc.name:
-			return True
-		if coach_profile.cohort:
-			return (
-				frappe.db.get_value("Cohort", coach_profile.cohort, "license_program")
-				== doc.name
-			)
-		return False
 
-	instructor = get_instructor_profile_for_user(user)
-	if not instructor:
-		return False
+def has_diagram_permission(doc, ptype, user):
+	if not doc:
+		scope = get_user_scope(user)
+		return scope.has_full_access or (ptype == "create" and scope.is_coach)
 
-	cohorts = get_assigned_cohorts_for_instructor(instructor)
-	if not cohorts:
-		return False
+	return _evaluate_doc(doc, ptype, user)
 
-	return bool(
-		frappe.db.exists("Cohort", {"name": ["in", cohorts], "license_program": doc.name})
-	)
 
-	return False
+def has_coach_profile_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
 
-def has_rubric_template_permission(doc, ptype, user):
-	if _has_full_access(user):
-		return True
+def has_instructor_profile_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	license_program = doc.license_program
-	if not license_program:
-		return False
 
-	coach = get_coach_profile_for_user(user)
-	if coach:
-		coach_profile = frappe.db.get_value(
-			"Coach Profile", coach, ["license_program", "cohort"], as_dict=True
-		)
-		if not coach_profile:
-			return False
-		if coach_profile.license_program == license_program:
-			return True
-		if coach_profile.cohort:
-			return (
-				frappe.db.get_value("Cohort", coach_profile.cohort, "license_program")
-				== license_program
-			)
-		return False
+def has_assignment_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	instructor = get_instructor_profile_for_user(user)
-	if not instructor:
-		return False
 
-	cohorts = get_assigned_cohorts_for_instructor(instructor)
-	if not cohorts:
-		return False
+def has_cohort_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	return bool(
-		frappe.db.exists("Cohort", {"name": ["in", cohorts], "license_program": license_program})
-	)
 
-	return False
+def has_license_program_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
 
-def has_file_permission(doc, ptype, user, debug=False):
-	if _has_full_access(user):
-		return True
+def has_rubric_template_permission(doc, ptype, user):
+	return _evaluate_doc(doc, ptype, user)
 
-	if user_has_role("Coach", user) and not user_has_role("Instructor", user):
-		if doc.is_private and doc.owner != user:
-			return False
 
-	return True
+def has_file_permission(doc, ptype, user, debug=False):
+	return _evaluate_doc(doc, ptype, user)
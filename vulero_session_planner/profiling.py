@@ -0,0 +1,92 @@
+import functools
+import json
+import random
+import time
+from contextlib import contextmanager
+
+import frappe
+
+STEP_PROFILE_KEY = "vulero_session_planner:step_profile"
+STEP_PROFILE_SIZE = 5000
+SAMPLE_RATE_CONFIG = "vulero_step_profile_sample_rate"
+
+
+def profile_step(method):
+	"""Record wall time and SQL query count of a controller method for sampled requests."""
+
+	@functools.wraps(method)
+	def wrapper(doc, *args, **kwargs):
+		with step_profile(doc.doctype, method.__name__.lstrip("_")):
+			return method(doc, *args, **kwargs)
+
+	return wrapper
+
+
+@contextmanager
+def step_profile(doctype, step):
+	"""Profile the enclosed block as `step` of `doctype`; a no-op unless the request is sampled.
+
+	Sampling is decided once per request from the `vulero_step_profile_sample_rate` site config
+	(0 to 1, off by default). Query counts include nested steps.
+	"""
+	if not _is_sampled():
+		yield
+		return
+
+	counter = _get_query_counter()
+	queries = counter["count"]
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		_record(doctype, step, time.perf_counter() - started, counter["count"] - queries)
+
+
+def get_step_samples():
+	"""Return the buffered samples, newest first."""
+	return [json.loads(value) for value in frappe.cache.lrange(STEP_PROFILE_KEY, 0, -1)]
+
+
+def clear_step_samples():
+	frappe.cache.delete_value(STEP_PROFILE_KEY)
+
+
+def _is_sampled():
+	sampled = getattr(frappe.local, "vulero_step_profile_sampled", None)
+	if sampled is None:
+		rate = frappe.conf.get(SAMPLE_RATE_CONFIG) or 0
+		sampled = bool(rate) and random.random() < rate
+		frappe.local.vulero_step_profile_sampled = sampled
+	return sampled
+
+
+def _get_query_counter():
+	# Count through an instance attribute so get_value, get_all and qb queries are included.
+	db = frappe.db
+	counter = getattr(db, "vulero_query_counter", None)
+	if counter is None:
+		counter = db.vulero_query_counter = {"count": 0}
+		sql = db.sql
+
+		def counting_sql(*args, **kwargs):
+			counter["count"] += 1
+			return sql(*args, **kwargs)
+
+		db.sql = counting_sql
+	return counter
+
+
+def _record(doctype, step, seconds, queries):
+	sample = {
+		"doctype": doctype,
+		"step": step,
+		"seconds": round(seconds, 6),
+		"queries": queries,
+		"timestamp": time.time(),
+	}
+	try:
+		frappe.cache.lpush(STEP_PROFILE_KEY, json.dumps(sample))
+		frappe.cache.ltrim(STEP_PROFILE_KEY, 0, STEP_PROFILE_SIZE - 1)
+	except Exception:
+		# Profiling must never break the request it observes.
+		pass
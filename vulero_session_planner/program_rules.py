@@ -0,0 +1,67 @@
+import frappe
+
+PROGRAM_RULES_CACHE_KEY = "vulero_session_planner:program_rules"
+
+# Rules by normalized program name. A License Program matches on its name or its program_name.
+PROGRAM_RULES = {
+	"CAF D": {"duration_limit": 60, "target_groups": ("U12", "U9")},
+	"CAF C": {"duration_limit": 90, "target_groups": ("U17", "U14")},
+	"CAF B": {"duration_limit": 90, "target_groups": ("Second Division Club", "U20", "U17")},
+	"CAF A": {"duration_limit": 90, "target_groups": ("Senior Team",)},
+	"CAF PRO": {"duration_limit": 90, "target_groups": ("Senior Team",)},
+}
+
+
+def get_program_rules(license_program):
+	"""Return the rules of a License Program: program_name, duration_limit, target_groups and
+	default_expiry_days. Programs without CAF rules get no limit and no target groups."""
+	if not license_program:
+		return None
+	return get_program_rules_registry().get(license_program)
+
+
+def get_program_rules_registry():
+	"""Return {license_program: rules} for every License Program, cached until one changes."""
+	registry = frappe.cache.get_value(PROGRAM_RULES_CACHE_KEY)
+	if registry is None:
+		registry = _build_registry()
+		frappe.cache.set_value(PROGRAM_RULES_CACHE_KEY, registry)
+	return registry
+
+
+def clear_program_rules_cache():
+	_delete_cached_registry()
+	# Requests that read the old rows before this commit may have cached them again.
+	frappe.db.after_commit.add(_delete_cached_registry)
+
+
+def _delete_cached_registry():
+	frappe.cache.delete_value(PROGRAM_RULES_CACHE_KEY)
+	# The rules reach the browser through boot info, which Frappe caches per user.
+	frappe.cache.delete_key("bootinfo")
+
+
+def extend_bootinfo(bootinfo):
+	if frappe.session.user != "Guest":
+		bootinfo.vulero_program_rules = get_program_rules_registry()
+
+
+def normalize_program(value):
+	return " ".join((value or "").upper().split())
+
+
+def _build_registry():
+	registry = {}
+	for program in frappe.get_all("License Program", fields=["name", "program_name", "default_expiry_days"]):
+		rules = (
+			PROGRAM_RULES.get(normalize_program(program.name))
+			or PROGRAM_RULES.get(normalize_program(program.program_name))
+			or {}
+		)
+		registry[program.name] = {
+			"program_name": program.program_name or program.name,
+			"duration_limit": rules.get("duration_limit"),
+			"target_groups": list(rules.get("target_groups", ())),
+			"default_expiry_days": program.default_expiry_days or None,
+		}
+	return registry
@@ -2,27 +2,40 @@
 /* global frappe, fabric */
 
 (function () {
-	// Lazily load fabric.js from CDN if not already present
-	const loadFabric = () =>
+	// Lazily load the bundled fabric.js, falling back to the CDN when the app was built without it
+	const FABRIC_BUNDLE = "fabric.bundle.js";
+	const FABRIC_CDN_URL = "https://cdnjs.cloudflare.com/ajax/libs/fabric.js/5.3.0/fabric.min.js";
+
+	const loadFabric = () => {
+		if (window.fabric) {
+			return Promise.resolve();
+		}
+		const bundled = (frappe.boot.assets_json || {})[FABRIC_BUNDLE];
+		const load = bundled ? frappe.require(FABRIC_BUNDLE) : Promise.reject();
+		return load.then(() => window.fabric || Promise.reject()).catch(loadFabricFromCdn);
+	};
+
+	const loadFabricFromCdn = () =>
 		new Promise((resolve, reject) => {
-			if (window.fabric) {
-				resolve();
-				return;
-			}
 			const script = document.createElement("script");
-			script.src = "https://cdnjs.cloudflare.com/ajax/libs/fabric.js/5.3.0/fabric.min.js";
+			script.src = FABRIC_CDN_URL;
 			script.onload = () => resolve();
 			script.onerror = () => reject(new Error("Failed to load fabric.js"));
 			document.head.appendChild(script);
 		});
 
 	const CANVAS_MARGIN = 12;
+	const PITCH_COLOR = "#0b8d2f";
+	// Rendered pitch backgrounds; keep in sync with PITCH_CACHE in www/sw.js
+	const PITCH_CACHE = "vulero-session-planner-pitch-v1";
+	const pitchBackgrounds = new Map();
 
 	frappe.ui.form.on("Diagram", {
 		refresh(frm) {
 			if (!frm.fields_dict.canvas_html) {
 				return;
 			}
+			listen_for_preview(frm);
 			render_canvas(frm);
 		},
 		pitch_type(frm) {
@@ -49,9 +62,12 @@
 		const previousSize = frm._diagram_canvas
 			? { w: frm._diagram_canvas.getWidth(), h: frm._diagram_canvas.getHeight() }
 			: null;
+		let snapshot = null;
 		if (frm._diagram_canvas) {
-			// preserve current work before re-render (e.g., when pitch/orientation changes)
-			frm.doc.diagram_json = JSON.stringify(frm._diagram_canvas.toJSON(["isBackground"]));
+			// preserve current work before re-render (e.g., when pitch/orientation changes);
+			// the snapshot is restored as is, without parsing diagram_json again
+			snapshot = frm._diagram_canvas.toJSON(["isBackground"]);
+			frm.doc.diagram_json = JSON.stringify(snapshot);
 			frm._diagram_canvas.dispose();
 			frm._diagram_canvas = null;
 		}
@@ -83,23 +99,11 @@
 			width,
 			height,
 			previousSize,
-			() =>
-				draw_pitch_background(
-					canvas,
-					width,
-					height,
-					frm.doc.pitch_type || "Full",
-					frm.doc.orientation || "Horizontal"
-				)
+			snapshot,
+			() => set_pitch_background(frm, canvas, width, height)
 		);
 		if (!didRestore) {
-			draw_pitch_background(
-				canvas,
-				width,
-				height,
-				frm.doc.pitch_type || "Full",
-				frm.doc.orientation || "Horizontal"
-			);
+			set_pitch_background(frm, canvas, width, height);
 		}
 		setup_toolbar_actions(frm, canvas);
 		canvas.renderAll();
@@ -119,8 +123,90 @@
 		return orientation === "Vertical" ? { width: base.h, height: base.w } : { width: base.w, height: base.h };
 	}
 
+	function set_pitch_background(frm, canvas, width, height) {
+		// The pitch is one non-interactive image, so it adds nothing to hit-testing or the saved JSON
+		canvas.setBackgroundColor(PITCH_COLOR);
+		const pitchType = frm.doc.pitch_type || "Full";
+		const orientation = frm.doc.orientation || "Horizontal";
+		get_pitch_background(width, height, pitchType, orientation)
+			.then(({ url, multiplier }) => {
+				if (frm._diagram_canvas !== canvas) {
+					return;
+				}
+				canvas.setBackgroundImage(url, canvas.renderAll.bind(canvas), {
+					left: 0,
+					top: 0,
+					originX: "left",
+					originY: "top",
+					scaleX: 1 / multiplier,
+					scaleY: 1 / multiplier,
+					excludeFromExport: true,
+				});
+			})
+			.catch((err) => console.warn("Failed to render pitch background", err));
+	}
+
+	function get_pitch_background(width, height, pitchType, orientation) {
+		const multiplier = Math.min(Math.ceil(window.devicePixelRatio || 1), 2);
+		const key = `${pitchType}-${orientation}-${width}x${height}@${multiplier}x`;
+		if (!pitchBackgrounds.has(key)) {
+			const request = `/vulero-pitch/${encodeURIComponent(key)}.png`;
+			const background = read_cached_pitch(request)
+				.then(
+					(cached) =>
+						cached ||
+						render_pitch_background(request, width, height, pitchType, orientation, multiplier)
+				)
+				.then((blob) => ({ url: URL.createObjectURL(blob), multiplier }));
+			background.catch(() => pitchBackgrounds.delete(key));
+			pitchBackgrounds.set(key, background);
+		}
+		return pitchBackgrounds.get(key);
+	}
+
+	function render_pitch_background(request, width, height, pitchType, orientation, multiplier) {
+		const canvas = new fabric.StaticCanvas(document.createElement("canvas"), {
+			width,
+			height,
+			renderOnAddRemove: false,
+		});
+		draw_pitch_background(canvas, width, height, pitchType, orientation);
+		canvas.renderAll();
+		const dataUrl = canvas.toDataURL({ format: "png", multiplier });
+		canvas.dispose();
+		return fetch(dataUrl)
+			.then((response) => response.blob())
+			.then((blob) => {
+				store_cached_pitch(request, blob);
+				return blob;
+			});
+	}
+
+	function read_cached_pitch(request) {
+		if (!window.caches) {
+			return Promise.resolve(null);
+		}
+		return caches
+			.open(PITCH_CACHE)
+			.then((cache) => cache.match(request))
+			.then((response) => (response ? response.blob() : null))
+			.catch(() => null);
+	}
+
+	function store_cached_pitch(request, blob) {
+		if (!window.caches) {
+			return;
+		}
+		caches
+			.open(PITCH_CACHE)
+			.then((cache) =>
+				cache.put(request, new Response(blob, { headers: { "Content-Type": "image/png" } }))
+			)
+			.catch(() => undefined);
+	}
+
 	function draw_pitch_background(canvas, width, height, pitchType, orientation) {
-		canvas.setBackgroundColor("#0b8d2f", canvas.renderAll.bind(canvas));
+		canvas.setBackgroundColor(PITCH_COLOR);
 
 		const left = CANVAS_MARGIN;
 		const top = CANVAS_MARGIN;
@@ -211,7 +297,7 @@
 			const uStart = (fieldLength / stripeCount) * i;
 			const uEnd = (fieldLength / stripeCount) * (i + 1);
 			const stripe = rectFromUV(uStart, 0, uEnd, fieldBreadth);
-			const color = i % 2 === 0 ? "#0b8d2f" : "#0a7a2a";
+			const color = i % 2 === 0 ? PITCH_COLOR : "#0a7a2a";
 			addRect(stripe.x, stripe.y, stripe.w, stripe.h, color, true);
 		}
 
@@ -1009,12 +1095,12 @@
 		canvas.requestRenderAll();
 	}
 
-	function restore_diagram_if_any(frm, canvas, width, height, previousSize, afterLoad) {
-		if (!frm.doc.diagram_json) {
+	function restore_diagram_if_any(frm, canvas, width, height, previousSize, snapshot, afterLoad) {
+		if (!snapshot && !frm.doc.diagram_json) {
 			return false;
 		}
 		try {
-			const saved = JSON.parse(frm.doc.diagram_json);
+			const saved = snapshot || JSON.parse(frm.doc.diagram_json);
 			const cleaned = strip_background_objects(saved);
 			if (!cleaned || !Array.isArray(cleaned.objects) || cleaned.objects.length === 0) {
 				return false;
@@ -1070,37 +1156,29 @@
 			return;
 		}
 
-		const json = JSON.stringify(canvas.toJSON(["isBackground"]));
-		frm.set_value("diagram_json", json);
-
-		// Ensure doc exists before attaching file
-		if (frm.is_new()) {
-			await frm.save();
-		}
-
-		const dataUrl = canvas.toDataURL({
-			format: "png",
-			multiplier: 2,
-		});
-
+		// Previews are rendered on the server after the save commits.
+		frm.set_value("diagram_json", JSON.stringify(canvas.toJSON(["isBackground"])));
 		try {
-			const res = await frappe.call({
-				method: "vulero_session_planner.api.diagram.save_diagram_file",
-				args: {
-					file_name: `diagram-${frm.doc.name || Math.floor(Math.random() * 1e6)}.png`,
-					content: dataUrl.split(",")[1],
-					docname: frm.doc.name,
-					is_private: 0,
-				},
-			});
-			if (res && res.message && res.message.file_url) {
-				frm.set_value("preview_image", res.message.file_url);
-			}
 			await frm.save();
 			frappe.show_alert({ message: __("Diagram saved"), indicator: "green" });
 		} catch (err) {
 			console.error(err);
-			frappe.msgprint("Could not save diagram preview. Please try again.");
+			frappe.msgprint("Could not save the diagram. Please try again.");
 		}
 	}
+
+	function listen_for_preview(frm) {
+		if (frm._diagram_preview_listener) {
+			return;
+		}
+		frm._diagram_preview_listener = (data) => {
+			if (!data || data.diagram !== frm.doc.name) {
+				return;
+			}
+			// Set on the server without touching modified, so keep the form clean.
+			frm.doc.preview_image = data.preview_image;
+			frm.refresh_field("preview_image");
+		};
+		frappe.realtime.on("vulero_diagram_preview", frm._diagram_preview_listener);
+	}
 })();
@@ -0,0 +1,4 @@
+// Served from /assets so the diagram editor loads without the CDN and works offline
+import { fabric } from "fabric";
+
+window.fabric = fabric;
@@ -63,6 +63,57 @@
 		navigator.serviceWorker.register(SW_URL, { scope: "/" }).catch(function () {
 			// ignore registration errors
 		});
+		navigator.serviceWorker.addEventListener("message", handleWorkerMessage);
+		window.addEventListener("online", function () {
+			postToWorker({ type: "vulero-replay-drafts", csrf_token: getCsrfToken() });
+		});
+	}
+
+	function postToWorker(message) {
+		if (!("serviceWorker" in navigator)) {
+			return;
+		}
+		navigator.serviceWorker.ready.then(function (registration) {
+			if (registration.active) {
+				registration.active.postMessage(message);
+			}
+		});
+	}
+
+	function getCsrfToken() {
+		return (window.frappe && frappe.csrf_token) || null;
+	}
+
+	function announceSessionUser() {
+		// The worker drops cached documents and queued drafts when the user changes and replays
+		// drafts with the CSRF token of the current session
+		if (window.frappe && frappe.session && frappe.session.user) {
+			postToWorker({
+				type: "vulero-session",
+				user: frappe.session.user,
+				csrf_token: getCsrfToken(),
+			});
+		}
+	}
+
+	function handleWorkerMessage(event) {
+		var data = event.data || {};
+		if (!window.frappe) {
+			return;
+		}
+		if (data.type === "vulero-document-updated") {
+			var frm = window.cur_frm;
+			if (frm && frm.doctype === data.doctype && frm.docname === data.name && !frm.is_dirty()) {
+				frm.reload_doc();
+			}
+		} else if (data.type === "vulero-draft-replayed") {
+			frappe.show_alert({
+				message: data.ok
+					? data.doctype + " " + data.name + " was saved from the offline draft."
+					: "The offline draft of " + data.doctype + " " + data.name + " could not be saved.",
+				indicator: data.ok ? "green" : "red",
+			});
+		}
 	}
 
 	function canPromptInstall() {
@@ -138,11 +189,13 @@
 
 		if (window.frappe && typeof frappe.ready === "function") {
 			frappe.ready(function () {
+				announceSessionUser();
 				filterWorkspaceIcons();
 				setTimeout(showInstallPrompt, 1000);
 			});
 		} else {
 			document.addEventListener("DOMContentLoaded", function () {
+				announceSessionUser();
 				filterWorkspaceIcons();
 				setTimeout(showInstallPrompt, 1000);
 			});
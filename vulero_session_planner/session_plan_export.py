@@ -0,0 +1,132 @@
+import io
+import zipfile
+
+import frappe
+from frappe.utils import now_datetime
+from frappe.utils.file_manager import save_file
+
+from vulero_session_planner.diagram_files import remove_files
+from vulero_session_planner.permissions import check_permissions
+
+EXPORT_PRINT_FORMAT = "Session Plan Template"
+EXPORT_FORMATS = ("pdf", "html")
+EXPORT_CACHE_PREFIX = "vulero_session_planner:session_plan_export"
+EXPORT_CACHE_SECONDS = 24 * 60 * 60
+EXPORT_QUEUE = "long"
+
+
+def get_session_plan_export(name, export_format="pdf"):
+	"""Return the Session Plan Template print of `name` as PDF bytes or an HTML string.
+
+	Output is cached per (name, version_no, modified), so any save of the plan starts a new entry.
+	Writes that skip modified (preview renders, diagram links, Diagram deletion) call
+	clear_export_cache. Callers are responsible for checking read permission.
+	"""
+	if export_format not in EXPORT_FORMATS:
+		frappe.throw(f"Unsupported export format: {export_format}")
+
+	plan = frappe.db.get_value("Session Plan", name, ["version_no", "modified"], as_dict=True)
+	if not plan:
+		raise frappe.DoesNotExistError(f"Session Plan {name} not found")
+
+	key = f"{EXPORT_CACHE_PREFIX}:{name}:{plan.version_no or 1}:{plan.modified}:{export_format}"
+	content = frappe.cache.get_value(key)
+	if content is None:
+		content = frappe.get_print(
+			"Session Plan",
+			name,
+			EXPORT_PRINT_FORMAT,
+			as_pdf=export_format == "pdf",
+			no_letterhead=1,
+		)
+		frappe.cache.set_value(key, content, expires_in_sec=EXPORT_CACHE_SECONDS)
+	return content
+
+
+def clear_export_cache(session_plans):
+	session_plans = [name for name in session_plans if name]
+	if not session_plans:
+		return
+
+	def clear():
+		for name in session_plans:
+			frappe.cache.delete_keys(f"{EXPORT_CACHE_PREFIX}:{name}:")
+
+	clear()
+	# Clear again once committed so a concurrent export cannot re-cache the old content.
+	frappe.db.after_commit.add(clear)
+
+
+def enqueue_cohort_export(cohort, export_format="pdf"):
+	"""Queue a zip export of the approved Session Plans of `cohort` for the current user."""
+	if export_format not in EXPORT_FORMATS:
+		frappe.throw(f"Unsupported export format: {export_format}")
+
+	job_id = f"vulero-session-plan-export::{cohort}::{export_format}::{frappe.session.user}"
+	frappe.enqueue(
+		"vulero_session_planner.session_plan_export.export_cohort_session_plans",
+		queue=EXPORT_QUEUE,
+		job_id=job_id,
+		deduplicate=True,
+		cohort=cohort,
+		export_format=export_format,
+	)
+	return job_id
+
+
+def export_cohort_session_plans(cohort, export_format="pdf"):
+	"""Zip every approved Session Plan of `cohort` the current user can read and attach it to the Cohort.
+
+	Progress is published on the Cohort; the file URL is sent to the user as `vulero_session_plan_export`.
+	"""
+	plans = frappe.get_all(
+		"Session Plan",
+		filters={"cohort": cohort, "status": "Approved"},
+		fields=["name", "version_no"],
+		order_by="session_date asc, name asc",
+	)
+	permitted = check_permissions("Session Plan", [plan.name for plan in plans]) if plans else {}
+	plans = [plan for plan in plans if permitted.get(plan.name)]
+
+	buffer = io.BytesIO()
+	failed = []
+	with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+		for index, plan in enumerate(plans, start=1):
+			try:
+				content = get_session_plan_export(plan.name, export_format)
+			except Exception:
+				frappe.log_error(title=f"Session Plan export failed for {plan.name}")
+				failed.append(plan.name)
+			else:
+				archive.writestr(f"{plan.name}-v{plan.version_no or 1}.{export_format}", content)
+
+			frappe.publish_progress(
+				index * 100 / len(plans),
+				title="Exporting Session Plans",
+				doctype="Cohort",
+				docname=cohort,
+				description=f"{index} of {len(plans)}",
+			)
+
+	prefix = f"session-plans-{cohort}-{frappe.scrub(frappe.session.user)}-"
+	previous = frappe.get_all(
+		"File",
+		filters={
+			"attached_to_doctype": "Cohort",
+			"attached_to_name": cohort,
+			"owner": frappe.session.user,
+			"file_name": ["like", f"{prefix}%.zip"],
+		},
+		fields=["name", "file_url"],
+	)
+	file_name = f"{prefix}{now_datetime().strftime('%Y%m%d%H%M%S')}.zip"
+	file_url = save_file(file_name, buffer.getvalue(), "Cohort", cohort, is_private=1).file_url
+	remove_files(previous)
+
+	frappe.publish_realtime(
+		"vulero_session_plan_export",
+		{"cohort": cohort, "file_url": file_url, "exported": len(plans) - len(failed), "failed": failed},
+		user=frappe.session.user,
+		after_commit=True,
+	)
+	return file_url
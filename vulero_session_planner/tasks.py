@@ -1,56 +1,94 @@
+import time
+
 import frappe
-from frappe.utils import add_days, nowdate
+from frappe.utils import add_days, create_batch, nowdate
+
+from vulero_session_planner.diagram_files import sweep_orphaned_previews
+from vulero_session_planner.utils import get_users_with_role, notify_users_bulk, refresh_account_statuses
 
-from vulero_session_planner.utils import get_users_with_role, notify_users
+BATCH_SIZE = 500
 
 
 def daily():
 	update_expired_accounts()
 	send_expiry_warnings()
+	refresh_account_statuses()
+
+
+def weekly():
+	# Sweeps the first chunk here and re-enqueues itself for the rest.
+	sweep_orphaned_previews()
 
 
 def update_expired_accounts():
+	started = time.monotonic()
 	today = nowdate()
 
 	# Activate accounts that have been extended
-	reactivate = frappe.get_all(
-		"Coach Profile",
-		filters={"account_expiry_date": [">=", today], "status": "Expired"},
-		fields=["name"],
+	reactivated = _set_coach_status({"account_expiry_date": [">=", today], "status": "Expired"}, "Active")
+
+	heads = get_users_with_role("Coach Education Head")
+	expired = _set_coach_status(
+		{"account_expiry_date": ["<", today], "status": ["!=", "Expired"]},
+		"Expired",
+		notify=lambda row: {
+			"users": [row.user, *heads],
+			"subject": "Coach account expired",
+			"document_type": "Coach Profile",
+			"document_name": row.name,
+		},
 	)
-	for row in reactivate:
-		frappe.db.set_value("Coach Profile", row.name, "status", "Active")
 
-	expired = frappe.get_all(
-		"Coach Profile",
-		filters={"account_expiry_date": ["<", today], "status": ["!=", "Expired"]},
-		fields=["name", "user"],
+	return _report(
+		"update_expired_accounts",
+		started,
+		reactivated=len(reactivated),
+		expired=len(expired),
 	)
-	for row in expired:
-		frappe.db.set_value("Coach Profile", row.name, "status", "Expired")
-		if row.user:
-			notify_users(
-				[row.user] + get_users_with_role("Coach Education Head"),
-				subject="Coach account expired",
-				document_type="Coach Profile",
-				document_name=row.name,
-			)
 
 
 def send_expiry_warnings(days_before=7):
+	started = time.monotonic()
 	target_date = add_days(nowdate(), days_before)
 	warnings = frappe.get_all(
 		"Coach Profile",
 		filters={"account_expiry_date": target_date, "status": "Active"},
 		fields=["name", "user"],
+		limit=0,
 	)
-	for row in warnings:
-		recipients = [user for user in [row.user] if user]
-		recipients += get_users_with_role("Coach Education Head")
-		if recipients:
-			notify_users(
-				recipients,
-				subject="Coach account expires in 7 days",
-				document_type="Coach Profile",
-				document_name=row.name,
-			)
+
+	heads = get_users_with_role("Coach Education Head")
+	for batch in create_batch(warnings, BATCH_SIZE):
+		notify_users_bulk(
+			[
+				{
+					"users": [row.user, *heads],
+					"subject": "Coach account expires in 7 days",
+					"document_type": "Coach Profile",
+					"document_name": row.name,
+				}
+				for row in batch
+			]
+		)
+		frappe.db.commit()
+
+	return _report("send_expiry_warnings", started, warned=len(warnings))
+
+
+def _set_coach_status(filters, status, notify=None):
+	"""Move matching Coach Profiles to `status` in chunked bulk UPDATEs and return their names."""
+	rows = frappe.get_all("Coach Profile", filters=filters, fields=["name", "user"], limit=0)
+
+	for batch in create_batch(rows, BATCH_SIZE):
+		frappe.db.set_value("Coach Profile", {"name": ["in", [row.name for row in batch]]}, "status", status)
+		if notify:
+			notify_users_bulk([notify(row) for row in batch if row.user])
+		frappe.db.commit()
+
+	return [row.name for row in rows]
+
+
+def _report(job, started, **counts):
+	report = {**counts, "seconds": round(time.monotonic() - started, 3)}
+	frappe.logger("vulero_session_planner").info({"job": job, **report})
+	return report
@@ -1,5 +1,139 @@
+from dataclasses import asdict, dataclass
+
 import frappe
-from frappe.utils import nowdate
+from frappe.utils import now, nowdate
+
+USER_SCOPE_CACHE_KEY = "vulero_session_planner:user_scope"
+ACCOUNT_STATUS_CACHE_KEY = "vulero_session_planner:account_status"
+BLOCKED_ACCOUNT_STATUSES = frozenset({"Expired", "Suspended"})
+NOTIFICATION_LOG_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"subject",
+	"for_user",
+	"type",
+	"document_type",
+	"document_name",
+	"read",
+)
+FULL_ACCESS_ROLES = frozenset({"Coach Education Head", "System Manager"})
+
+
+@dataclass(frozen=True)
+class UserScope:
+	user: str
+	roles: tuple = ()
+	coach: str | None = None
+	coach_cohort: str | None = None
+	coach_license_program: str | None = None
+	instructor: str | None = None
+	cohorts: tuple = ()
+
+	def has_role(self, role):
+		return role in self.roles
+
+	@property
+	def has_full_access(self):
+		return self.user == "Administrator" or bool(FULL_ACCESS_ROLES.intersection(self.roles))
+
+	@property
+	def is_instructor(self):
+		return self.has_role("Instructor")
+
+	@property
+	def is_coach(self):
+		return self.has_role("Coach")
+
+	def has_cohort(self, cohort):
+		return bool(cohort) and cohort in self.cohorts
+
+
+def get_user_scope(user=None):
+	"""Return the cached identity of `user`, resolved once per request and shared across requests via Redis."""
+	user = user or frappe.session.user
+	local_scopes = _get_local_user_scopes()
+	scope = local_scopes.get(user)
+	if scope:
+		return scope
+
+	cached = frappe.cache.hget(USER_SCOPE_CACHE_KEY, user)
+	if cached:
+		scope = UserScope(**cached)
+	else:
+		scope = _build_user_scope(user)
+		frappe.cache.hset(USER_SCOPE_CACHE_KEY, user, asdict(scope))
+
+	local_scopes[user] = scope
+	return scope
+
+
+def clear_user_scope(user=None):
+	if user:
+		_get_local_user_scopes().pop(user, None)
+		frappe.cache.hdel(USER_SCOPE_CACHE_KEY, user)
+		return
+
+	frappe.local.vulero_user_scopes = {}
+	frappe.cache.delete_key(USER_SCOPE_CACHE_KEY)
+
+
+def clear_user_scope_for_doc(doc, method=None):
+	"""Doc event handler: drop cached scopes for every user the changed document can affect."""
+	previous = doc.get_doc_before_save()
+	users = set()
+
+	if doc.doctype == "User":
+		users.add(doc.name)
+	elif doc.doctype == "Assignment":
+		instructors = {doc.instructor, previous.instructor if previous else None}
+		instructors.discard(None)
+		if instructors:
+			users.update(
+				frappe.get_all(
+					"Instructor Profile",
+					filters={"name": ["in", list(instructors)]},
+					pluck="user",
+				)
+			)
+	else:
+		users.update({doc.get("user"), previous.get("user") if previous else None})
+
+	users = {user for user in users if user}
+	if not users:
+		return
+
+	def clear():
+		for user in users:
+			clear_user_scope(user)
+
+	clear()
+	# Clear again once committed so a concurrent read cannot re-cache the old scope.
+	frappe.db.after_commit.add(clear)
+
+
+def _get_local_user_scopes():
+	if not hasattr(frappe.local, "vulero_user_scopes"):
+		frappe.local.vulero_user_scopes = {}
+	return frappe.local.vulero_user_scopes
+
+
+def _build_user_scope(user):
+	coach = frappe.db.get_value(
+		"Coach Profile", {"user": user}, ["name", "cohort", "license_program"], as_dict=True
+	)
+	instructor = get_instructor_profile_for_user(user)
+	return UserScope(
+		user=user,
+		roles=tuple(frappe.get_roles(user)),
+		coach=coach.name if coach else None,
+		coach_cohort=coach.cohort if coach else None,
+		coach_license_program=coach.license_program if coach else None,
+		instructor=instructor,
+		cohorts=tuple(get_assigned_cohorts_for_instructor(instructor)),
+	)
 
 
 def get_coach_profile_for_user(user):
@@ -86,21 +220,81 @@ def get_assigned_coaches_for_instructor(instructor):
 
 
 def notify_users(users, subject, document_type=None, document_name=None):
-	for user in set(users or []):
-		if not user:
-			continue
-		if not frappe.db.exists("User", user):
-			continue
-		frappe.get_doc(
+	notify_users_bulk(
+		[
 			{
-				"doctype": "Notification Log",
+				"users": users,
 				"subject": subject,
-				"for_user": user,
-				"type": "Alert",
 				"document_type": document_type,
 				"document_name": document_name,
 			}
-		).insert(ignore_permissions=True)
+		]
+	)
+
+
+def notify_users_bulk(notifications):
+	"""Write alert Notification Logs for many recipients in one multi-row insert.
+
+	Each notification is a dict of `users`, `subject`, `document_type` and `document_name`.
+	Recipients are deduplicated and checked against User in one query. Notification Log
+	document hooks (email alerts) are not run.
+	"""
+	pending = {}
+	for notification in notifications or []:
+		for user in notification.get("users") or []:
+			if not user:
+				continue
+			key = (
+				user,
+				notification.get("subject"),
+				notification.get("document_type"),
+				notification.get("document_name"),
+			)
+			pending[key] = None
+
+	if not pending:
+		return 0
+
+	existing_users = set(
+		frappe.get_all("User", filters={"name": ["in", list({key[0] for key in pending})]}, pluck="name")
+	)
+	rows = [key for key in pending if key[0] in existing_users]
+	if not rows:
+		return 0
+
+	timestamp = now()
+	sender = frappe.session.user
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			sender,
+			sender,
+			subject,
+			user,
+			"Alert",
+			document_type,
+			document_name,
+			0,
+		)
+		for user, subject, document_type, document_name in rows
+	]
+	frappe.db.bulk_insert("Notification Log", fields=NOTIFICATION_LOG_FIELDS, values=values)
+
+	recipients = sorted({row[0] for row in rows})
+	frappe.db.set_value(
+		"Notification Settings",
+		{"name": ["in", recipients]},
+		"seen",
+		0,
+		update_modified=False,
+	)
+	# Realtime events published after commit are flushed together once the transaction ends.
+	for user in recipients:
+		frappe.publish_realtime("notification", after_commit=True, user=user)
+
+	return len(values)
 
 
 def ensure_user_not_expired(user=None):
@@ -108,14 +302,75 @@ def ensure_user_not_expired(user=None):
 	if user == "Administrator" or user_has_role("Coach Education Head", user):
 		return
 
-	coach = frappe.db.get_value(
-		"Coach Profile", {"user": user}, ["status", "account_expiry_date"], as_dict=True
-	)
-	if not coach:
-		return
-
-	if coach.status in {"Expired", "Suspended"}:
+	account = get_account_status(user)
+	if account.get("status") in BLOCKED_ACCOUNT_STATUSES:
 		frappe.throw("Your account is expired or suspended. Contact the Coach Education Head.")
 
-	if coach.account_expiry_date and coach.account_expiry_date < nowdate():
+	if account.get("expiry_date") and account["expiry_date"] < nowdate():
 		frappe.throw("Your account has expired. Contact the Coach Education Head.")
+
+
+def load_account_status():
+	"""before_request hook: resolve the session user's account status once for the request."""
+	if frappe.session.user not in {"Guest", "Administrator"}:
+		get_account_status(frappe.session.user)
+
+
+def get_account_status(user=None):
+	"""Return {"status", "expiry_date"} of the user's Coach Profile, or {} for users without one.
+
+	Served from frappe.local within a request and from a per-user Redis entry across requests.
+	"""
+	user = user or frappe.session.user
+	local_statuses = _get_local_account_statuses()
+	if user in local_statuses:
+		return local_statuses[user]
+
+	account = frappe.cache.hget(ACCOUNT_STATUS_CACHE_KEY, user)
+	if account is None:
+		coach = frappe.db.get_value(
+			"Coach Profile", {"user": user}, ["status", "account_expiry_date"], as_dict=True
+		)
+		account = _get_account_status_entry(coach.status, coach.account_expiry_date) if coach else {}
+		frappe.cache.hset(ACCOUNT_STATUS_CACHE_KEY, user, account)
+
+	local_statuses[user] = account
+	return account
+
+
+def set_account_status(user, status, expiry_date):
+	account = _get_account_status_entry(status, expiry_date)
+	_get_local_account_statuses()[user] = account
+	frappe.cache.hset(ACCOUNT_STATUS_CACHE_KEY, user, account)
+
+
+def clear_account_status(user):
+	_get_local_account_statuses().pop(user, None)
+	frappe.cache.hdel(ACCOUNT_STATUS_CACHE_KEY, user)
+
+
+def refresh_account_statuses():
+	"""Rewrite every cached account status from the Coach Profiles."""
+	rows = frappe.get_all(
+		"Coach Profile",
+		filters={"user": ["is", "set"]},
+		fields=["user", "status", "account_expiry_date"],
+		limit=0,
+	)
+	frappe.local.vulero_account_statuses = {}
+	frappe.cache.delete_value(ACCOUNT_STATUS_CACHE_KEY)
+	for row in rows:
+		frappe.cache.hset(
+			ACCOUNT_STATUS_CACHE_KEY, row.user, _get_account_status_entry(row.status, row.account_expiry_date)
+		)
+	return len(rows)
+
+
+def _get_account_status_entry(status, expiry_date):
+	return {"status": status, "expiry_date": str(expiry_date) if expiry_date else None}
+
+
+def _get_local_account_statuses():
+	if not hasattr(frappe.local, "vulero_account_statuses"):
+		frappe.local.vulero_account_statuses = {}
+	return frappe.local.vulero_account_statuses
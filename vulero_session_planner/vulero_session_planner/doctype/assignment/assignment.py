@@ -1,53 +1,215 @@
 import frappe
 from frappe.model.document import Document
+from frappe.utils import now
+
+from vulero_session_planner.vulero_session_planner.doctype.instructor_coach_access.instructor_coach_access import (
+	sync_access_for_assignment,
+)
+
+ASSIGNMENT_COACH_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"idx",
+	"parent",
+	"parenttype",
+	"parentfield",
+	"coach",
+	"coach_name",
+)
+
+
+COHORT_COACHES_CACHE_KEY = "vulero_session_planner:cohort_coaches"
+COHORT_SYNC_GENERATION_KEY = "vulero_session_planner:cohort_coach_sync_generation"
+
+
+def use_virtual_cohort_coaches():
+	"""Serve Assignment.cohort_coaches from the cohort roster at read time instead of storing rows.
+
+	Enabled with `"vulero_virtual_cohort_coaches": 1` in site_config.json.
+	"""
+	return bool(frappe.conf.get("vulero_virtual_cohort_coaches"))
 
 
 def get_cohort_coaches(cohort):
 	if not cohort:
 		return []
 
-	return frappe.get_all(
-		"Coach Profile",
-		filters={"cohort": cohort},
-		fields=["name", "full_name"],
-		order_by="full_name asc, name asc",
-		limit=0,
+	return frappe.cache.hget(
+		COHORT_COACHES_CACHE_KEY,
+		cohort,
+		generator=lambda: frappe.get_all(
+			"Coach Profile",
+			filters={"cohort": cohort},
+			fields=["name", "full_name"],
+			order_by="full_name asc, name asc",
+			limit=0,
+		),
+	)
+
+
+def clear_cohort_coaches_cache(cohorts):
+	cohorts = [cohort for cohort in cohorts if cohort]
+	if not cohorts:
+		return
+
+	def clear():
+		frappe.cache.hdel(COHORT_COACHES_CACHE_KEY, cohorts)
+
+	clear()
+	# Clear again once committed so a concurrent read cannot re-cache the old roster.
+	frappe.db.after_commit.add(clear)
+
+
+def drop_materialized_cohort_coaches():
+	frappe.db.delete("Assignment Coach", {"parenttype": "Assignment", "parentfield": "cohort_coaches"})
+
+
+def enqueue_cohort_coach_sync(cohort):
+	"""Resync the cohort's Assignment Coach rows once, in a worker, after the current transaction commits."""
+	if not cohort:
+		return
+
+	# Pending only until this transaction ends, so jobs that commit several times enqueue again.
+	pending = frappe.flags.vulero_pending_cohort_syncs
+	if pending is None:
+		pending = frappe.flags.vulero_pending_cohort_syncs = set()
+	if cohort in pending:
+		return
+	pending.add(cohort)
+
+	def enqueue():
+		pending.discard(cohort)
+		_enqueue_cohort_coach_sync(cohort)
+
+	frappe.db.after_commit.add(enqueue)
+	frappe.db.after_rollback.add(lambda: pending.discard(cohort))
+
+
+def _enqueue_cohort_coach_sync(cohort):
+	# A started job has already moved to the next generation, so this only deduplicates against a
+	# job that is still queued and will read the committed rows when it runs.
+	generation = _get_cohort_sync_generation(cohort)
+	frappe.enqueue(
+		"vulero_session_planner.vulero_session_planner.doctype.assignment.assignment.sync_assignments_for_cohort",
+		queue="short",
+		job_id=f"vulero-cohort-coaches::{cohort}::{generation}",
+		deduplicate=True,
+		cohort=cohort,
 	)
 
 
+def _get_cohort_sync_generation(cohort):
+	return int(frappe.cache.get(_get_cohort_sync_generation_key(cohort)) or 0)
+
+
+def _get_cohort_sync_generation_key(cohort):
+	# A plain counter, so read and bumped with the raw get/incr rather than the pickling wrappers.
+	return frappe.cache.make_key(f"{COHORT_SYNC_GENERATION_KEY}:{cohort}")
+
+
 def sync_assignments_for_cohort(cohort):
 	if not cohort:
 		return
+	# Bump before reading so changes committed from here on enqueue a new job instead of being
+	# deduplicated against this one.
+	frappe.cache.incr(_get_cohort_sync_generation_key(cohort))
+	if use_virtual_cohort_coaches():
+		return
 
 	assignment_names = frappe.get_all(
 		"Assignment",
 		filters={"cohort": cohort},
-		fields=["name"],
+		pluck="name",
 		limit=0,
 	)
-	for assignment_row in assignment_names:
-		assignment = frappe.get_doc("Assignment", assignment_row.name)
-		assignment.save(ignore_permissions=True)
+	if not assignment_names:
+		return
+
+	frappe.db.delete(
+		"Assignment Coach",
+		{
+			"parenttype": "Assignment",
+			"parentfield": "cohort_coaches",
+			"parent": ["in", assignment_names],
+		},
+	)
+
+	coaches = get_cohort_coaches(cohort)
+	if not coaches:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			idx,
+			assignment_name,
+			"Assignment",
+			"cohort_coaches",
+			coach.name,
+			coach.full_name or coach.name,
+		)
+		for assignment_name in assignment_names
+		for idx, coach in enumerate(coaches, start=1)
+	]
+	frappe.db.bulk_insert("Assignment Coach", fields=ASSIGNMENT_COACH_FIELDS, values=values)
 
 
 class Assignment(Document):
+	def onload(self):
+		if use_virtual_cohort_coaches():
+			self._set_cohort_coaches(virtual=True)
+
 	def validate(self):
 		self._validate_unique_active()
-		self._sync_cohort_coaches()
+		if use_virtual_cohort_coaches():
+			self.set("cohort_coaches", [])
+		else:
+			self._set_cohort_coaches()
 
-	def _sync_cohort_coaches(self):
+	def on_update(self):
+		self._sync_instructor_access()
+
+	def on_trash(self):
+		sync_access_for_assignment(self.instructor, self.cohort, exclude_assignment=self.name)
+
+	def _sync_instructor_access(self):
+		previous = self.get_doc_before_save()
+		pairs = {(self.instructor, self.cohort)}
+		if previous:
+			if (previous.instructor, previous.cohort, previous.status) == (
+				self.instructor,
+				self.cohort,
+				self.status,
+			):
+				return
+			pairs.add((previous.instructor, previous.cohort))
+
+		for instructor, cohort in pairs:
+			sync_access_for_assignment(instructor, cohort)
+
+	def _set_cohort_coaches(self, virtual=False):
 		self.set("cohort_coaches", [])
 		if not self.cohort:
 			return
 
-		for coach in get_cohort_coaches(self.cohort):
-			self.append(
-				"cohort_coaches",
-				{
-					"coach": coach.name,
-					"coach_name": coach.full_name or coach.name,
-				},
-			)
+		for idx, coach in enumerate(get_cohort_coaches(self.cohort), start=1):
+			row = {
+				"coach": coach.name,
+				"coach_name": coach.full_name or coach.name,
+			}
+			if virtual:
+				# Read-only rows still need a stable name for the form grid.
+				row["name"] = f"{self.name}-coach-{idx}"
+			self.append("cohort_coaches", row)
 
 	def _validate_unique_active(self):
 		if self.status != "Active":
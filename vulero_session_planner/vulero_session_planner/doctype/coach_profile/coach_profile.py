@@ -2,8 +2,15 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import add_days, nowdate
 
+from vulero_session_planner.program_rules import get_program_rules
+from vulero_session_planner.utils import clear_account_status, set_account_status
 from vulero_session_planner.vulero_session_planner.doctype.assignment.assignment import (
-	sync_assignments_for_cohort,
+	clear_cohort_coaches_cache,
+	enqueue_cohort_coach_sync,
+	use_virtual_cohort_coaches,
+)
+from vulero_session_planner.vulero_session_planner.doctype.instructor_coach_access.instructor_coach_access import (
+	sync_access_for_coach,
 )
 
 
@@ -11,18 +18,24 @@ class CoachProfile(Document):
 	def before_insert(self):
 		if self.account_expiry_date or not self.license_program:
 			return
-		days = frappe.db.get_value("License Program", self.license_program, "default_expiry_days")
+		rules = get_program_rules(self.license_program)
+		days = rules and rules["default_expiry_days"]
 		if days:
 			self.account_expiry_date = add_days(nowdate(), int(days))
 
 	def validate(self):
 		self._sync_status_with_expiry()
+		self._cache_account_status()
 
 	def on_update(self):
 		self._sync_assignments_for_cohorts()
+		self._sync_instructor_access()
 
 	def on_trash(self):
 		self._sync_assignments_for_cohorts()
+		sync_access_for_coach(self.name)
+		if self.user:
+			clear_account_status(self.user)
 
 	def _sync_status_with_expiry(self):
 		if not self.account_expiry_date:
@@ -32,14 +45,38 @@ class CoachProfile(Document):
 		elif self.status == "Expired":
 			self.status = "Active"
 
+	def _cache_account_status(self):
+		previous = self.get_doc_before_save()
+		if previous and previous.user and previous.user != self.user:
+			clear_account_status(previous.user)
+		if not self.user:
+			return
+		set_account_status(self.user, self.status, self.account_expiry_date)
+		# Drop the entry if the save does not go through; it is rebuilt from the database.
+		user = self.user
+		frappe.db.after_rollback.add(lambda: clear_account_status(user))
+
 	def _sync_assignments_for_cohorts(self):
+		previous = self.get_doc_before_save()
+		if previous and (previous.cohort, previous.full_name) == (self.cohort, self.full_name):
+			return
+
 		cohorts = set()
 		if self.cohort:
 			cohorts.add(self.cohort)
 
-		previous = self.get_doc_before_save()
 		if previous and previous.cohort and previous.cohort != self.cohort:
 			cohorts.add(previous.cohort)
 
+		clear_cohort_coaches_cache(cohorts)
+		if use_virtual_cohort_coaches():
+			return
+
 		for cohort in cohorts:
-			sync_assignments_for_cohort(cohort)
+			enqueue_cohort_coach_sync(cohort)
+
+	def _sync_instructor_access(self):
+		previous = self.get_doc_before_save()
+		if previous and previous.cohort == self.cohort:
+			return
+		sync_access_for_coach(self.name, self.cohort)
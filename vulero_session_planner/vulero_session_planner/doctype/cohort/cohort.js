@@ -0,0 +1,41 @@
+frappe.ui.form.on("Cohort", {
+	refresh(frm) {
+		if (frm.is_new()) {
+			return;
+		}
+		const canExport =
+			frappe.user.has_role("Instructor") || frappe.user.has_role("Coach Education Head");
+		if (!canExport) {
+			return;
+		}
+
+		frm.add_custom_button("Export Approved Session Plans", () => {
+			frappe.call({
+				method: "vulero_session_planner.api.export.export_cohort_session_plans",
+				args: {
+					cohort: frm.doc.name,
+				},
+				callback: () => {
+					frappe.show_alert({
+						message: "Export queued. The zip will be attached to this cohort.",
+						indicator: "blue",
+					});
+				},
+			});
+		});
+
+		if (!frm.__vulero_export_listener) {
+			frm.__vulero_export_listener = true;
+			frappe.realtime.on("vulero_session_plan_export", (data) => {
+				if (!data || data.cohort !== frm.doc.name) {
+					return;
+				}
+				frm.reload_doc();
+				const failed = data.failed && data.failed.length ? ` (${data.failed.length} failed)` : "";
+				frappe.msgprint(
+					`Exported ${data.exported} session plans${failed}. <a href="${data.file_url}" target="_blank">Download zip</a>`
+				);
+			});
+		}
+	},
+});
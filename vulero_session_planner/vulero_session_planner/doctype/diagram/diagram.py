@@ -1,32 +1,187 @@
+import base64
+import json
+import zlib
+
 import frappe
 from frappe.model.document import Document
 
+from vulero_session_planner.diagram_links import link_diagram_to_block
+from vulero_session_planner.session_plan_export import clear_export_cache
 from vulero_session_planner.utils import ensure_user_not_expired
+from vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan import (
+	clear_block_preview_cache,
+)
+
+DIAGRAM_JSON_PREFIX = "vsp-z1:"
+COORDINATE_DIGITS = 2
+SCALE_DIGITS = 4
+SCALE_KEYS = frozenset({"scaleX", "scaleY"})
+
+# fabric.js 5.x defaults that loadFromJSON fills back in. stroke, fill and strokeWidth are
+# kept because several subclasses (Group, Text) override them.
+FABRIC_OBJECT_DEFAULTS = {
+	"originX": "left",
+	"originY": "top",
+	"angle": 0,
+	"flipX": False,
+	"flipY": False,
+	"opacity": 1,
+	"shadow": None,
+	"visible": True,
+	"backgroundColor": "",
+	"fillRule": "nonzero",
+	"paintFirst": "fill",
+	"globalCompositeOperation": "source-over",
+	"skewX": 0,
+	"skewY": 0,
+	"scaleX": 1,
+	"scaleY": 1,
+	"strokeDashArray": None,
+	"strokeDashOffset": 0,
+	"strokeLineCap": "butt",
+	"strokeLineJoin": "miter",
+	"strokeMiterLimit": 4,
+	"strokeUniform": False,
+}
+FABRIC_TEXT_DEFAULTS = {
+	"fontWeight": "normal",
+	"fontStyle": "normal",
+	"lineHeight": 1.16,
+	"underline": False,
+	"overline": False,
+	"linethrough": False,
+	"textAlign": "left",
+	"textBackgroundColor": "",
+	"charSpacing": 0,
+	"direction": "ltr",
+	"path": None,
+	"pathStartOffset": 0,
+	"pathSide": "left",
+	"pathAlign": "baseline",
+}
+FABRIC_TEXT_TYPES = frozenset({"text", "i-text", "textbox"})
+PREVIEW_FIELDS = ("diagram_json", "pitch_type", "orientation")
 
 
 class Diagram(Document):
+	def onload(self):
+		self.diagram_json = decode_diagram_json(self.diagram_json)
+
 	def validate(self):
 		ensure_user_not_expired()
+		self._encode_diagram_json()
 		self._sync_linked_block()
 
+	def before_save(self):
+		self.sync_modified = self.modified
+
+	def on_update(self):
+		if self._preview_is_stale():
+			from vulero_session_planner.diagram_renderer import enqueue_preview_render
+
+			enqueue_preview_render(self)
+
 	def before_insert(self):
 		if not self.created_by:
 			self.created_by = frappe.session.user
 
+	def on_trash(self):
+		session_plans = frappe.get_all(
+			"Session Plan Block",
+			filters={"parenttype": "Session Plan", "diagram": self.name},
+			pluck="parent",
+			distinct=True,
+		)
+		clear_block_preview_cache([*session_plans, self.linked_session_plan])
+		clear_export_cache([*session_plans, self.linked_session_plan])
+
+	def _preview_is_stale(self):
+		if not self.preview_image or not self.get_doc_before_save():
+			return True
+		return any(self.has_value_changed(fieldname) for fieldname in PREVIEW_FIELDS)
+
+	def _encode_diagram_json(self):
+		try:
+			self.diagram_json = encode_diagram_json(self.diagram_json)
+		except ValueError:
+			frappe.throw("Diagram data is not valid JSON.")
+
 	def _sync_linked_block(self):
 		if not self.linked_session_plan or not self.linked_block_sequence:
 			return
-
-		sequence = int(self.linked_block_sequence)
-		filters = {
-			"parent": self.linked_session_plan,
-			"parenttype": "Session Plan",
-			"parentfield": "blocks",
-		}
-		block_name = frappe.db.get_value("Session Plan Block", {**filters, "sequence": sequence}, "name")
-		if not block_name:
-			block_name = frappe.db.get_value("Session Plan Block", {**filters, "idx": sequence}, "name")
-		if not block_name:
+		if not (
+			self.has_value_changed("linked_session_plan") or self.has_value_changed("linked_block_sequence")
+		):
 			return
 
-		frappe.db.set_value("Session Plan Block", block_name, "diagram", self.name, update_modified=False)
+		link_diagram_to_block(self.name, self.linked_session_plan, int(self.linked_block_sequence))
+
+
+def encode_diagram_json(value):
+	"""Return fabric canvas JSON in the compact stored format; stored values pass through unchanged."""
+	if not value or value.startswith(DIAGRAM_JSON_PREFIX):
+		return value
+
+	compact = json.dumps(normalize_fabric_json(json.loads(value)), separators=(",", ":"))
+	return DIAGRAM_JSON_PREFIX + base64.b64encode(zlib.compress(compact.encode(), 9)).decode()
+
+
+def decode_diagram_json(value):
+	"""Return the fabric canvas JSON string for a stored `diagram_json` value in either format."""
+	if not value or not value.startswith(DIAGRAM_JSON_PREFIX):
+		return value
+
+	return zlib.decompress(base64.b64decode(value[len(DIAGRAM_JSON_PREFIX) :])).decode()
+
+
+def normalize_fabric_json(data):
+	"""Drop the pitch background and default properties, and round coordinates."""
+	if not isinstance(data, dict) or not isinstance(data.get("objects"), list):
+		return data
+
+	# The editor draws the pitch as a background image it rebuilds itself.
+	return {
+		**{key: value for key, value in data.items() if key != "backgroundImage"},
+		"objects": [
+			_normalize_fabric_object(obj)
+			for obj in data["objects"]
+			if isinstance(obj, dict) and not obj.get("isBackground")
+		],
+	}
+
+
+def _normalize_fabric_object(obj):
+	defaults = FABRIC_OBJECT_DEFAULTS
+	if obj.get("type") in FABRIC_TEXT_TYPES:
+		defaults = {**FABRIC_OBJECT_DEFAULTS, **FABRIC_TEXT_DEFAULTS}
+
+	normalized = {}
+	for key, value in obj.items():
+		if key == "objects" and isinstance(value, list):
+			value = [_normalize_fabric_object(child) for child in value if isinstance(child, dict)]
+		else:
+			value = _quantize(value, SCALE_DIGITS if key in SCALE_KEYS else COORDINATE_DIGITS)
+
+		if key in defaults and _is_default(value, defaults[key]):
+			continue
+		normalized[key] = value
+
+	return normalized
+
+
+def _is_default(value, default):
+	# Keep False and 0 apart: True == 1 in Python, but fabric treats them differently.
+	if isinstance(value, bool) or isinstance(default, bool):
+		return value is default
+	return value == default
+
+
+def _quantize(value, digits):
+	if isinstance(value, float):
+		value = round(value, digits)
+		return int(value) if value.is_integer() else value
+	if isinstance(value, list):
+		return [_quantize(item, digits) for item in value]
+	if isinstance(value, dict):
+		return {key: _quantize(item, digits) for key, item in value.items()}
+	return value
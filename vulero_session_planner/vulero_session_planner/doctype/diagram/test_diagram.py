@@ -0,0 +1,120 @@
+import json
+
+from frappe.tests import UnitTestCase
+
+from vulero_session_planner.diagram_renderer import _dash_segments, _is_valid_dash, build_scene, rasterize
+from vulero_session_planner.vulero_session_planner.doctype.diagram.diagram import (
+	DIAGRAM_JSON_PREFIX,
+	decode_diagram_json,
+	encode_diagram_json,
+	normalize_fabric_json,
+)
+
+CANVAS = {
+	"version": "5.3.0",
+	"backgroundImage": {"type": "image", "src": "data:image/png;base64,AAAA"},
+	"objects": [
+		{"type": "rect", "isBackground": True, "width": 1050, "height": 680},
+		{
+			"type": "circle",
+			"left": 120.123456,
+			"top": 80.5,
+			"radius": 10.0,
+			"scaleX": 1.23456789,
+			"scaleY": 1,
+			"angle": 0,
+			"flipX": False,
+			"visible": True,
+			"fill": "#ffffff",
+		},
+		{
+			"type": "group",
+			"left": 10,
+			"top": 20,
+			"objects": [{"type": "line", "x1": 0.333333, "y1": 0, "x2": 40, "y2": 0, "opacity": 1}],
+		},
+		{"type": "textbox", "text": "CB", "fontWeight": "bold", "textAlign": "left", "underline": False},
+	],
+}
+
+
+class UnitTestDiagram(UnitTestCase):
+	def test_encoded_json_round_trips(self):
+		encoded = encode_diagram_json(json.dumps(CANVAS))
+
+		self.assertTrue(encoded.startswith(DIAGRAM_JSON_PREFIX))
+		self.assertEqual(json.loads(decode_diagram_json(encoded)), normalize_fabric_json(CANVAS))
+		self.assertEqual(encode_diagram_json(encoded), encoded)
+
+	def test_empty_and_legacy_values_pass_through(self):
+		legacy = json.dumps(CANVAS)
+		self.assertEqual(decode_diagram_json(legacy), legacy)
+		for value in (None, ""):
+			self.assertEqual(encode_diagram_json(value), value)
+			self.assertEqual(decode_diagram_json(value), value)
+
+	def test_normalize_drops_background_and_defaults(self):
+		normalized = normalize_fabric_json(CANVAS)
+
+		self.assertNotIn("backgroundImage", normalized)
+		self.assertEqual(normalized["version"], "5.3.0")
+		circle, group, text = normalized["objects"]
+		self.assertEqual(
+			circle,
+			{
+				"type": "circle",
+				"left": 120.12,
+				"top": 80.5,
+				"radius": 10,
+				"scaleX": 1.2346,
+				"fill": "#ffffff",
+			},
+		)
+		self.assertIsInstance(circle["radius"], int)
+		self.assertEqual(group["objects"], [{"type": "line", "x1": 0.33, "y1": 0, "x2": 40, "y2": 0}])
+		self.assertEqual(text, {"type": "textbox", "text": "CB", "fontWeight": "bold"})
+
+	def test_normalize_keeps_non_default_booleans(self):
+		normalized = normalize_fabric_json({"objects": [{"type": "rect", "visible": False, "opacity": 0}]})
+		self.assertEqual(normalized["objects"], [{"type": "rect", "visible": False, "opacity": 0}])
+		self.assertEqual(normalize_fabric_json({"version": "5.3.0"}), {"version": "5.3.0"})
+
+	def test_invalid_dashes_draw_solid(self):
+		points = [(0, 0), (100, 0)]
+		for dash in ([], [5, 0], [0, 5], [-1, 3], [float("nan"), 2], [float("inf"), 2]):
+			self.assertFalse(_is_valid_dash(dash), dash)
+			self.assertEqual(_dash_segments(points, dash), [points])
+
+		self.assertTrue(_is_valid_dash([1e-300, 2]))
+		self.assertEqual(_dash_segments(points, [1e-300, 2]), [points])
+
+	def test_dashes_split_the_line(self):
+		segments = _dash_segments([(0, 0), (20, 0)], [5, 5])
+		self.assertEqual(segments, [[(0, 0), (5.0, 0.0)], [(10.0, 0.0), (15.0, 0.0)]])
+
+	def test_scene_with_zero_dash_renders(self):
+		diagram_json = json.dumps(
+			{
+				"objects": [
+					{
+						"type": "line",
+						"left": 10,
+						"top": 10,
+						"width": 100,
+						"height": 0,
+						"x1": -50,
+						"y1": 0,
+						"x2": 50,
+						"y2": 0,
+						"stroke": "#000000",
+						"strokeWidth": 2,
+						"strokeDashArray": [5, 0],
+					}
+				]
+			}
+		)
+		scene = build_scene(diagram_json, "Full", "Horizontal")
+
+		self.assertIsNone(scene.shapes[-1].dash)
+		image = rasterize(scene, scale=0.5)
+		self.assertEqual(image.size, (round(scene.width * 0.5), round(scene.height * 0.5)))
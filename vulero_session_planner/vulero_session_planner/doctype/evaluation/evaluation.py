@@ -2,17 +2,17 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt
 
-from vulero_session_planner.utils import (
-	ensure_user_not_expired,
-	get_users_with_role,
-	notify_users,
-	user_has_role,
-)
+from vulero_session_planner.analytics import clear_analytics_cache
+from vulero_session_planner.notifications import enqueue_document_notification
+from vulero_session_planner.profiling import profile_step, step_profile
+from vulero_session_planner.utils import ensure_user_not_expired, user_has_role
 
 
 class Evaluation(Document):
+	@profile_step
 	def validate(self):
-		ensure_user_not_expired()
+		with step_profile(self.doctype, "ensure_user_not_expired"):
+			ensure_user_not_expired()
 		self._set_defaults_from_session_plan()
 		self._ensure_session_plan_approved()
 		self._ensure_editable()
@@ -21,8 +21,17 @@ class Evaluation(Document):
 
 	def on_update(self):
 		if self._status_changed_to("Published"):
-			self._notify_published()
+			enqueue_document_notification(self, "Published")
+		if self.status == "Published" or self._get_previous_status() == "Published":
+			self._clear_analytics_cache()
 
+	def _clear_analytics_cache(self):
+		clear_analytics_cache(cohort=self.cohort, license_program=self.license_program)
+		previous = self.get_doc_before_save()
+		if previous:
+			clear_analytics_cache(cohort=previous.cohort, license_program=previous.license_program)
+
+	@profile_step
 	def _set_defaults_from_session_plan(self):
 		if not self.session_plan:
 			return
@@ -36,6 +45,7 @@ class Evaluation(Document):
 		if not self.instructor and session_plan.current_instructor:
 			self.instructor = session_plan.current_instructor
 
+	@profile_step
 	def _ensure_session_plan_approved(self):
 		if not self.session_plan:
 			return
@@ -43,11 +53,13 @@ class Evaluation(Document):
 		if status != "Approved":
 			frappe.throw("Evaluations can only be created for approved session plans.")
 
+	@profile_step
 	def _ensure_editable(self):
 		previous = self._get_previous_status()
 		if previous == "Published" and not user_has_role("Coach Education Head"):
 			frappe.throw("Published evaluations are read-only.")
 
+	@profile_step
 	def _validate_scores(self):
 		for row in self.scores or []:
 			max_score = flt(row.max_score) if row.max_score is not None else 0
@@ -59,6 +71,7 @@ class Evaluation(Document):
 					f"Score {score} exceeds max {max_score} for {row.criterion_title}."
 				)
 
+	@profile_step
 	def _set_total_score(self):
 		total = 0.0
 		for row in self.scores or []:
@@ -66,19 +79,6 @@ class Evaluation(Document):
 			total += flt(row.score) * weight
 		self.total_score = total
 
-	def _notify_published(self):
-		coach_user = frappe.db.get_value("Coach Profile", self.coach, "user")
-		recipients = set(get_users_with_role("Coach Education Head"))
-		if coach_user:
-			recipients.add(coach_user)
-		if recipients:
-			notify_users(
-				list(recipients),
-				subject=f"Evaluation Published for {self.session_plan}",
-				document_type="Evaluation",
-				document_name=self.name,
-			)
-
 	def _get_previous_status(self):
 		previous = self.get_doc_before_save()
 		return previous.status if previous else None
@@ -90,3 +90,5 @@ class Evaluation(Document):
 	def on_trash(self):
 		if self.status == "Published" and not user_has_role("Coach Education Head"):
 			frappe.throw("Published evaluations cannot be deleted.")
+		if self.status == "Published":
+			self._clear_analytics_cache()
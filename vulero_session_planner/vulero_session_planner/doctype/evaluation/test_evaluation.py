@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from frappe.tests import UnitTestCase
+
+from vulero_session_planner import analytics
+
+SCORE_ROWS = [
+	("EVAL-1", "Organisation", 8, 10, 2),
+	("EVAL-1", "Coaching", 15, 20, 1),
+	("EVAL-1", "Reflection", 3, 0, 1),
+	("EVAL-2", "Organisation", 6, 10, None),
+	("EVAL-2", "Coaching", None, 20, 1),
+	("EVAL-3", "Organisation", 10, 10, 2),
+	("EVAL-3", "Coaching", 19, 20, 1.5),
+	("EVAL-3", None, 4, 5, 1),
+]
+
+
+class UnitTestEvaluationAnalytics(UnitTestCase):
+	def test_python_analytics(self):
+		with patch.object(analytics, "np", None):
+			result = analytics.compute_analytics(SCORE_ROWS)
+
+		self.assertEqual(result["engine"], "python")
+		self.assertEqual(result["evaluations"], 3)
+		self.assertEqual(
+			[criterion["criterion"] for criterion in result["criteria"]],
+			["Organisation", "Coaching", "Reflection", ""],
+		)
+
+		organisation = result["criteria"][0]
+		self.assertEqual(organisation["max_score"], 10.0)
+		self.assertEqual(organisation["score"]["count"], 3)
+		self.assertEqual(organisation["score"]["median"], 8.0)
+		self.assertEqual(organisation["percent"]["max"], 100.0)
+
+		# A zero max_score counts towards the raw scores but not the percentages.
+		reflection = result["criteria"][2]
+		self.assertEqual(reflection["score"]["count"], 1)
+		self.assertEqual(reflection["percent"], analytics._empty_summary())
+
+		# A missing weight counts as 1 and a missing score as 0.
+		self.assertEqual(result["weighted_totals"]["min"], 6.0)
+		self.assertEqual(result["weighted_totals"]["max"], 52.5)
+		self.assertEqual(result["normalized_totals"]["min"], 20.0)
+
+	def test_numpy_and_python_agree(self):
+		if analytics.np is None:
+			self.skipTest("numpy is not installed")
+
+		numpy_result = analytics.compute_analytics(SCORE_ROWS)
+		with patch.object(analytics, "np", None):
+			python_result = analytics.compute_analytics(SCORE_ROWS)
+
+		self.assertEqual(numpy_result["engine"], "numpy")
+		for key in ("evaluations", "criteria", "weighted_totals", "normalized_totals"):
+			self.assertEqual(numpy_result[key], python_result[key], key)
+
+	def test_no_rows(self):
+		result = analytics.compute_analytics([])
+		self.assertEqual(result["evaluations"], 0)
+		self.assertEqual(result["criteria"], [])
+		self.assertEqual(result["weighted_totals"], analytics._empty_summary())
+		self.assertEqual(result["normalized_totals"], analytics._empty_summary())
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now
+
+ACCESS_FIELDS = ("name", "creation", "modified", "owner", "modified_by", "instructor", "cohort", "coach")
+
+
+class InstructorCoachAccess(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Instructor Coach Access", ["instructor", "cohort", "coach"])
+	frappe.db.add_index("Instructor Coach Access", ["cohort"])
+	frappe.db.add_index("Instructor Coach Access", ["coach"])
+
+
+def sync_access_for_assignment(instructor, cohort, exclude_assignment=None):
+	if not instructor or not cohort:
+		return
+
+	frappe.db.delete("Instructor Coach Access", {"instructor": instructor, "cohort": cohort})
+
+	filters = {"instructor": instructor, "cohort": cohort, "status": "Active"}
+	if exclude_assignment:
+		filters["name"] = ["!=", exclude_assignment]
+	if frappe.db.exists("Assignment", filters):
+		_insert_access_for_pairs([(instructor, cohort)])
+
+
+def sync_access_for_coach(coach, cohort=None):
+	if not coach:
+		return
+
+	frappe.db.delete("Instructor Coach Access", {"coach": coach})
+	if not cohort:
+		return
+
+	instructors = frappe.get_all(
+		"Assignment",
+		filters={"cohort": cohort, "status": "Active"},
+		pluck="instructor",
+		distinct=True,
+		limit=0,
+	)
+	_insert_access_rows([(instructor, cohort, coach) for instructor in instructors if instructor])
+
+
+def rebuild_instructor_coach_access():
+	frappe.db.delete("Instructor Coach Access")
+
+	assignments = frappe.get_all(
+		"Assignment",
+		filters={"status": "Active"},
+		fields=["instructor", "cohort"],
+		distinct=True,
+		limit=0,
+	)
+	pairs = [(row.instructor, row.cohort) for row in assignments if row.instructor and row.cohort]
+	return _insert_access_for_pairs(pairs)
+
+
+def _insert_access_for_pairs(pairs):
+	if not pairs:
+		return 0
+
+	coaches_by_cohort = defaultdict(list)
+	coaches = frappe.get_all(
+		"Coach Profile",
+		filters={"cohort": ["in", list({cohort for _, cohort in pairs})]},
+		fields=["name", "cohort"],
+		limit=0,
+	)
+	for coach in coaches:
+		coaches_by_cohort[coach.cohort].append(coach.name)
+
+	rows = []
+	for instructor, cohort in pairs:
+		# The coach-less row keeps cohort-level access even when a cohort has no coaches yet.
+		rows.append((instructor, cohort, None))
+		rows.extend((instructor, cohort, coach) for coach in coaches_by_cohort[cohort])
+
+	return _insert_access_rows(rows)
+
+
+def _insert_access_rows(rows):
+	if not rows:
+		return 0
+
+	timestamp = now()
+	user = frappe.session.user
+	values = [(frappe.generate_hash(length=12), timestamp, timestamp, user, user, *row) for row in rows]
+	frappe.db.bulk_insert("Instructor Coach Access", fields=ACCESS_FIELDS, values=values)
+	return len(values)
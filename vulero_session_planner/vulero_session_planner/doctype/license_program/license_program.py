@@ -1,6 +1,14 @@
-import frappe
 from frappe.model.document import Document
 
+from vulero_session_planner.program_rules import clear_program_rules_cache
+
 
 class LicenseProgram(Document):
-	pass
+	def on_update(self):
+		clear_program_rules_cache()
+
+	def after_rename(self, old, new, merge=False):
+		clear_program_rules_cache()
+
+	def after_delete(self):
+		clear_program_rules_cache()
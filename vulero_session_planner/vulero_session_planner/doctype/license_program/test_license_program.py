@@ -0,0 +1,50 @@
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from vulero_session_planner.program_rules import (
+	PROGRAM_RULES_CACHE_KEY,
+	clear_program_rules_cache,
+	get_program_rules,
+	get_program_rules_registry,
+)
+
+EXTRA_TEST_RECORD_DEPENDENCIES = []
+IGNORE_TEST_RECORD_DEPENDENCIES = []
+
+
+def make_license_program(program_name="CAF C", **values):
+	if frappe.db.exists("License Program", program_name):
+		return frappe.get_doc("License Program", program_name)
+	return frappe.get_doc(
+		{"doctype": "License Program", "program_name": program_name, "program_type": "Standard", **values}
+	).insert()
+
+
+class IntegrationTestLicenseProgram(IntegrationTestCase):
+	def test_rules_follow_the_program_name(self):
+		program = make_license_program(default_expiry_days=365)
+		clear_program_rules_cache()
+
+		rules = get_program_rules(program.name)
+		self.assertEqual(rules["duration_limit"], 90)
+		self.assertEqual(rules["target_groups"], ["U17", "U14"])
+		self.assertIsNone(get_program_rules(None))
+
+	def test_clear_drops_a_stale_registry(self):
+		program = make_license_program()
+		frappe.cache.set_value(PROGRAM_RULES_CACHE_KEY, {})
+		self.assertIsNone(get_program_rules(program.name))
+
+		clear_program_rules_cache()
+		self.assertIsNone(frappe.cache.get_value(PROGRAM_RULES_CACHE_KEY))
+		self.assertIn(program.name, get_program_rules_registry())
+
+	def test_saving_a_program_clears_the_registry(self):
+		program = make_license_program()
+		get_program_rules_registry()
+
+		program.default_expiry_days = 730
+		program.save()
+
+		self.assertIsNone(frappe.cache.get_value(PROGRAM_RULES_CACHE_KEY))
+		self.assertEqual(get_program_rules(program.name)["default_expiry_days"], 730)
@@ -7,6 +7,17 @@ frappe.ui.form.on("Session Plan", {
 		if (frm.is_new()) {
 			return;
 		}
+		frm.add_custom_button("Download PDF", () => {
+			const params = new URLSearchParams({ name: frm.doc.name, export_format: "pdf" });
+			window.open(
+				`/api/method/vulero_session_planner.api.export.download_session_plan?${params}`
+			);
+		});
+
+		if (frm.doc.revised_from) {
+			frm.add_custom_button("Compare with Previous Version", () => show_revision_diff(frm));
+		}
+
 		const canRevise =
 			frm.doc.status === "Approved" &&
 			(frappe.user.has_role("Coach") || frappe.user.has_role("Coach Education Head"));
@@ -75,77 +86,91 @@ frappe.ui.form.on("Session Plan Block", {
 			frappe.model.set_value(cdt, cdn, "diagram_preview", "");
 			return;
 		}
-		frappe.db.get_value("Diagram", row.diagram, "preview_image").then((r) => {
-			const preview = r && r.message ? r.message.preview_image : "";
-			frappe.model.set_value(cdt, cdn, "diagram_preview", preview || "");
+		get_block_diagram_previews({ diagrams: [row.diagram] }).then((previews) => {
+			frappe.model.set_value(cdt, cdn, "diagram_preview", previews[row.diagram] || "");
 		});
 	},
 });
 
 function refresh_block_diagram_previews(frm) {
-	const rows = frm.doc.blocks || [];
-	rows.forEach((row) => {
-		if (row.diagram && !row.diagram_preview) {
-			frappe.db.get_value("Diagram", row.diagram, "preview_image").then((r) => {
-				const preview = r && r.message ? r.message.preview_image : "";
-				if (preview) {
-					frappe.model.set_value(row.doctype, row.name, "diagram_preview", preview);
-				}
-			});
-		}
-	});
-}
-
-function set_target_group_options(frm) {
-	const program = frm.doc.license_program;
-	if (!program) {
-		frm.set_df_property("target_group", "options", "");
-		frm.set_value("target_group", "");
+	const rows = (frm.doc.blocks || []).filter((row) => row.diagram && !row.diagram_preview);
+	if (!rows.length) {
 		return;
 	}
-
-	// License Program name is the docname; use it directly for matching
-	apply_target_group_options(frm, program);
-
-	// If it doesn't match, try the program_name field
-	if (!is_known_program(program)) {
-		frappe.db.get_value("License Program", program, "program_name").then((r) => {
-			if (r && r.message && r.message.program_name) {
-				apply_target_group_options(frm, r.message.program_name);
+	const args = frm.is_new()
+		? { diagrams: [...new Set(rows.map((row) => row.diagram))] }
+		: { session_plan: frm.doc.name };
+	get_block_diagram_previews(args).then((previews) => {
+		rows.forEach((row) => {
+			const preview = previews[row.diagram];
+			if (preview) {
+				frappe.model.set_value(row.doctype, row.name, "diagram_preview", preview);
 			}
 		});
-	}
+	});
 }
 
-function is_known_program(value) {
-	const key = normalize_program(value);
-	return (
-		key === "CAF D" ||
-		key === "CAF C" ||
-		key === "CAF B" ||
-		key === "CAF A" ||
-		key === "CAF PRO"
-	);
+function get_block_diagram_previews(args) {
+	return frappe
+		.call({
+			method:
+				"vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan.get_block_diagram_previews",
+			args,
+		})
+		.then((r) => (r && r.message) || {});
 }
 
-function normalize_program(value) {
-	return (value || "").toUpperCase().replace(/\s+/g, " ").trim();
+function show_revision_diff(frm) {
+	frappe.call({
+		method: "vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan.get_revision_diff",
+		args: {
+			session_plan: frm.doc.name,
+		},
+		callback: (r) => {
+			if (!r.message) {
+				return;
+			}
+			const diff = r.message;
+			const value = (v) => frappe.utils.escape_html(v === null || v === undefined ? "" : String(v));
+			const rows = diff.fields.map(
+				(change) =>
+					`<tr><td>${value(change.label)}</td><td>${value(change.from)}</td><td>${value(change.to)}</td></tr>`
+			);
+			diff.blocks.forEach((block) => {
+				if (block.change !== "modified") {
+					rows.push(`<tr><td>Block ${block.sequence}</td><td colspan="2">${block.change}</td></tr>`);
+					return;
+				}
+				Object.entries(block.fields).forEach(([fieldname, change]) => {
+					rows.push(
+						`<tr><td>Block ${block.sequence}: ${value(fieldname)}</td><td>${value(change.from)}</td><td>${value(change.to)}</td></tr>`
+					);
+				});
+			});
+
+			const body = rows.length
+				? `<table class="table table-bordered"><thead><tr><th></th><th>Version ${value(diff.from.version_no)}</th><th>Version ${value(diff.to.version_no)}</th></tr></thead><tbody>${rows.join("")}</tbody></table>`
+				: "No changes.";
+			frappe.msgprint({ title: `Changes since ${diff.from.name}`, message: body, wide: true });
+		},
+	});
 }
 
-function apply_target_group_options(frm, programValue) {
-	const key = normalize_program(programValue);
-	let options = [];
+function get_program_rules(program) {
+	// Shipped with boot by program_rules.extend_bootinfo; reload to pick up License Program changes
+	return (program && (frappe.boot.vulero_program_rules || {})[program]) || null;
+}
 
-	if (key === "CAF D") {
-		options = ["U12", "U9"];
-	} else if (key === "CAF C") {
-		options = ["U17", "U14"];
-	} else if (key === "CAF B") {
-		options = ["Second Division Club", "U20", "U17"];
-	} else if (key === "CAF A" || key === "CAF PRO") {
-		options = ["Senior Team"];
+function set_target_group_options(frm) {
+	const program = frm.doc.license_program;
+	if (!program) {
+		frm.set_df_property("target_group", "options", "");
+		frm.set_value("target_group", "");
+		return;
 	}
 
+	const rules = get_program_rules(program);
+	const options = (rules && rules.target_groups) || [];
 	frm.set_df_property("target_group", "options", options.join("\n"));
 	if (options.length && !options.includes(frm.doc.target_group)) {
 		frm.set_value("target_group", "");
@@ -153,43 +178,15 @@ function apply_target_group_options(frm, programValue) {
 	frm.refresh_field("target_group");
 }
 
-function get_duration_limit(programValue) {
-	const key = normalize_program(programValue);
-	if (key === "CAF D") {
-		return 60;
-	}
-	if (key === "CAF C" || key === "CAF B" || key === "CAF A" || key === "CAF PRO") {
-		return 90;
-	}
-	return null;
-}
-
 function validate_duration_limit(frm) {
 	const duration = frm.doc.duration_minutes;
-	if (!duration) {
+	const rules = get_program_rules(frm.doc.license_program);
+	if (!duration || !rules || !rules.duration_limit) {
 		return;
 	}
-	const program = frm.doc.license_program;
-	if (!program) {
-		return;
-	}
-
-	let limit = get_duration_limit(program);
-	if (!limit && !is_known_program(program)) {
-		frappe.db.get_value("License Program", program, "program_name").then((r) => {
-			if (r && r.message && r.message.program_name) {
-				const resolvedLimit = get_duration_limit(r.message.program_name);
-				if (resolvedLimit && duration > resolvedLimit) {
-					frappe.msgprint(
-						`Duration cannot exceed ${resolvedLimit} minutes for ${r.message.program_name}.`
-					);
-				}
-			}
-		});
-		return;
-	}
-
-	if (limit && duration > limit) {
-		frappe.msgprint(`Duration cannot exceed ${limit} minutes for ${program}.`);
+	if (duration > rules.duration_limit) {
+		frappe.msgprint(
+			`Duration cannot exceed ${rules.duration_limit} minutes for ${rules.program_name}.`
+		);
 	}
 }
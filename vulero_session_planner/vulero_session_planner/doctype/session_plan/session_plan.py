@@ -1,21 +1,37 @@
+import json
+
 import frappe
+from frappe.model import no_value_fields
 from frappe.model.document import Document
 from frappe.utils import flt
 
+from vulero_session_planner.diagram_links import sync_plan_diagram_links
+from vulero_session_planner.notifications import enqueue_document_notification
+from vulero_session_planner.permissions import check_permissions
+from vulero_session_planner.profiling import profile_step, step_profile
+from vulero_session_planner.program_rules import get_program_rules
+from vulero_session_planner.session_plan_export import clear_export_cache
 from vulero_session_planner.utils import (
 	ensure_user_not_expired,
 	get_coach_profile_for_user,
 	get_instructor_profile_for_user,
-	get_instructor_users_for_coach,
-	get_users_with_role,
-	notify_users,
 	user_has_role,
 )
 
+BLOCK_PREVIEWS_CACHE_KEY = "vulero_session_planner:block_diagram_previews"
+# Long text fields recorded in `revision_delta` when a revision leaves them as in `revised_from`.
+# Revisions are always stored in full; the delta only describes them.
+REVISION_FIELDS = ("objectives", "performance_focus", "coaching_point", "equipment", "drills", "sequence")
+DIFF_IGNORED_FIELDS = frozenset(
+	{"status", "locked", "approved_version", "version_no", "revised_from", "revision_delta"}
+)
+
 
 class SessionPlan(Document):
+	@profile_step
 	def validate(self):
-		ensure_user_not_expired()
+		with step_profile(self.doctype, "ensure_user_not_expired"):
+			ensure_user_not_expired()
 		self._set_defaults_from_coach()
 		self._ensure_editable_for_state()
 		self._ensure_blocks_for_state()
@@ -23,17 +39,25 @@ class SessionPlan(Document):
 		self._validate_time_totals()
 		self._set_current_instructor_on_submit()
 		self._apply_approval_lock()
+		self._set_revision_lineage()
+
+	def before_save(self):
+		self._set_revision_delta()
+		self.sync_modified = self.modified
 
 	def on_update(self):
 		self._log_status_change()
-		if self._status_changed_to("Submitted"):
-			self._notify_submitted()
-		elif self._status_changed_to("Changes Requested"):
-			self._notify_changes_requested()
-		elif self._status_changed_to("Approved"):
-			self._notify_approved()
+		for status in ("Submitted", "Changes Requested", "Approved"):
+			if self._status_changed_to(status):
+				enqueue_document_notification(self, status)
+				break
 		self._sync_diagram_links()
+		clear_export_cache([self.name])
 
+	def on_trash(self):
+		clear_export_cache([self.name])
+
+	@profile_step
 	def _set_defaults_from_coach(self):
 		if not self.coach:
 			return
@@ -44,6 +68,7 @@ class SessionPlan(Document):
 			if not self.cohort and coach.cohort:
 				self.cohort = coach.cohort
 
+	@profile_step
 	def _ensure_editable_for_state(self):
 		previous = self._get_previous_status()
 		if self.locked and not self._allow_locked_transition(previous):
@@ -69,10 +94,12 @@ class SessionPlan(Document):
 			return True
 		return False
 
+	@profile_step
 	def _ensure_blocks_for_state(self):
 		if self.status in {"Submitted", "Approved"} and not self.blocks:
 			frappe.throw("Session Plan must have at least one block before submission.")
 
+	@profile_step
 	def _validate_time_totals(self):
 		if not self.duration_minutes or not self.blocks:
 			return
@@ -93,33 +120,13 @@ class SessionPlan(Document):
 				indicator="orange",
 			)
 
-	def _normalize_program(self, value):
-		return (value or "").upper().strip().replace("  ", " ")
-
 	def _get_duration_limit(self):
-		if not self.license_program:
+		rules = get_program_rules(self.license_program)
+		if not rules or not rules["duration_limit"]:
 			return None, None
+		return rules["duration_limit"], rules["program_name"]
 
-		def resolve_limit(program_name):
-			key = self._normalize_program(program_name)
-			if key == "CAF D":
-				return 60
-			if key in {"CAF C", "CAF B", "CAF A", "CAF PRO"}:
-				return 90
-			return None
-
-		limit = resolve_limit(self.license_program)
-		if limit:
-			return limit, self.license_program
-
-		program_name = frappe.db.get_value("License Program", self.license_program, "program_name")
-		if program_name:
-			limit = resolve_limit(program_name)
-			if limit:
-				return limit, program_name
-
-		return None, None
-
+	@profile_step
 	def _validate_duration_limit(self):
 		if not self.duration_minutes:
 			return
@@ -128,6 +135,7 @@ class SessionPlan(Document):
 			label = program_name or self.license_program or "the selected program"
 			frappe.throw(f"Duration cannot exceed {limit} minutes for {label}.")
 
+	@profile_step
 	def _set_current_instructor_on_submit(self):
 		if self.current_instructor:
 			return
@@ -152,6 +160,7 @@ class SessionPlan(Document):
 		if assignment:
 			self.current_instructor = assignment[0].instructor
 
+	@profile_step
 	def _apply_approval_lock(self):
 		if not self._status_changed_to("Approved"):
 			return
@@ -159,56 +168,46 @@ class SessionPlan(Document):
 		self.locked = 1
 		self.approved_version = self.version_no or 1
 
-	def _notify_submitted(self):
-		coach_user = self._get_coach_user()
-		instructor_users = get_instructor_users_for_coach(self.coach, self.cohort)
-		recipients = set(instructor_users + get_users_with_role("Coach Education Head"))
-		if coach_user:
-			recipients.discard(coach_user)
-		if recipients:
-			notify_users(
-				list(recipients),
-				subject=f"Session Plan Submitted: {self.title}",
-				document_type="Session Plan",
-				document_name=self.name,
-			)
-
-	def _notify_changes_requested(self):
-		coach_user = self._get_coach_user()
-		if coach_user:
-			notify_users(
-				[coach_user],
-				subject=f"Changes Requested: {self.title}",
-				document_type="Session Plan",
-				document_name=self.name,
-			)
+	@profile_step
+	def _set_revision_lineage(self):
+		if self.revision_root:
+			return
+		if not self.revised_from:
+			self.revision_root = self.name
+			self.revision_depth = 0
+			return
 
-	def _notify_approved(self):
-		recipients = set(get_users_with_role("Coach Education Head"))
-		coach_user = self._get_coach_user()
-		if coach_user:
-			recipients.add(coach_user)
-		if recipients:
-			notify_users(
-				list(recipients),
-				subject=f"Session Plan Approved: {self.title}",
-				document_type="Session Plan",
-				document_name=self.name,
-			)
+		base = frappe.db.get_value(
+			"Session Plan", self.revised_from, ["revision_root", "revision_depth"], as_dict=True
+		)
+		self.revision_root = (base and base.revision_root) or self.revised_from
+		self.revision_depth = ((base and base.revision_depth) or 0) + 1
 
 	def _sync_diagram_links(self):
-		for block in self.blocks or []:
-			if not block.diagram:
-				continue
-			frappe.db.set_value(
-				"Diagram",
-				block.diagram,
-				{
-					"linked_session_plan": self.name,
-					"linked_block_sequence": block.sequence or block.idx,
-				},
-				update_modified=False,
-			)
+		sync_plan_diagram_links(self)
+
+	def _set_revision_delta(self):
+		# Records which long fields and blocks are unchanged from the base plan, each block with the
+		# base row it matches. The revision itself is saved in full like any other plan.
+		if not self.revised_from:
+			self.revision_delta = None
+			return
+
+		base = frappe.get_cached_doc("Session Plan", self.revised_from)
+		inherited_fields = [f for f in REVISION_FIELDS if (self.get(f) or "") == (base.get(f) or "")]
+
+		available = {}
+		for row in base.blocks:
+			available.setdefault(_get_block_key(row), []).append(row.name)
+
+		layout = []
+		for row in self.blocks:
+			matches = available.get(_get_block_key(row))
+			layout.append({"name": row.name, "inherit": matches.pop(0)} if matches else {"name": row.name})
+
+		self.revision_delta = json.dumps(
+			{"fields": inherited_fields, "blocks": layout}, separators=(",", ":")
+		)
 
 	def _log_status_change(self):
 		previous = self._get_previous_status()
@@ -233,11 +232,6 @@ class SessionPlan(Document):
 		previous = self._get_previous_status()
 		return previous != status and self.status == status
 
-	def _get_coach_user(self):
-		if not self.coach:
-			return None
-		return frappe.db.get_value("Coach Profile", self.coach, "user")
-
 
 @frappe.whitelist()
 def create_revision(session_plan_name):
@@ -253,6 +247,8 @@ def create_revision(session_plan_name):
 	new_plan.status = "Draft"
 	new_plan.locked = 0
 	new_plan.revised_from = plan.name
+	new_plan.revision_root = plan.revision_root or plan.name
+	new_plan.revision_depth = (plan.revision_depth or 0) + 1
 	new_plan.version_no = (plan.version_no or 1) + 1
 	new_plan.approved_version = plan.approved_version
 	new_plan.insert(ignore_permissions=True)
@@ -260,6 +256,120 @@ def create_revision(session_plan_name):
 	return new_plan.name
 
 
+@frappe.whitelist()
+def get_revision_diff(session_plan, compare_to=None):
+	"""Return the changes from `compare_to` (default: the plan it was revised from) to `session_plan`."""
+	plan = frappe.get_doc("Session Plan", session_plan)
+	plan.check_permission("read")
+	compare_to = compare_to or plan.revised_from
+	if not compare_to:
+		frappe.throw("This session plan has no earlier version to compare with.")
+	other = frappe.get_doc("Session Plan", compare_to)
+	other.check_permission("read")
+
+	fields = []
+	for df in plan.meta.fields:
+		if df.fieldtype in no_value_fields or df.fieldname in DIFF_IGNORED_FIELDS:
+			continue
+		before, after = other.get(df.fieldname), plan.get(df.fieldname)
+		if (before or "") != (after or ""):
+			fields.append({"fieldname": df.fieldname, "label": df.label, "from": before, "to": after})
+
+	return {
+		"from": {"name": other.name, "version_no": other.version_no},
+		"to": {"name": plan.name, "version_no": plan.version_no},
+		"fields": fields,
+		"blocks": _diff_blocks(other.blocks, plan.blocks),
+	}
+
+
+@frappe.whitelist()
+def get_revision_history(name):
+	"""Return every version in the lineage of `name` the user can read, oldest first."""
+	frappe.has_permission("Session Plan", "read", name, throw=True)
+	versions = frappe.db.sql(
+		"""
+		select name, title, status, version_no, approved_version, revised_from, revision_depth, modified
+		from `tabSession Plan`
+		where revision_root = (select revision_root from `tabSession Plan` where name = %(name)s)
+		order by revision_depth asc, version_no asc, creation asc
+		""",
+		{"name": name},
+		as_dict=True,
+	)
+	permitted = check_permissions("Session Plan", [row.name for row in versions]) if versions else {}
+	versions = [row for row in versions if permitted.get(row.name)]
+
+	approved = [row for row in versions if row.status == "Approved"]
+	return {
+		"versions": versions,
+		"latest_approved": max(approved, key=lambda row: (row.version_no or 0, row.revision_depth))["name"]
+		if approved
+		else None,
+	}
+
+
+@frappe.whitelist()
+def get_block_diagram_previews(session_plan=None, diagrams=None):
+	"""Return {diagram: preview_image} for every block diagram of `session_plan`, or for `diagrams`."""
+	if session_plan:
+		frappe.has_permission("Session Plan", "read", session_plan, throw=True)
+		return _get_plan_block_previews(session_plan)
+
+	diagrams = frappe.parse_json(diagrams) if isinstance(diagrams, str) else diagrams
+	if not diagrams:
+		return {}
+
+	allowed = [name for name, permitted in check_permissions("Diagram", diagrams).items() if permitted]
+	if not allowed:
+		return {}
+	return dict(
+		frappe.get_all(
+			"Diagram",
+			filters={"name": ["in", allowed]},
+			fields=["name", "preview_image"],
+			as_list=True,
+		)
+	)
+
+
+def clear_block_preview_cache(session_plans):
+	"""Drop cached block previews of `session_plans`."""
+	session_plans = [name for name in session_plans if name]
+	if not session_plans:
+		return
+
+	def clear():
+		frappe.cache.hdel(BLOCK_PREVIEWS_CACHE_KEY, session_plans)
+
+	clear()
+	# Clear again once committed so a concurrent read cannot re-cache the old previews.
+	frappe.db.after_commit.add(clear)
+
+
+def _get_plan_block_previews(session_plan):
+	# Cached per plan version; writes that do not touch modified (preview renders, diagram links,
+	# Diagram deletion) clear the entry.
+	modified = str(frappe.db.get_value("Session Plan", session_plan, "modified"))
+	cached = frappe.cache.hget(BLOCK_PREVIEWS_CACHE_KEY, session_plan)
+	if cached and cached.get("modified") == modified:
+		return cached["previews"]
+
+	previews = dict(
+		frappe.db.sql(
+			"""
+			select block.diagram, diagram.preview_image
+			from `tabSession Plan Block` block
+			inner join `tabDiagram` diagram on diagram.name = block.diagram
+			where block.parent = %(session_plan)s and block.parenttype = 'Session Plan'
+			""",
+			{"session_plan": session_plan},
+		)
+	)
+	frappe.cache.hset(BLOCK_PREVIEWS_CACHE_KEY, session_plan, {"modified": modified, "previews": previews})
+	return previews
+
+
 @frappe.whitelist()
 def get_evaluation_defaults(session_plan_name):
 	plan = frappe.get_doc("Session Plan", session_plan_name)
@@ -305,6 +415,72 @@ def get_evaluation_defaults(session_plan_name):
 	return {"defaults": defaults}
 
 
+def _diff_blocks(old_blocks, new_blocks):
+	old = {row.sequence or row.idx: row for row in old_blocks}
+	new = {row.sequence or row.idx: row for row in new_blocks}
+	fields = [f for f in _get_block_fields() if f not in {"sequence", "diagram_preview"}]
+	changes = []
+	for sequence in sorted(old.keys() | new.keys()):
+		before, after = old.get(sequence), new.get(sequence)
+		if before is None or after is None:
+			changes.append(
+				{
+					"sequence": sequence,
+					"change": "added" if before is None else "removed",
+					"block": _get_block_values(after or before),
+				}
+			)
+			continue
+		changed = {
+			f: {"from": before.get(f), "to": after.get(f)}
+			for f in fields
+			if (before.get(f) or "") != (after.get(f) or "")
+		}
+		if changed:
+			changes.append({"sequence": sequence, "change": "modified", "fields": changed})
+	return changes
+
+
+def get_session_plan_records(names):
+	"""Return {name: record} for Session Plans with their `blocks`, read in one query each."""
+	names = list(dict.fromkeys(name for name in names or [] if name))
+	if not names:
+		return {}
+
+	records = {
+		row.name: row
+		for row in frappe.get_all("Session Plan", filters={"name": ["in", names]}, fields=["*"], limit=0)
+	}
+	for record in records.values():
+		record.blocks = []
+	for row in frappe.get_all(
+		"Session Plan Block",
+		filters={"parenttype": "Session Plan", "parentfield": "blocks", "parent": ["in", list(records)]},
+		fields=["*"],
+		order_by="parent asc, idx asc",
+		limit=0,
+	):
+		records[row.parent].blocks.append(row)
+	return records
+
+
+def _get_block_fields():
+	return [
+		df.fieldname
+		for df in frappe.get_meta("Session Plan Block").fields
+		if df.fieldtype not in no_value_fields
+	]
+
+
+def _get_block_values(row):
+	return {fieldname: row.get(fieldname) for fieldname in _get_block_fields()}
+
+
+def _get_block_key(row):
+	# The preview follows the diagram; empty values compare equal whatever their type.
+	return tuple(str(row.get(f) or "") for f in _get_block_fields() if f != "diagram_preview")
+
+
 def _is_current_user_coach(coach_profile):
 	if not coach_profile:
 		return False
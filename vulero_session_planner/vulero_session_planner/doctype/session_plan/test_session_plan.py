@@ -0,0 +1,178 @@
+import json
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from vulero_session_planner.patches.v1_1 import store_session_plan_revisions_in_full
+from vulero_session_planner.patches.v1_1.set_session_plan_revision_lineage import _get_lineage
+from vulero_session_planner.permissions import check_permissions
+from vulero_session_planner.utils import clear_user_scope
+from vulero_session_planner.vulero_session_planner.doctype.session_plan.session_plan import (
+	create_revision,
+	get_revision_diff,
+	get_revision_history,
+)
+
+EXTRA_TEST_RECORD_DEPENDENCIES = []
+IGNORE_TEST_RECORD_DEPENDENCIES = ["Coach Profile", "Cohort", "License Program", "Diagram"]
+
+TEST_COACH_USER = "test-session-plan-coach@example.com"
+OTHER_COACH_USER = "test-session-plan-other-coach@example.com"
+
+
+def make_coach(user=TEST_COACH_USER):
+	if not frappe.db.exists("User", user):
+		frappe.get_doc(
+			{
+				"doctype": "User",
+				"email": user,
+				"first_name": "Test Coach",
+				"send_welcome_email": 0,
+				"roles": [{"role": "Coach"}],
+			}
+		).insert(ignore_permissions=True)
+	if not frappe.db.exists("Coach Profile", user):
+		frappe.get_doc({"doctype": "Coach Profile", "user": user, "full_name": "Test Coach"}).insert(
+			ignore_permissions=True
+		)
+	clear_user_scope(user)
+	return user
+
+
+def make_approved_plan(**values):
+	plan = frappe.get_doc(
+		{
+			"doctype": "Session Plan",
+			"title": "Pressing in the middle third",
+			"coach": make_coach(),
+			"objectives": "Win the ball back within six seconds.",
+			"drills": "Rondo 5v2",
+			"blocks": [
+				{"sequence": 1, "phase": "Warming up", "learning_activities": "Passing square"},
+				{"sequence": 2, "phase": "Main part", "learning_activities": "6v4 pressing game"},
+			],
+			**values,
+		}
+	).insert()
+	plan.status = "Approved"
+	plan.save()
+	return plan
+
+
+class IntegrationTestSessionPlan(IntegrationTestCase):
+	def test_revision_is_stored_in_full(self):
+		base = make_approved_plan()
+		revision = frappe.get_doc("Session Plan", create_revision(base.name))
+
+		self.assertEqual(revision.revised_from, base.name)
+		self.assertEqual(frappe.db.get_value("Session Plan", revision.name, "objectives"), base.objectives)
+		self.assertEqual(
+			frappe.db.count("Session Plan Block", {"parent": revision.name, "parenttype": "Session Plan"}), 2
+		)
+
+		delta = json.loads(revision.revision_delta)
+		self.assertIn("objectives", delta["fields"])
+		self.assertTrue(all(entry.get("inherit") for entry in delta["blocks"]))
+
+	def test_edited_revision_records_its_changes(self):
+		base = make_approved_plan()
+		revision = frappe.get_doc("Session Plan", create_revision(base.name))
+		revision.drills = "Rondo 6v3"
+		revision.blocks[1].learning_activities = "7v5 pressing game"
+		revision.save()
+
+		delta = json.loads(frappe.db.get_value("Session Plan", revision.name, "revision_delta"))
+		self.assertNotIn("drills", delta["fields"])
+		self.assertIn("objectives", delta["fields"])
+		self.assertEqual([bool(entry.get("inherit")) for entry in delta["blocks"]], [True, False])
+		self.assertEqual(frappe.db.get_value("Session Plan", revision.name, "drills"), "Rondo 6v3")
+
+		diff = get_revision_diff(revision.name)
+		self.assertEqual([field["fieldname"] for field in diff["fields"]], ["drills"])
+		self.assertEqual(len(diff["blocks"]), 1)
+		self.assertEqual(diff["blocks"][0]["sequence"], 2)
+		self.assertEqual(diff["blocks"][0]["change"], "modified")
+		self.assertEqual(
+			diff["blocks"][0]["fields"]["learning_activities"],
+			{"from": "6v4 pressing game", "to": "7v5 pressing game"},
+		)
+
+	def test_revision_does_not_follow_later_base_changes(self):
+		base = make_approved_plan()
+		revision = create_revision(base.name)
+		frappe.db.set_value("Session Plan", base.name, "objectives", "Defend the box.")
+		frappe.clear_document_cache("Session Plan", base.name)
+
+		self.assertEqual(
+			frappe.get_doc("Session Plan", revision).objectives, "Win the ball back within six seconds."
+		)
+
+	def test_patch_restores_revisions_stored_as_deltas(self):
+		base = make_approved_plan()
+		revision = frappe.get_doc("Session Plan", create_revision(base.name))
+		inherited = revision.blocks[0].name
+		# The layout the previous delta storage left behind: inherited content missing from the rows.
+		frappe.db.set_value("Session Plan", revision.name, "objectives", None, update_modified=False)
+		frappe.db.delete("Session Plan Block", inherited)
+
+		store_session_plan_revisions_in_full.execute()
+
+		restored = frappe.get_doc("Session Plan", revision.name)
+		self.assertEqual(restored.objectives, base.objectives)
+		self.assertEqual([row.name for row in restored.blocks], [row.name for row in revision.blocks])
+		self.assertEqual(restored.blocks[0].learning_activities, "Passing square")
+
+	def test_revision_diff_defaults_to_the_base(self):
+		base = make_approved_plan()
+		revision = frappe.get_doc("Session Plan", create_revision(base.name))
+		revision.objectives = "Win the ball back within five seconds."
+		revision.save()
+
+		diff = get_revision_diff(revision.name)
+		self.assertEqual(diff["from"]["name"], base.name)
+		self.assertEqual(diff["to"]["name"], revision.name)
+		self.assertEqual([field["fieldname"] for field in diff["fields"]], ["objectives"])
+		self.assertEqual(diff["blocks"], [])
+		self.assertRaises(frappe.ValidationError, get_revision_diff, base.name)
+
+	def test_revision_history_follows_the_lineage(self):
+		base = make_approved_plan()
+		revision = frappe.get_doc("Session Plan", create_revision(base.name))
+		revision.status = "Approved"
+		revision.save()
+		latest = create_revision(revision.name)
+
+		history = get_revision_history(latest)
+		self.assertEqual([row.name for row in history["versions"]], [base.name, revision.name, latest])
+		self.assertEqual([row.revision_depth for row in history["versions"]], [0, 1, 2])
+		self.assertEqual(history["latest_approved"], revision.name)
+		self.assertEqual(get_revision_history(base.name), history)
+
+	def test_batch_permissions_match_document_permissions(self):
+		own = make_approved_plan()
+		other = make_approved_plan(coach=make_coach(OTHER_COACH_USER))
+		names = [own.name, other.name]
+
+		for user in (TEST_COACH_USER, OTHER_COACH_USER, "Administrator"):
+			with self.set_user(user):
+				expected = {
+					name: bool(frappe.has_permission("Session Plan", "read", name, user=user))
+					for name in names
+				}
+				self.assertEqual(check_permissions("Session Plan", names, user=user), expected)
+
+		self.assertEqual(
+			check_permissions("Session Plan", names, user=TEST_COACH_USER),
+			{own.name: True, other.name: False},
+		)
+
+
+class UnitTestSessionPlanLineage(UnitTestCase):
+	def test_lineage_walks_to_the_root(self):
+		plans = {"SP-1": None, "SP-2": "SP-1", "SP-3": "SP-2"}
+		self.assertEqual(_get_lineage("SP-1", plans), ("SP-1", 0))
+		self.assertEqual(_get_lineage("SP-3", plans), ("SP-1", 2))
+
+	def test_lineage_stops_at_missing_bases_and_cycles(self):
+		self.assertEqual(_get_lineage("SP-2", {"SP-2": "SP-deleted"}), ("SP-2", 0))
+		self.assertEqual(_get_lineage("SP-1", {"SP-1": "SP-2", "SP-2": "SP-1"}), ("SP-2", 1))
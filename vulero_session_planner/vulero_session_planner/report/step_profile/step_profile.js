@@ -0,0 +1,20 @@
+frappe.query_reports["Step Profile"] = {
+	filters: [
+		{
+			fieldname: "doctype",
+			label: "DocType",
+			fieldtype: "Link",
+			options: "DocType",
+		},
+	],
+	onload(report) {
+		report.page.add_inner_button("Clear Samples", () => {
+			frappe.confirm("Clear all buffered step samples?", () => {
+				frappe.call({
+					method: "vulero_session_planner.vulero_session_planner.report.step_profile.step_profile.clear_samples",
+					callback: () => report.refresh(),
+				});
+			});
+		});
+	},
+};
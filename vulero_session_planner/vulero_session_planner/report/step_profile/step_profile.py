@@ -0,0 +1,59 @@
+import frappe
+
+from vulero_session_planner.benchmarks import summarize_timings
+from vulero_session_planner.profiling import clear_step_samples, get_step_samples
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	steps = {}
+	for sample in get_step_samples():
+		if filters.doctype and sample["doctype"] != filters.doctype:
+			continue
+		steps.setdefault((sample["doctype"], sample["step"]), []).append(sample)
+
+	data = []
+	for (doctype, step), samples in sorted(steps.items()):
+		timings = summarize_timings([sample["seconds"] for sample in samples])
+		queries = [sample["queries"] for sample in samples]
+		data.append(
+			{
+				"doctype": doctype,
+				"step": step,
+				"samples": timings["iterations"],
+				"p50_ms": timings["p50_ms"],
+				"p95_ms": timings["p95_ms"],
+				"mean_ms": timings["mean_ms"],
+				"max_ms": timings["max_ms"],
+				"mean_queries": round(sum(queries) / len(queries), 2),
+				"max_queries": max(queries),
+			}
+		)
+
+	return get_columns(), data
+
+
+@frappe.whitelist(methods=["POST"])
+def clear_samples():
+	frappe.only_for(("System Manager", "Coach Education Head"))
+	clear_step_samples()
+
+
+def get_columns():
+	return [
+		{"fieldname": "doctype", "label": "DocType", "fieldtype": "Link", "options": "DocType", "width": 150},
+		{"fieldname": "step", "label": "Step", "fieldtype": "Data", "width": 240},
+		{"fieldname": "samples", "label": "Samples", "fieldtype": "Int", "width": 90},
+		{"fieldname": "p50_ms", "label": "p50 (ms)", "fieldtype": "Float", "precision": 3, "width": 100},
+		{"fieldname": "p95_ms", "label": "p95 (ms)", "fieldtype": "Float", "precision": 3, "width": 100},
+		{"fieldname": "mean_ms", "label": "Mean (ms)", "fieldtype": "Float", "precision": 3, "width": 100},
+		{"fieldname": "max_ms", "label": "Max (ms)", "fieldtype": "Float", "precision": 3, "width": 100},
+		{
+			"fieldname": "mean_queries",
+			"label": "Mean Queries",
+			"fieldtype": "Float",
+			"precision": 2,
+			"width": 110,
+		},
+		{"fieldname": "max_queries", "label": "Max Queries", "fieldtype": "Int", "width": 100},
+	]
@@ -1,51 +1,461 @@
-const CACHE_NAME = "vulero-session-planner-pwa-v1";
+const CACHE_VERSION = "v2";
+const STATIC_CACHE = `vulero-session-planner-static-${CACHE_VERSION}`;
+const ASSET_CACHE = `vulero-session-planner-assets-${CACHE_VERSION}`;
+const DOCUMENT_CACHE = `vulero-session-planner-documents-${CACHE_VERSION}`;
+// Written by the diagram editor; keep in sync with PITCH_CACHE in public/js/diagram.js
+const PITCH_CACHE = "vulero-session-planner-pitch-v1";
+const CACHES = [STATIC_CACHE, ASSET_CACHE, DOCUMENT_CACHE, PITCH_CACHE];
 const PRECACHE_URLS = [
-  "/manifest.json",
-  "/assets/vulero_session_planner/pwa/icon-192.png",
-  "/assets/vulero_session_planner/pwa/icon-512.png",
-  "/assets/vulero_session_planner/pwa/apple-touch-icon.png"
+	"/manifest.json",
+	"/assets/vulero_session_planner/pwa/icon-192.png",
+	"/assets/vulero_session_planner/pwa/icon-512.png",
+	"/assets/vulero_session_planner/pwa/apple-touch-icon.png",
 ];
+const ASSET_CACHE_LIMIT = 200;
+const DOCUMENT_CACHE_LIMIT = 50;
+
+// Documents served stale-while-revalidate and drafts queued while offline
+const OFFLINE_DOCTYPES = ["Session Plan", "Diagram"];
+const GETDOC_PATH = "/api/method/frappe.desk.form.load.getdoc";
+const SAVEDOCS_PATH = "/api/method/frappe.desk.form.save.savedocs";
+const LOGOUT_PATHS = ["/api/method/logout", "/api/method/web_logout"];
+
+const DB_NAME = "vulero-session-planner";
+const DB_VERSION = 1;
+const DRAFT_STORE = "drafts";
+const META_STORE = "meta";
+const DRAFT_SYNC_TAG = "vulero-draft-sync";
+// Replayed drafts are dropped once saved or rejected by validation (417) or a conflict (409),
+// and on 403/404, where retrying cannot help. Other server errors are retried after a delay
+// until MAX_DRAFT_ATTEMPTS; network errors keep the draft without counting as an attempt.
+const DRAFT_SETTLED_STATUSES = [403, 404, 409, 417];
+const DRAFT_RETRY_DELAYS = [60 * 1000, 5 * 60 * 1000, 30 * 60 * 1000, 2 * 60 * 60 * 1000];
+const MAX_DRAFT_ATTEMPTS = DRAFT_RETRY_DELAYS.length + 1;
 
 self.addEventListener("install", (event) => {
-  self.skipWaiting();
-  event.waitUntil(
-    caches
-      .open(CACHE_NAME)
-      .then((cache) => cache.addAll(PRECACHE_URLS))
-      .catch(() => undefined)
-  );
+	self.skipWaiting();
+	event.waitUntil(
+		caches
+			.open(STATIC_CACHE)
+			.then((cache) => cache.addAll(PRECACHE_URLS))
+			.catch(() => undefined)
+	);
 });
 
 self.addEventListener("activate", (event) => {
-  event.waitUntil(
-    caches
-      .keys()
-      .then((keys) =>
-        Promise.all(
-          keys.map((key) => {
-            if (key !== CACHE_NAME) {
-              return caches.delete(key);
-            }
-            return undefined;
-          })
-        )
-      )
-      .then(() => self.clients.claim())
-  );
+	event.waitUntil(
+		caches
+			.keys()
+			.then((keys) =>
+				Promise.all(
+					keys.filter((key) => !CACHES.includes(key)).map((key) => caches.delete(key))
+				)
+			)
+			.then(() => self.clients.claim())
+			.then(() => replayOrRescheduleDrafts())
+	);
 });
 
 self.addEventListener("fetch", (event) => {
-  if (event.request.method !== "GET") {
-    return;
-  }
-
-  const url = new URL(event.request.url);
-  if (url.origin === self.location.origin && PRECACHE_URLS.includes(url.pathname)) {
-    event.respondWith(
-      caches.match(event.request).then((cached) => cached || fetch(event.request))
-    );
-    return;
-  }
-
-  event.respondWith(fetch(event.request));
+	const request = event.request;
+	const url = new URL(request.url);
+	if (url.origin !== self.location.origin) {
+		return;
+	}
+
+	if (LOGOUT_PATHS.includes(url.pathname) || url.searchParams.get("cmd") === "web_logout") {
+		event.waitUntil(clearUserData());
+		return;
+	}
+
+	if (request.method === "POST" && url.pathname === SAVEDOCS_PATH) {
+		event.respondWith(saveOrQueueDraft(request));
+		return;
+	}
+
+	if (request.method !== "GET") {
+		return;
+	}
+
+	if (PRECACHE_URLS.includes(url.pathname)) {
+		event.respondWith(caches.match(request).then((cached) => cached || fetch(request)));
+		return;
+	}
+
+	if (url.pathname.startsWith("/assets/")) {
+		// Built bundles carry a content hash in their name, so a cached copy never goes stale
+		event.respondWith(
+			url.pathname.includes("/dist/")
+				? cacheFirst(ASSET_CACHE, request)
+				: staleWhileRevalidate(ASSET_CACHE, request, request, ASSET_CACHE_LIMIT)
+		);
+		return;
+	}
+
+	const documentKey = getDocumentCacheKey(url);
+	if (documentKey) {
+		event.respondWith(
+			staleWhileRevalidate(DOCUMENT_CACHE, request, documentKey, DOCUMENT_CACHE_LIMIT, true)
+		);
+	}
+});
+
+self.addEventListener("sync", (event) => {
+	if (event.tag === DRAFT_SYNC_TAG) {
+		// A rejected sync is retried by the browser with its own backoff
+		event.waitUntil(
+			replayDrafts().then((settled) => {
+				if (!settled) {
+					throw new Error("Offline drafts are waiting to be replayed");
+				}
+			})
+		);
+	}
 });
+
+self.addEventListener("message", (event) => {
+	const data = event.data || {};
+	if (data.type === "vulero-session") {
+		event.waitUntil(
+			setSessionUser(data.user, data.csrf_token).then(() => replayOrRescheduleDrafts())
+		);
+	} else if (data.type === "vulero-replay-drafts") {
+		event.waitUntil(setCsrfToken(data.csrf_token).then(() => replayOrRescheduleDrafts()));
+	}
+});
+
+function getDocumentCacheKey(url) {
+	// Desk adds a cache-busting "_" parameter; key on the document alone
+	if (url.pathname === GETDOC_PATH) {
+		const doctype = url.searchParams.get("doctype");
+		const name = url.searchParams.get("name");
+		if (!OFFLINE_DOCTYPES.includes(doctype) || !name) {
+			return null;
+		}
+		const key = new URL(GETDOC_PATH, self.location.origin);
+		key.searchParams.set("doctype", doctype);
+		key.searchParams.set("name", name);
+		return key.href;
+	}
+
+	const parts = url.pathname.split("/").map(decodeURIComponent);
+	if (parts.length === 5 && parts[1] === "api" && parts[2] === "resource") {
+		return OFFLINE_DOCTYPES.includes(parts[3]) ? url.origin + url.pathname : null;
+	}
+	return null;
+}
+
+function cacheFirst(cacheName, request) {
+	return caches.open(cacheName).then((cache) =>
+		cache.match(request).then(
+			(cached) =>
+				cached ||
+				fetch(request).then((response) => {
+					if (response.ok) {
+						cache
+							.put(request, response.clone())
+							.then(() => trimCache(cache, ASSET_CACHE_LIMIT));
+					}
+					return response;
+				})
+		)
+	);
+}
+
+function staleWhileRevalidate(cacheName, request, key, limit, notifyChanges) {
+	return caches.open(cacheName).then((cache) =>
+		cache.match(key).then((cached) => {
+			const network = fetch(request).then((response) => {
+				if (!response.ok) {
+					// Drop copies the user may no longer read
+					return cache.delete(key).then(() => response);
+				}
+				const update = cache
+					.put(key, response.clone())
+					.then(() => trimCache(cache, limit))
+					.then(() => {
+						if (cached && notifyChanges) {
+							return notifyIfChanged(key, cached, response.clone());
+						}
+						return undefined;
+					});
+				return update.then(() => response);
+			});
+
+			if (!cached) {
+				return network;
+			}
+			network.catch(() => undefined);
+			return cached;
+		})
+	);
+}
+
+function notifyIfChanged(key, cached, response) {
+	// Forms opened from the cache reload when the server copy turns out to be newer
+	return Promise.all([cached.text(), response.text()]).then(([before, after]) => {
+		if (before === after) {
+			return undefined;
+		}
+		const url = new URL(key);
+		const parts = url.pathname.split("/").map(decodeURIComponent);
+		return notifyClients({
+			type: "vulero-document-updated",
+			doctype: url.searchParams.get("doctype") || parts[3],
+			name: url.searchParams.get("name") || parts[4],
+		});
+	});
+}
+
+function trimCache(cache, limit) {
+	// Cache keys are returned oldest first
+	return cache.keys().then((keys) => {
+		if (keys.length <= limit) {
+			return undefined;
+		}
+		return Promise.all(keys.slice(0, keys.length - limit).map((key) => cache.delete(key)));
+	});
+}
+
+function saveOrQueueDraft(request) {
+	const queued = request.clone();
+	return fetch(request).catch((error) =>
+		queueDraft(queued).then((response) => {
+			if (!response) {
+				throw error;
+			}
+			return response;
+		})
+	);
+}
+
+function queueDraft(request) {
+	return Promise.all([request.text(), getMeta("user")]).then(([body, user]) => {
+		const params = new URLSearchParams(body);
+		let doc = null;
+		try {
+			doc = JSON.parse(params.get("doc") || "null");
+		} catch (e) {
+			doc = null;
+		}
+		if (
+			!doc ||
+			!OFFLINE_DOCTYPES.includes(doc.doctype) ||
+			doc.docstatus ||
+			params.get("action") !== "Save"
+		) {
+			return null;
+		}
+
+		const draft = {
+			key: `${doc.doctype}::${doc.name}`,
+			doctype: doc.doctype,
+			name: doc.name,
+			user: user || null,
+			url: request.url,
+			body,
+			// The CSRF token is added on replay; the one sent now may have expired by then
+			headers: { "Content-Type": request.headers.get("Content-Type") },
+			queued_at: Date.now(),
+		};
+		// A later save of the same document replaces the queued one
+		return withStore(DRAFT_STORE, "readwrite", (store) => store.put(draft))
+			.then(() => registerDraftSync())
+			.then(() => offlineDraftResponse());
+	});
+}
+
+function registerDraftSync() {
+	if (!self.registration.sync) {
+		return undefined;
+	}
+	return self.registration.sync.register(DRAFT_SYNC_TAG).catch(() => undefined);
+}
+
+function offlineDraftResponse() {
+	// Answered as a validation error so the form stays unsaved and shows the message
+	const message = {
+		title: "Saved offline",
+		message:
+			"You are offline. Your draft was kept on this device and will be saved when you are back online.",
+		indicator: "orange",
+	};
+	const body = {
+		exc_type: "OfflineDraftQueued",
+		_server_messages: JSON.stringify([JSON.stringify(message)]),
+	};
+	return new Response(JSON.stringify(body), {
+		status: 417,
+		headers: { "Content-Type": "application/json" },
+	});
+}
+
+let replaying = null;
+
+function replayOrRescheduleDrafts() {
+	return replayDrafts().then((settled) => (settled ? undefined : registerDraftSync()));
+}
+
+function replayDrafts() {
+	// Resolves to false while drafts are left for a later attempt
+	if (!replaying) {
+		replaying = Promise.all([
+			withStore(DRAFT_STORE, "readonly", (store) => store.getAll()),
+			getMeta("user"),
+			getMeta("csrf_token"),
+		])
+			.then(([drafts, user, csrfToken]) => {
+				drafts.sort((a, b) => a.queued_at - b.queued_at);
+				return drafts.reduce(
+					(previous, draft) =>
+						previous.then((settled) =>
+							replayDraft(draft, user, csrfToken).then((done) => settled && done)
+						),
+					Promise.resolve(true)
+				);
+			})
+			.catch(() => false)
+			.then((settled) => {
+				replaying = null;
+				return settled;
+			});
+	}
+	return replaying;
+}
+
+function replayDraft(draft, user, csrfToken) {
+	// Resolves to false when the draft is kept for another attempt
+	if (draft.user && draft.user !== user) {
+		return deleteDraft(draft).then(() => true);
+	}
+	if (!csrfToken || (draft.retry_at && draft.retry_at > Date.now())) {
+		// Wait for an open page to hand over the token of the current session, or for the delay
+		return Promise.resolve(false);
+	}
+	return fetch(draft.url, {
+		method: "POST",
+		body: draft.body,
+		headers: { ...draft.headers, "X-Frappe-CSRF-Token": csrfToken },
+		credentials: "same-origin",
+	}).then(
+		(response) => {
+			if (response.ok || DRAFT_SETTLED_STATUSES.includes(response.status)) {
+				return dropDraft(draft, response.ok);
+			}
+			const attempts = (draft.attempts || 0) + 1;
+			if (attempts >= MAX_DRAFT_ATTEMPTS) {
+				return dropDraft(draft, false);
+			}
+			return updateDraft(draft, {
+				attempts,
+				retry_at: Date.now() + DRAFT_RETRY_DELAYS[attempts - 1],
+			}).then(() => false);
+		},
+		() => false
+	);
+}
+
+function dropDraft(draft, ok) {
+	return deleteDraft(draft)
+		.then(() =>
+			notifyClients({
+				type: "vulero-draft-replayed",
+				doctype: draft.doctype,
+				name: draft.name,
+				ok,
+			})
+		)
+		.then(() => true);
+}
+
+function deleteDraft(draft) {
+	return updateDraft(draft, null);
+}
+
+function updateDraft(draft, changes) {
+	// A newer save queued while this one was replaying replaces it and must be kept as it is
+	return withStore(DRAFT_STORE, "readwrite", (store) => {
+		const request = store.get(draft.key);
+		request.onsuccess = () => {
+			if (!request.result || request.result.queued_at !== draft.queued_at) {
+				return;
+			}
+			if (changes) {
+				store.put({ ...request.result, ...changes });
+			} else {
+				store.delete(draft.key);
+			}
+		};
+		return request;
+	});
+}
+
+function setSessionUser(user, csrfToken) {
+	return getMeta("user")
+		.then((previous) => {
+			if (previous === user) {
+				return undefined;
+			}
+			return clearUserData().then(() =>
+				withStore(META_STORE, "readwrite", (store) => store.put(user, "user"))
+			);
+		})
+		.then(() => setCsrfToken(csrfToken));
+}
+
+function setCsrfToken(csrfToken) {
+	if (!csrfToken) {
+		return Promise.resolve();
+	}
+	return withStore(META_STORE, "readwrite", (store) => store.put(csrfToken, "csrf_token")).catch(
+		() => undefined
+	);
+}
+
+function clearUserData() {
+	return Promise.all([
+		caches.delete(DOCUMENT_CACHE),
+		withStore(DRAFT_STORE, "readwrite", (store) => store.clear()),
+		withStore(META_STORE, "readwrite", (store) => store.clear()),
+	]).catch(() => undefined);
+}
+
+function getMeta(key) {
+	return withStore(META_STORE, "readonly", (store) => store.get(key)).catch(() => undefined);
+}
+
+function notifyClients(message) {
+	return self.clients
+		.matchAll({ type: "window" })
+		.then((clients) => clients.forEach((client) => client.postMessage(message)));
+}
+
+function openDatabase() {
+	return new Promise((resolve, reject) => {
+		const request = indexedDB.open(DB_NAME, DB_VERSION);
+		request.onupgradeneeded = () => {
+			request.result.createObjectStore(DRAFT_STORE, { keyPath: "key" });
+			request.result.createObjectStore(META_STORE);
+		};
+		request.onsuccess = () => resolve(request.result);
+		request.onerror = () => reject(request.error);
+	});
+}
+
+function withStore(storeName, mode, callback) {
+	return openDatabase().then(
+		(db) =>
+			new Promise((resolve, reject) => {
+				const transaction = db.transaction(storeName, mode);
+				const request = callback(transaction.objectStore(storeName));
+				transaction.oncomplete = () => {
+					db.close();
+					resolve(request.result);
+				};
+				transaction.onerror = transaction.onabort = () => {
+					db.close();
+					reject(transaction.error);
+				};
+			})
+	);
+}